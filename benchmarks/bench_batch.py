@@ -0,0 +1,73 @@
+# bench_batch.py
+"""
+Batch decryption throughput against file count and core count.
+
+Compares a sequential loop over decrypt_sii_file with the parallel
+decrypt_many, for growing batch sizes. Each core count runs in a fresh
+interpreter because the Rust thread pool reads RAYON_NUM_THREADS once.
+
+Usage:
+    python benchmarks/bench_batch.py path/to/profiles_dir
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from decrypt_truck.decrypt_truck import decrypt_many, decrypt_sii_file
+
+
+def measure(paths: list[str]):
+    for count in sorted({1, 10, 50, 200, len(paths)}):
+        if count > len(paths):
+            continue
+        batch = paths[:count]
+
+        start = time.perf_counter()
+        for path in batch:
+            try:
+                decrypt_sii_file(path)
+            except ValueError:
+                pass
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        decrypt_many(batch)
+        parallel = time.perf_counter() - start
+
+        print(
+            f"  files={count:<5} sequential {sequential * 1000:8.1f} ms  "
+            f"decrypt_many {parallel * 1000:8.1f} ms  "
+            f"({count / parallel:7.1f} files/s)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("directory")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    paths = sorted(str(p) for p in Path(args.directory).rglob("*.sii"))
+    if not paths:
+        sys.exit("No .sii files found")
+
+    if args.child:
+        measure(paths)
+        return
+
+    max_cores = os.cpu_count() or 1
+    for cores in sorted({1, 2, 4, max_cores} & set(range(1, max_cores + 1))):
+        print(f"cores={cores}")
+        env = dict(os.environ, RAYON_NUM_THREADS=str(cores))
+        subprocess.run(
+            [sys.executable, __file__, args.directory, "--child"],
+            env=env,
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
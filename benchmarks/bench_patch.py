@@ -0,0 +1,145 @@
+# bench_patch.py
+"""
+Patching active_mods in decrypted text: span splice against str.replace.
+
+Times the previous approach (rebuild the profile block line by line,
+then text.replace over the whole document) against replace_mods_in_text,
+which splices the new lines into the recorded span. A batch of several
+attribute edits is also timed against one str.replace per edit.
+
+Usage:
+    python benchmarks/bench_patch.py path/to/profile.sii [--repeat 20]
+    python benchmarks/bench_patch.py --synthetic 50  (MB of generated text)
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Run from a checkout: make `core` importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.mod_sync import replace_mods_in_text
+from core.modlist import ModList
+from core.sii_parser import (
+    PROFILE_UNIT,
+    SiiTextEdits,
+    extract_profile_block,
+    find_unit,
+)
+
+
+def replace_mods_by_str_replace(text: str, new_mods: ModList) -> str:
+    # The implementation replace_mods_in_text had before span patching
+    new_mods = new_mods.to_sii()
+    block = extract_profile_block(text)
+
+    output = []
+    inside = False
+    for line in block.splitlines():
+        s = line.strip()
+
+        if s.startswith("active_mods:"):
+            output.append(f" active_mods: {len(new_mods)}")
+            inside = True
+            continue
+
+        if inside:
+            if s.startswith("active_mods["):
+                continue
+            inside = False
+            for i, mod in enumerate(new_mods):
+                output.append(f' active_mods[{i}]: "{mod}"')
+
+        output.append(line)
+
+    return text.replace(block, "\n".join(output))
+
+
+def edit_by_str_replace(text: str, edits: dict[str, str]) -> str:
+    block = extract_profile_block(text)
+    for key, value in edits.items():
+        new_block = "\n".join(
+            f" {key}: {value}" if line.strip().startswith(f"{key}:") else line
+            for line in block.splitlines()
+        )
+        text = text.replace(block, new_block)
+        block = new_block
+    return text
+
+
+def edit_by_spans(text: str, edits: dict[str, str]) -> str:
+    profile = find_unit(text, PROFILE_UNIT)
+
+    batch = SiiTextEdits(text)
+    for key, value in edits.items():
+        batch.set_attribute(profile, key, value)
+    return batch.apply()
+
+
+def synthetic(megabytes: int, mods: int) -> str:
+    # A profile followed by filler units, the layout of a large save
+    parts = ["SiiNunit\n{\nuser_profile : _nameless.1 {\n face: 0\n brand: x\n"]
+    parts.append(f" active_mods: {mods}\n")
+    parts.extend(f' active_mods[{i}]: "mod_{i}|Mod {i}"\n' for i in range(mods))
+    parts.append(" cached_stats: 0\n}\n\n")
+
+    size = sum(map(len, parts))
+    i = 0
+    while size < megabytes * 1_000_000:
+        unit = (
+            f"vehicle : _nameless.{i:x} {{\n odometer: {i}\n"
+            f" accessories: 1\n accessories[0]: _nameless.{i + 1:x}\n}}\n\n"
+        )
+        parts.append(unit)
+        size += len(unit)
+        i += 1
+
+    parts.append("}\n")
+    return "".join(parts)
+
+
+def timed(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path", nargs="?")
+    parser.add_argument("--synthetic", type=int, metavar="MB")
+    parser.add_argument("--mods", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        text = synthetic(args.synthetic, args.mods)
+    elif args.path:
+        from core.decryptor import SiiDecryptor
+        text = SiiDecryptor().decrypt_to_string(args.path)
+    else:
+        parser.error("a save path or --synthetic is required")
+
+    mods = ModList.from_sii(f"new_mod_{i}|New mod {i}" for i in range(args.mods))
+    edits = {"face": "3", "brand": "scania", "cached_stats": "1"}
+
+    old = replace_mods_by_str_replace(text, mods)
+    new = replace_mods_in_text(text, mods)
+    print(f"{len(text) / 1e6:.1f} MB, outputs identical: {old == new}")
+
+    cases = [
+        ("active_mods, str.replace", lambda: replace_mods_by_str_replace(text, mods)),
+        ("active_mods, span splice", lambda: replace_mods_in_text(text, mods)),
+        (f"{len(edits)} edits, str.replace", lambda: edit_by_str_replace(text, edits)),
+        (f"{len(edits)} edits, one batch", lambda: edit_by_spans(text, edits)),
+    ]
+    for label, func in cases:
+        print(f"  {label:<28} {timed(func, args.repeat) * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# bench_threads.py
+"""
+Thread scaling of the native decryptor.
+
+Decrypts the same save N times from a pool of Python threads and reports
+wall time per thread count. With the GIL released inside the native call,
+throughput should grow with the thread count up to the number of cores.
+
+Usage:
+    python benchmarks/bench_threads.py path/to/game.sii [--copies 32]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from decrypt_truck.decrypt_truck import decrypt_sii_buffer, decrypt_sii_bytes
+
+
+def run(func, data, copies: int, threads: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(func, [data] * copies))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path")
+    parser.add_argument("--copies", type=int, default=32)
+    args = parser.parse_args()
+
+    data = Path(args.path).read_bytes()
+    views = {
+        "bytes": (decrypt_sii_bytes, data),
+        "memoryview": (decrypt_sii_buffer, memoryview(bytearray(data))),
+    }
+
+    max_threads = os.cpu_count() or 1
+    counts = sorted({1, 2, 4, 8, max_threads} & set(range(1, max_threads + 1)))
+
+    print(f"{args.path}: {len(data) / 1e6:.1f} MB x {args.copies} copies")
+    for label, (func, payload) in views.items():
+        base = None
+        for threads in counts:
+            elapsed = run(func, payload, args.copies, threads)
+            base = base or elapsed
+            print(
+                f"  {label:<10} threads={threads:<3} "
+                f"{elapsed * 1000:8.1f} ms  speedup x{base / elapsed:.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# bench_xml.py
+"""
+XML mod list import: streaming iterparse against the full tree.
+
+Writes a mod list of each size to a temporary file, then times the
+previous importer (ET.parse, findall, sort by index) against
+import_mods_from_xml, and reports peak Python memory of both. Lists are
+written in order and, with --shuffle, with the <mod> elements shuffled
+so the importer has to reorder them.
+
+Usage:
+    python benchmarks/bench_xml.py [--sizes 1000 10000 100000] [--shuffle]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+# Run from a checkout: make `core` importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.modlist import ModEntry, ModList
+from core.modlist_xml import export_mods_to_xml, import_mods_from_xml
+
+
+def import_by_tree(path: str) -> ModList:
+    # The implementation import_mods_from_xml had before iterparse
+    root = ET.parse(path).getroot()
+
+    mods = []
+    for m in sorted(root.findall("mod"), key=lambda x: int(x.get("index", 0))):
+        mod_id = (m.findtext("id") or "").strip()
+        mod_name = (m.findtext("name") or "").strip()
+        if mod_id:
+            mods.append(ModEntry(mod_id, mod_name or None))
+
+    return ModList(mods)
+
+
+def write_list(path: str, count: int, shuffle: bool):
+    mods = ModList(ModEntry(f"mod_{i}", f"Curated mod {i}") for i in range(count))
+    export_mods_to_xml(mods, path)
+
+    if shuffle:
+        tree = ET.parse(path)
+        root = tree.getroot()
+        children = list(root)
+        random.Random(count).shuffle(children)
+        root[:] = children
+        tree.write(path, encoding="utf-8", xml_declaration=True)
+
+
+def measure(func, path: str, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(path)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return result, best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--shuffle", action="store_true")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.sizes:
+            path = str(Path(tmp) / f"modlist_{count}.xml")
+            write_list(path, count, args.shuffle)
+
+            old, old_time, old_peak = measure(import_by_tree, path, args.repeat)
+            new, new_time, new_peak = measure(import_mods_from_xml, path, args.repeat)
+
+            print(f"mods={count:<7} identical: {old == new}")
+            print(f"  ET.parse    {old_time * 1000:8.1f} ms  peak {old_peak / 1e6:6.1f} MB")
+            print(f"  iterparse   {new_time * 1000:8.1f} ms  peak {new_peak / 1e6:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,22 @@
-from pathlib import Path
+from decrypt_truck.decrypt_truck import (
+    BsiiIndex,
+    decrypt_many,
+    decrypt_sii_bytes,
+    decrypt_sii_file,
+    decrypt_sii_file_to,
+    decrypt_sii_file_units,
+    encode_sii_bytes,
+    encode_sii_file,
+    get_active_mods,
+    get_active_mods_file,
+    iter_decrypt_sii_file,
+    set_active_mods,
+    set_active_mods_file,
+)
 
-from decrypt_truck.decrypt_truck import decrypt_sii_bytes
+
+def _utf8(text: str | bytes) -> bytes:
+    return text.encode("utf-8") if isinstance(text, str) else text
 
 
 class SiiDecryptor:
@@ -8,24 +24,119 @@ class SiiDecryptor:
     Drop-in replacement for the old DLL-based decryptor.
 
     Public behavior:
-    - decrypt_to_string(path) -> str
-    - raises exceptions on failure
+    - decrypt_to_string(path, units=None) -> str
+    - decrypt_to_bytes(path, units=None) -> bytes (UTF-8, not decoded)
+    - decrypt_bytes(data, units=None) -> bytes
+    - decrypt_bytes_to_string(data, units=None) -> str
+    - decrypt_to_file(path, output, units=None) (output: path, fd or file)
+    - iter_decrypted(path, units=None) -> iterator of bytes chunks
+    - decrypt_to_units(path, units=None) -> list[SiiUnit]
+    - open_index(path) -> BsiiIndex (units decoded on access)
+    - decrypt_many_to_strings(paths) -> list[str | Exception]
+    - encode_to_file(text, path, template_path=None)
+    - encode_to_bytes(text, template=None) -> bytes
+      (text as str, or as UTF-8 bytes)
+    - get_active_mods(data) -> list[str]
+    - set_active_mods(data, mods) -> bytes
+    - get_active_mods_from_file(path) -> list[str]
+    - set_active_mods_from_file(path, mods) -> bytes
+    - raises exceptions on failure (batch calls return them per file)
 
     Internals:
-    - Rust handles bytes -> bytes
-    - Python handles file I/O and text decoding
+    - Rust memory-maps the file and decodes it (path -> bytes)
+    - Python handles text decoding
     """
 
     def __init__(self):
         # No state needed; Rust module is loaded once by Python
         pass
 
-    def decrypt_to_string(self, input_path: str) -> str:
-        # Read file as bytes (same responsibility Python had before)
-        data = Path(input_path).read_bytes()
-
-        # Call Rust (bytes -> bytes)
-        decrypted = decrypt_sii_bytes(data)
+    def decrypt_to_string(self, input_path: str, units=None) -> str:
+        # Rust maps the file itself, so the save is never read into Python.
+        # `units` (e.g. {"user_profile"}) limits decoding to those unit types.
+        decrypted = decrypt_sii_file(input_path, units)
 
         # Decode to text exactly like before
         return decrypted.decode("utf-8", errors="replace")
+
+    def decrypt_to_bytes(self, input_path: str, units=None) -> bytes:
+        # The UTF-8 text without decoding it: core.sii_parser works on
+        # bytes directly, which saves a full-size str copy
+        return decrypt_sii_file(input_path, units)
+
+    def decrypt_bytes(self, data: bytes, units=None) -> bytes:
+        # decrypt_to_bytes for a save already in memory
+        return decrypt_sii_bytes(data, units)
+
+    def decrypt_bytes_to_string(self, data: bytes, units=None) -> str:
+        # Same as decrypt_to_string, for a save already in memory
+        return decrypt_sii_bytes(data, units).decode("utf-8", errors="replace")
+
+    def decrypt_to_file(self, input_path: str, output, units=None) -> None:
+        # Text is written as it is decoded, so memory stays bounded for
+        # large saves. `output` is a path, a file descriptor, or a binary
+        # file object whose write() returns the byte count, like io files.
+        decrypt_sii_file_to(input_path, output, units)
+
+    def iter_decrypted(self, input_path: str, units=None):
+        # Decrypted text as bytes chunks of about 1 MiB, decoded on a
+        # background thread. Chunks may split multi-byte characters.
+        return iter_decrypt_sii_file(input_path, units)
+
+    def decrypt_to_units(self, input_path: str, units=None) -> list:
+        # Structured units straight from the binary save, no text step.
+        # Raises ValueError for plain text saves.
+        return decrypt_sii_file_units(input_path, units)
+
+    def open_index(self, input_path: str) -> BsiiIndex:
+        # One pass over the save; idx["user_profile"], idx.units_of("mod")
+        # then decode only the units they return
+        return BsiiIndex.from_file(input_path)
+
+    def decrypt_many_to_strings(self, input_paths: list[str]) -> list[str | Exception]:
+        # Files are decoded in parallel on the Rust side; a failing file
+        # yields its exception instead of aborting the whole batch
+        return [
+            item if isinstance(item, Exception)
+            else item.decode("utf-8", errors="replace")
+            for item in decrypt_many(input_paths)
+        ]
+
+    def encode_to_file(
+        self,
+        text: str | bytes,
+        output_path: str,
+        template_path: str | None = None,
+    ) -> None:
+        # Inverse of decrypt_to_string. The template is the save the text
+        # came from: its structure table turns the text back into binary
+        # BSII. Without one (or for a plain text save) the text is kept.
+        # The output is never encrypted; the game loads it as is.
+        encode_sii_file(output_path, _utf8(text), template_path)
+
+    def encode_to_bytes(
+        self,
+        text: str | bytes,
+        template: bytes | None = None,
+    ) -> bytes:
+        # encode_to_file without the file: `template` is the original save
+        return encode_sii_bytes(_utf8(text), template)
+
+    def get_active_mods(self, data: bytes) -> list[str]:
+        # Reads only user_profile.active_mods, from a save in any format.
+        # Raises ValueError if the profile or the array cannot be found.
+        return get_active_mods(data)
+
+    def set_active_mods(self, data: bytes, mods: list[str]) -> bytes:
+        # The save with only that array rewritten. Text and binary saves
+        # keep their format; encrypted ones come back decrypted (binary
+        # or text), never re-encrypted
+        return set_active_mods(data, mods)
+
+    def get_active_mods_from_file(self, input_path: str) -> list[str]:
+        # get_active_mods on the memory-mapped file
+        return get_active_mods_file(input_path)
+
+    def set_active_mods_from_file(self, input_path: str, mods: list[str]) -> bytes:
+        # set_active_mods on the memory-mapped file; the file is not changed
+        return set_active_mods_file(input_path, mods)
@@ -1,32 +1,71 @@
 # mod_sync.py
-from core.sii_parser import extract_profile_block, extract_active_mods
+from core.modlist import ModList
+from core.sii_parser import (
+    PROFILE_UNIT,
+    SiiTextEdits,
+    extract_active_mods,
+    extract_profile_block,
+    find_unit,
+)
 
-def get_mods_from_decrypted_text(text: str) -> list[str]:
-    block = extract_profile_block(text)
-    return extract_active_mods(block)
+# The only unit needed to read the active mod list of a profile
+PROFILE_UNITS = {"user_profile"}
 
-def replace_mods_in_text(text: str, new_mods: list[str]) -> str:
+def get_mods_from_decrypted_text(text: str | bytes) -> ModList:
+    # `text` may also be the undecoded bytes; only the mods get decoded
     block = extract_profile_block(text)
+    return ModList.from_sii(extract_active_mods(block))
+
+def get_mods_from_units(units) -> ModList:
+    for unit in units:
+        if unit.name == "user_profile":
+            return ModList.from_sii(unit.get("active_mods", []))
+
+    raise RuntimeError("Profile block not found")
 
-    lines = block.splitlines()
-    output = []
-    inside = False
+def get_mods_from_save(decryptor, data: bytes) -> ModList:
+    # Fast path: the native module reads only the active_mods array
+    try:
+        return ModList.from_sii(decryptor.get_active_mods(data))
+    except ValueError:
+        # Fall back to decoding the whole save and parsing the text
+        text = decryptor.decrypt_bytes(data)
+        return get_mods_from_decrypted_text(text)
 
-    for line in lines:
-        s = line.strip()
+def get_mods_from_save_file(decryptor, path: str) -> ModList:
+    # get_mods_from_save without reading the file into Python
+    try:
+        return ModList.from_sii(decryptor.get_active_mods_from_file(path))
+    except ValueError:
+        text = decryptor.decrypt_to_bytes(path)
+        return get_mods_from_decrypted_text(text)
 
-        if s.startswith("active_mods:"):
-            output.append(f" active_mods: {len(new_mods)}")
-            inside = True
-            continue
+def replace_mods_in_save(decryptor, data: bytes, new_mods: ModList) -> bytes:
+    # Fast path: only the active_mods array is rewritten, the rest of the
+    # save is kept byte for byte (encrypted saves come back decrypted)
+    try:
+        return decryptor.set_active_mods(data, new_mods.to_sii())
+    except ValueError:
+        # Written as patched text, which the game loads; re-encoding to
+        # binary would rebuild every unit of the save
+        text = decryptor.decrypt_bytes(data)
+        return replace_mods_in_text(text, new_mods)
 
-        if inside:
-            if s.startswith("active_mods["):
-                continue
-            inside = False
-            for i, mod in enumerate(new_mods):
-                output.append(f' active_mods[{i}]: "{mod}"')
+def replace_mods_in_save_file(decryptor, path: str, new_mods: ModList) -> bytes:
+    # replace_mods_in_save without reading the file into Python
+    try:
+        return decryptor.set_active_mods_from_file(path, new_mods.to_sii())
+    except ValueError:
+        text = decryptor.decrypt_to_bytes(path)
+        return replace_mods_in_text(text, new_mods)
 
-        output.append(line)
+def replace_mods_in_text(text: str | bytes, new_mods: ModList) -> str | bytes:
+    # Returns the same kind it is given
+    profile = find_unit(text, PROFILE_UNIT)
+    if profile is None:
+        raise RuntimeError("Profile block not found")
 
-    return text.replace(block, "\n".join(output))
+    # Only the active_mods lines are replaced, everything else is copied
+    edits = SiiTextEdits(text)
+    edits.set_attribute(profile, "active_mods", [f'"{mod}"' for mod in new_mods.to_sii()])
+    return edits.apply()
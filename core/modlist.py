@@ -0,0 +1,97 @@
+# modlist.py
+import sys
+
+
+class ModEntry:
+    """
+    One active mod, parsed once from its SII form "id|name".
+
+    `name` is None when the entry has no "|" at all, so that to_sii()
+    gives back exactly the string it was parsed from ("id" vs "id|").
+    Ids are interned: the same ids show up in every loaded list.
+    """
+
+    __slots__ = ("id", "name")
+
+    def __init__(self, mod_id: str, name: str | None = None):
+        self.id = sys.intern(mod_id)
+        self.name = name
+
+    @classmethod
+    def parse(cls, value: str) -> "ModEntry":
+        mod_id, sep, name = value.partition("|")
+        return cls(mod_id, name if sep else None)
+
+    @property
+    def display_name(self) -> str:
+        return self.name or ""
+
+    def to_sii(self) -> str:
+        return self.id if self.name is None else f"{self.id}|{self.name}"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ModEntry):
+            return NotImplemented
+        return self.id == other.id and self.name == other.name
+
+    def __hash__(self) -> int:
+        return hash((self.id, self.name))
+
+    def __repr__(self) -> str:
+        return f"ModEntry({self.to_sii()!r})"
+
+
+class ModList:
+    """
+    Ordered, read-only list of ModEntry with O(1) lookup by id. Order is
+    load order, as in the profile's active_mods array.
+    """
+
+    __slots__ = ("_entries", "_positions")
+
+    def __init__(self, entries=()):
+        self._entries: tuple[ModEntry, ...] = tuple(entries)
+        # First position of each id
+        self._positions: dict[str, int] = {}
+        for i, entry in enumerate(self._entries):
+            self._positions.setdefault(entry.id, i)
+
+    @classmethod
+    def from_sii(cls, values) -> "ModList":
+        return cls(ModEntry.parse(value) for value in values)
+
+    def to_sii(self) -> list[str]:
+        return [entry.to_sii() for entry in self._entries]
+
+    def get(self, mod_id: str) -> ModEntry | None:
+        i = self._positions.get(mod_id)
+        return None if i is None else self._entries[i]
+
+    def index(self, mod_id: str) -> int:
+        # Position of the mod in load order; ValueError if absent
+        try:
+            return self._positions[mod_id]
+        except KeyError:
+            raise ValueError(f"Mod not in list: {mod_id}") from None
+
+    def __contains__(self, mod_id) -> bool:
+        return mod_id in self._positions
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return ModList(self._entries[i])
+        return self._entries[i]
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ModList):
+            return NotImplemented
+        return self._entries == other._entries
+
+    def __repr__(self) -> str:
+        return f"ModList({len(self._entries)} mods)"
@@ -0,0 +1,240 @@
+# modlist_formats.py
+"""
+Mod list file formats and auto-detection.
+
+XML (core.modlist_xml) stays the interchange default. Two compact
+formats load without building any tree:
+- JSON: {"ets2_modlist":1,"mods":["id|name",...]}, one json.loads
+- binary (.e2ml): length-prefixed UTF-8 records read with struct
+
+Both store the SII "id|name" strings as they are, so they round-trip
+a ModList exactly (XML loses the difference between "id" and "id|").
+"""
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+from core.modlist import ModEntry, ModList
+from core.modlist_xml import export_mods_to_xml, import_mods_from_xml
+
+# Bytes read from the start of a file to detect its format
+_SNIFF_SIZE = 64
+_WRITE_BUFFER = 1 << 16
+
+
+class ModListFormat(NamedTuple):
+    name: str
+    label: str  # shown in the UI
+    extensions: tuple[str, ...]
+    sniff: Callable[[bytes], bool]  # start of the file -> is this format
+    load: Callable[[str], ModList]
+    save: Callable[..., None]  # (iterable of ModEntry or "id|name", path)
+
+
+_FORMATS: dict[str, ModListFormat] = {}
+
+
+def register_format(fmt: ModListFormat):
+    # Later registrations win for the same name; detection order is
+    # registration order
+    _FORMATS[fmt.name] = fmt
+
+
+def formats() -> list[ModListFormat]:
+    return list(_FORMATS.values())
+
+
+def detect_format(path: str) -> ModListFormat:
+    """By magic bytes first, then by extension. ValueError if neither."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(_SNIFF_SIZE)
+    except FileNotFoundError:
+        head = b""  # a file about to be written: extension only
+
+    for fmt in _FORMATS.values():
+        if head and fmt.sniff(head):
+            return fmt
+
+    suffix = Path(path).suffix.lower()
+    for fmt in _FORMATS.values():
+        if suffix in fmt.extensions:
+            return fmt
+
+    raise ValueError("Unsupported file type")
+
+
+def load_modlist(path: str) -> ModList:
+    return detect_format(path).load(path)
+
+
+def save_modlist(mods, path: str, format_name: str | None = None):
+    """
+    Writes with the named format, else the one matching the extension,
+    else XML.
+    """
+    if format_name is not None:
+        fmt = _FORMATS[format_name]
+    else:
+        suffix = Path(path).suffix.lower()
+        fmt = next(
+            (fmt for fmt in _FORMATS.values() if suffix in fmt.extensions),
+            _FORMATS["xml"],
+        )
+
+    fmt.save(mods, path)
+
+
+def _sii_strings(mods):
+    for mod in mods:
+        yield mod if isinstance(mod, str) else mod.to_sii()
+
+
+# ---------- XML ----------
+
+def _sniff_xml(head: bytes) -> bool:
+    head = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+    return head.startswith((b"<?xml", b"<ets2_modlist"))
+
+
+# ---------- JSON ----------
+
+_JSON_MAGIC = b'{"ets2_modlist":'
+_JSON_VERSION = 1
+
+
+def _load_json(path: str) -> ModList:
+    with open(path, "rb") as f:
+        doc = json.loads(f.read())
+
+    if not isinstance(doc, dict):
+        raise ValueError("Invalid JSON mod list")
+    if doc.get("ets2_modlist") != _JSON_VERSION:
+        raise ValueError("Unsupported JSON mod list version")
+
+    mods = doc.get("mods")
+    if not isinstance(mods, list) or not all(isinstance(mod, str) for mod in mods):
+        raise ValueError("Invalid JSON mod list")
+
+    return ModList.from_sii(mods)
+
+
+def _save_json(mods, path: str):
+    doc = {"ets2_modlist": _JSON_VERSION, "mods": list(_sii_strings(mods))}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, separators=(",", ":"))
+
+
+# ---------- binary ----------
+#
+# "E2ML", u8 version, u32 count, then per mod:
+#   u16 id length, id, u16 name length (0xFFFF: no name), name
+# Integers are little-endian, strings UTF-8.
+
+_BINARY_MAGIC = b"E2ML"
+_BINARY_VERSION = 1
+_BINARY_HEADER = struct.Struct("<4sBI")
+_LENGTH = struct.Struct("<H")
+_NO_NAME = 0xFFFF
+
+
+def _load_binary(path: str) -> ModList:
+    data = Path(path).read_bytes()
+
+    try:
+        magic, version, count = _BINARY_HEADER.unpack_from(data)
+    except struct.error:
+        raise ValueError("Truncated binary mod list") from None
+    if magic != _BINARY_MAGIC or version != _BINARY_VERSION:
+        raise ValueError("Unsupported binary mod list")
+
+    read_length = _LENGTH.unpack_from
+    pos = _BINARY_HEADER.size
+    mods = []
+
+    try:
+        for _ in range(count):
+            (size,) = read_length(data, pos)
+            pos += 2
+            if pos + size > len(data):
+                raise ValueError("Truncated binary mod list")
+            mod_id = data[pos:pos + size].decode("utf-8")
+            pos += size
+
+            (size,) = read_length(data, pos)
+            pos += 2
+            if size == _NO_NAME:
+                name = None
+            else:
+                if pos + size > len(data):
+                    raise ValueError("Truncated binary mod list")
+                name = data[pos:pos + size].decode("utf-8")
+                pos += size
+
+            mods.append(ModEntry(mod_id, name))
+    except struct.error:
+        raise ValueError("Truncated binary mod list") from None
+
+    return ModList(mods)
+
+
+def _save_binary(mods, path: str):
+    # Written next to `path` and renamed over it, so an entry that fails
+    # halfway through leaves no half-written file behind
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            _write_binary(mods, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_binary(mods, f):
+    # Count is patched in at the end, so `mods` can be a generator
+    f.write(_BINARY_HEADER.pack(_BINARY_MAGIC, _BINARY_VERSION, 0))
+    count = 0
+    out = bytearray()
+
+    for mod in mods:
+        if isinstance(mod, str):
+            mod = ModEntry.parse(mod)
+
+        mod_id = mod.id.encode("utf-8")
+        name = None if mod.name is None else mod.name.encode("utf-8")
+        if len(mod_id) >= _NO_NAME or (name is not None and len(name) >= _NO_NAME):
+            raise ValueError(f"Mod entry too long: {mod.id}")
+
+        out += _LENGTH.pack(len(mod_id))
+        out += mod_id
+        if name is None:
+            out += _LENGTH.pack(_NO_NAME)
+        else:
+            out += _LENGTH.pack(len(name))
+            out += name
+        count += 1
+
+        if len(out) >= _WRITE_BUFFER:
+            f.write(out)
+            out.clear()
+
+    f.write(out)
+    f.seek(0)
+    f.write(_BINARY_HEADER.pack(_BINARY_MAGIC, _BINARY_VERSION, count))
+
+
+register_format(ModListFormat(
+    "xml", "XML", (".xml",), _sniff_xml, import_mods_from_xml, export_mods_to_xml
+))
+register_format(ModListFormat(
+    "json", "JSON", (".json",), lambda head: head.startswith(_JSON_MAGIC),
+    _load_json, _save_json,
+))
+register_format(ModListFormat(
+    "binary", "Binary", (".e2ml",), lambda head: head.startswith(_BINARY_MAGIC),
+    _load_binary, _save_binary,
+))
@@ -1,29 +1,99 @@
-from xml.etree.ElementTree import Element, SubElement, ElementTree
+from itertools import chain
+from xml.sax.saxutils import escape
 
-def export_mods_to_xml(mods: list[str], path: str):
-    root = Element("ets2_modlist", version="1.0")
+from core.modlist import ModEntry, ModList
 
-    for i, mod in enumerate(mods):
-        mod_id, mod_name = mod.split("|", 1) if "|" in mod else (mod, "")
-        m = SubElement(root, "mod", index=str(i))
-        SubElement(m, "id").text = mod_id
-        SubElement(m, "name").text = mod_name
+# What ElementTree.write(path, encoding="utf-8", xml_declaration=True)
+# produced for the <ets2_modlist version="1.0"> tree
+_DECLARATION = "<?xml version='1.0' encoding='utf-8'?>\n"
+_ROOT_OPEN = '<ets2_modlist version="1.0">'
+_ROOT_CLOSE = "</ets2_modlist>"
+_ROOT_EMPTY = '<ets2_modlist version="1.0" />'
+_WRITE_BUFFER = 1 << 16
 
-    tree = ElementTree(root)
-    tree.write(path, encoding="utf-8", xml_declaration=True)
 
+def _element(tag: str, text: str) -> str:
+    # An empty element is written short, as ElementTree does
+    if not text:
+        return f"<{tag} />"
+    return f"<{tag}>{escape(text)}</{tag}>"
 
-def import_mods_from_xml(path: str) -> list[str]:
+
+def export_mods_to_xml(mods, path: str):
+    """
+    Writes mods one <mod> record at a time, so memory does not depend on
+    the list size. `mods` is any iterable of ModEntry or "id|name"
+    strings, e.g. a generator. The output is byte for byte what the
+    previous ElementTree-based export wrote.
+    """
+    mods = iter(mods)
+    first = next(mods, None)
+
+    # Same file options as ElementTree uses for an encoded path
+    with open(
+        path, "w", encoding="utf-8", errors="xmlcharrefreplace", buffering=_WRITE_BUFFER
+    ) as f:
+        f.write(_DECLARATION)
+
+        if first is None:
+            f.write(_ROOT_EMPTY)
+            return
+
+        f.write(_ROOT_OPEN)
+        for i, mod in enumerate(chain((first,), mods)):
+            if isinstance(mod, str):
+                mod = ModEntry.parse(mod)
+
+            f.write(
+                f'<mod index="{i}">{_element("id", mod.id)}'
+                f'{_element("name", mod.display_name)}</mod>'
+            )
+        f.write(_ROOT_CLOSE)
+
+
+def iter_mods_from_xml(path: str):
+    """
+    Yields (index, ModEntry) for each <mod> in document order, without
+    building the tree: each element is dropped once read. Entries with
+    an empty id are skipped; `index` is the load order position.
+    """
     import xml.etree.ElementTree as ET
 
-    tree = ET.parse(path)
-    root = tree.getroot()
+    depth = 0
+    root = None
+
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if root is None:
+                root = elem
+            continue
+
+        depth -= 1
+        if depth != 1 or elem.tag != "mod":
+            continue
+
+        index = int(elem.get("index", 0))
+        mod_id = (elem.findtext("id") or "").strip()
+        mod_name = (elem.findtext("name") or "").strip()
+
+        # Read elements are kept by the root otherwise
+        root.clear()
 
-    mods = []
-    for m in sorted(root.findall("mod"), key=lambda x: int(x.get("index", 0))):
-        mod_id = (m.findtext("id") or "").strip()
-        mod_name = (m.findtext("name") or "").strip()
         if mod_id:
-            mods.append(f"{mod_id}|{mod_name}" if mod_name else mod_id)
+            yield index, ModEntry(mod_id, mod_name or None)
+
+
+def import_mods_from_xml(path: str) -> ModList:
+    entries = list(iter_mods_from_xml(path))
+
+    # Exported lists are numbered 0..n-1: each mod goes straight into its
+    # slot. Anything else (gaps, duplicates) falls back to a stable sort.
+    slots = [None] * len(entries)
+    for index, entry in entries:
+        if not 0 <= index < len(slots) or slots[index] is not None:
+            entries.sort(key=lambda item: item[0])
+            return ModList(entry for _, entry in entries)
+        slots[index] = entry
 
-    return mods
+    return ModList(slots)
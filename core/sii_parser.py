@@ -1,33 +1,312 @@
 # sii_parser.py
 import re
+from functools import lru_cache
+from typing import NamedTuple
 
-def extract_profile_block(text: str) -> str:
-    match = re.search(r"profile\s*:\s*[^{]+\{", text)
-    if not match:
-        raise RuntimeError("Profile block not found")
+# Every function here takes the document either as text (str) or as the
+# undecoded UTF-8 bytes (bytes, bytearray or memoryview; SiiTextEdits
+# needs str or bytes). Patterns are kept as str sources and compiled for
+# whichever kind the document is; with bytes only the strings actually
+# returned (names, values, mods) get decoded.
+
+# Opening brace at the end of a line: unit headers, and the SiiNunit one.
+# Starts with a literal, so the regex engine skips ahead with a fast search.
+_OPEN_BRACE = r"\{[ \t]*\r?\n"
+# `type : id {` from the start of the line up to the brace
+_UNIT_HEADER = r"[ \t]*([\w.]+)[ \t]*:[ \t]*([\w.]+)[ \t]*\{"
+# `}` closing a unit, alone on its line (a value is never a bare brace)
+_UNIT_END = r"\n[ \t]*\}[ \t]*(?=\r?\n|$)"
+# `key: value` or `key[i]: value` inside a unit
+_ATTRIBUTE = r"^[ \t]*([\w.]+)(?:\[(\d*)\])?[ \t]*:[ \t]*(.*?)[ \t]*\r?$"
+_ACTIVE_MOD = r'^[ \t]*active_mods\[(\d+)\][ \t]*:[ \t]*"(.+)"'
+_BLANK = r"[ \t]*"
+
+PROFILE_UNIT = "user_profile"
+
+
+class UnitSpan(NamedTuple):
+    """Where a unit is in the document: text[start:end] is the whole unit,
+    text[body_start:end] its attribute lines and closing brace."""
+    type: str
+    id: str
+    start: int
+    body_start: int
+    end: int
+
+
+@lru_cache(maxsize=128)
+def _compile(source: str, binary: bool, flags: int = 0) -> re.Pattern:
+    return re.compile(source.encode() if binary else source, flags)
+
+
+def _decode(value) -> str:
+    return value if isinstance(value, str) else value.decode("utf-8", errors="replace")
+
+
+def _line_start(text, position: int) -> int:
+    if not isinstance(text, memoryview):
+        newline = "\n" if isinstance(text, str) else b"\n"
+        return text.rfind(newline, 0, position) + 1
+
+    # memoryview has no rfind: look back through a growing window
+    window = 256
+    while True:
+        low = max(0, position - window)
+        found = bytes(text[low:position]).rfind(b"\n")
+        if found >= 0:
+            return low + found + 1
+        if low == 0:
+            return 0
+        window *= 4
+
+
+def iter_units(text, unit_type: str | None = None):
+    """
+    Yields a UnitSpan per unit, in document order. Only header lines and
+    closing braces are looked at; unit bodies are skipped over.
+
+    With `unit_type` only units of that type are yielded, and the search
+    jumps straight to their headers.
+    """
+    binary = not isinstance(text, str)
+
+    if unit_type is None:
+        headers = _compile(_OPEN_BRACE, binary).finditer(text)
+        header = _compile(_UNIT_HEADER, binary).fullmatch
+    else:
+        headers = _unit_header_of(unit_type, binary).finditer(text)
+        header = None
+
+    blank = _compile(_BLANK, binary).fullmatch
+    closing = _compile(_UNIT_END, binary).search
+    end = 0
+
+    for m in headers:
+        if m.start() < end:
+            continue  # inside the previous unit
+
+        line_start = _line_start(text, m.start())
+        if header is None:
+            # The type must start its line
+            if blank(text, line_start, m.start()) is None:
+                continue
+            found_type, found_id, start = unit_type, _decode(m[1]), m.start()
+        else:
+            unit_header = header(text, line_start, m.start() + 1)
+            if unit_header is None:
+                continue
+            found_type, found_id = map(_decode, unit_header.groups())
+            start = unit_header.start(1)
+
+        # Search from the newline so an empty body still matches
+        unit_end = closing(text, m.end() - 1)
+        # An unclosed unit runs to the end of the text
+        end = unit_end.end() if unit_end else len(text)
+
+        yield UnitSpan(found_type, found_id, start, m.end(), end)
+
+
+class SiiTextIndex:
+    """
+    Index of the units of a decrypted SiiNunit document, built in one
+    pass by iter_units(); attributes() parses a single unit on demand.
+
+    With `unit_type` only units of that type are indexed, which is much
+    cheaper when a single unit of a large document is needed.
+    """
+
+    def __init__(self, text, unit_type: str | None = None):
+        self.text = text
+        self.units: list[UnitSpan] = []
+        self._by_type: dict[str, list[UnitSpan]] = {}
+        self._by_id: dict[str, UnitSpan] = {}
+
+        for unit in iter_units(text, unit_type):
+            self.units.append(unit)
+            self._by_type.setdefault(unit.type, []).append(unit)
+            self._by_id.setdefault(unit.id, unit)
+
+    def __len__(self) -> int:
+        return len(self.units)
+
+    def of_type(self, unit_type: str) -> list[UnitSpan]:
+        return self._by_type.get(unit_type, [])
+
+    def first(self, unit_type: str) -> UnitSpan | None:
+        units = self._by_type.get(unit_type)
+        return units[0] if units else None
+
+    def by_id(self, unit_id: str) -> UnitSpan | None:
+        return self._by_id.get(unit_id)
+
+    def block(self, unit: UnitSpan):
+        return self.text[unit.start:unit.end]
 
-    start = match.end()
-    depth = 1
-    i = start
+    def attributes(self, unit: UnitSpan) -> dict[str, str | list[str]]:
+        """
+        Attribute values of one unit, as written (quotes removed).
+        Arrays become lists; an empty array keeps its count ("0").
+        """
+        values: dict[str, str | list[str]] = {}
+        arrays: dict[str, list[str]] = {}
+        binary = not isinstance(self.text, str)
 
-    while i < len(text) and depth > 0:
-        if text[i] == "{":
-            depth += 1
-        elif text[i] == "}":
-            depth -= 1
-        i += 1
+        for m in _compile(_ATTRIBUTE, binary, re.M).finditer(
+            self.text, unit.body_start, unit.end
+        ):
+            key, index, value = m.groups()
+            key, value = _decode(key), _decode(value)
+            if len(value) >= 2 and value[0] == value[-1] == '"':
+                value = value[1:-1]
 
-    return text[match.start():i]
+            if index is None:
+                values[key] = value
+                continue
 
+            items = arrays.setdefault(key, [])
+            # `key[]: value` appends
+            i = int(index) if index else len(items)
+            if i >= len(items):
+                items.extend([""] * (i + 1 - len(items)))
+            items[i] = value
 
-def extract_active_mods(profile_block: str) -> list[str]:
-    mods = {}
+        values.update(arrays)
+        return values
+
+
+def find_unit(text, unit_type: str) -> UnitSpan | None:
+    """First unit of that type; the scan stops there."""
+    return next(iter_units(text, unit_type), None)
+
+
+def attribute_span(text, unit: UnitSpan, key: str) -> tuple[int, int] | None:
+    """
+    (start, end) of the lines holding `key` in the unit: for an array the
+    `key: N` line and the `key[i]` lines after it, newlines included.
+    None if the unit has no such attribute.
+    """
+    start = end = None
+    lines = _attribute_lines(key, not isinstance(text, str))
+
+    for m in lines.finditer(text, unit.body_start, unit.end):
+        if start is None:
+            start = m.start()
+        elif m.start() != end:
+            break  # only the first run of consecutive lines
+        end = m.end()
+
+    return None if start is None else (start, end)
+
+
+class SiiTextEdits:
+    """
+    Edits to a document by character span, applied in one pass: apply()
+    joins the untouched slices and the replacements once, however many
+    edits there are. Spans refer to the original text.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self._edits: list[tuple[int, int, str | bytes]] = []
+
+    def replace(self, start: int, end: int, replacement):
+        self._edits.append((start, end, replacement))
+
+    def set_attribute(self, unit: UnitSpan, key: str, value: str | list[str]):
+        """
+        Replaces `key` in the unit, or adds it before the closing brace.
+        Values are written as given (quote strings that need it); a list
+        is written as an array. Indentation and line endings follow the
+        document.
+        """
+        text = self.text
+        binary = not isinstance(text, str)
+        lf, crlf, indent_chars = ("\n", "\r\n", " \t")
+        if binary:
+            lf, crlf, indent_chars = (b"\n", b"\r\n", b" \t")
+
+        span = attribute_span(text, unit, key)
+
+        if span is None:
+            # Insert as the last line of the unit
+            start = end = text.rfind(lf, unit.body_start - 1, unit.end) + 1
+            indent = " "
+        else:
+            start, end = span
+            line = text[start:text.find(lf, start, end) + 1 or end]
+            indent = _decode(line[:len(line) - len(line.lstrip(indent_chars))])
+
+        newline = "\r\n" if text.startswith(crlf, unit.body_start - 2) else "\n"
+        replacement = format_attribute(key, value, indent, newline)
+        self.replace(start, end, replacement.encode() if binary else replacement)
+
+    def apply(self):
+        text = self.text
+
+        if len(self._edits) == 1:
+            start, end, replacement = self._edits[0]
+            old = text[start:end]
+            # One edit is the common case (active_mods). str.replace copies
+            # the document once; slicing and joining (or concatenating)
+            # copies it twice. It is only safe when the span is the first
+            # occurrence of its text, which find() checks up to the span.
+            if old and text.find(old, 0, end) == start:
+                return text.replace(old, replacement, 1)
+
+        parts = []
+        position = 0
+
+        for start, end, replacement in sorted(self._edits, key=lambda edit: edit[:2]):
+            if start < position:
+                raise ValueError("Overlapping edits")
+            parts.append(text[position:start])
+            parts.append(replacement)
+            position = end
+
+        parts.append(text[position:])
+        return text[:0].join(parts)
+
+
+@lru_cache(maxsize=64)
+def _unit_header_of(unit_type: str, binary: bool) -> re.Pattern:
+    # `type : id {` from the type on; begins with a literal, like _OPEN_BRACE
+    return _compile(
+        rf"{re.escape(unit_type)}[ \t]*:[ \t]*([\w.]+)[ \t]*\{{[ \t]*\r?\n", binary
+    )
+
+
+@lru_cache(maxsize=64)
+def _attribute_lines(key: str, binary: bool) -> re.Pattern:
+    # `key: ...` and `key[i]: ...` lines, newline included
+    return _compile(rf"^[ \t]*{re.escape(key)}(?:\[\d*\])?[ \t]*:.*\n?", binary, re.M)
+
+
+def format_attribute(
+    key: str, value: str | list[str], indent: str = " ", newline: str = "\n"
+) -> str:
+    if not isinstance(value, list):
+        return f"{indent}{key}: {value}{newline}"
+
+    lines = [f"{indent}{key}: {len(value)}{newline}"]
+    lines.extend(f"{indent}{key}[{i}]: {item}{newline}" for i, item in enumerate(value))
+    return "".join(lines)
+
+
+def extract_profile_block(text, index: SiiTextIndex | None = None):
+    # Returns a slice of the same kind as `text` (str, bytes, memoryview)
+    if index is None:
+        unit = find_unit(text, PROFILE_UNIT)
+    else:
+        unit = index.first(PROFILE_UNIT)
+
+    if unit is None:
+        raise RuntimeError("Profile block not found")
 
-    for line in profile_block.splitlines():
-        line = line.strip()
+    return text[unit.start:unit.end]
 
-        m = re.match(r'active_mods\[(\d+)\]\s*:\s*"(.+)"', line)
-        if m:
-            mods[int(m.group(1))] = m.group(2)
 
+def extract_active_mods(profile_block) -> list[str]:
+    # Only the mod strings are decoded when the block is bytes
+    pattern = _compile(_ACTIVE_MOD, not isinstance(profile_block, str), re.M)
+    mods = {int(m[1]): _decode(m[2]) for m in pattern.finditer(profile_block)}
     return [mods[i] for i in sorted(mods)]
@@ -0,0 +1,130 @@
+//! Synthetic BSII documents for the benchmarks.
+
+#![allow(dead_code)]
+
+use std::hint::black_box;
+use std::time::{Duration, Instant};
+
+const CHAR_TABLE: &str = "0123456789abcdefghijklmnopqrstuvwxyz_";
+
+fn token(value: &str) -> u64 {
+    value.chars().rev().fold(0u64, |result, c| {
+        result * 38 + CHAR_TABLE.find(c).unwrap() as u64 + 1
+    })
+}
+
+struct Writer(Vec<u8>);
+
+impl Writer {
+    fn u8(&mut self, value: u8) -> &mut Self {
+        self.0.push(value);
+        self
+    }
+
+    fn u32(&mut self, value: u32) -> &mut Self {
+        self.0.extend_from_slice(&value.to_le_bytes());
+        self
+    }
+
+    fn u64(&mut self, value: u64) -> &mut Self {
+        self.0.extend_from_slice(&value.to_le_bytes());
+        self
+    }
+
+    fn f32(&mut self, value: f32) -> &mut Self {
+        self.0.extend_from_slice(&value.to_le_bytes());
+        self
+    }
+
+    fn string(&mut self, value: &str) -> &mut Self {
+        self.u32(value.len() as u32);
+        self.0.extend_from_slice(value.as_bytes());
+        self
+    }
+
+    fn id(&mut self, value: &str) -> &mut Self {
+        let parts: Vec<&str> = value.split('.').collect();
+        self.u8(parts.len() as u8);
+        for part in parts {
+            self.u64(token(part));
+        }
+        self
+    }
+}
+
+/// A BSII document with `structures` structure definitions and `units`
+/// data blocks spread evenly over them, shaped like a `game.sii`: every
+/// unit has strings, numbers, floats, vectors, ids, ordinals and arrays.
+pub fn sample_bsii(structures: u32, units: usize) -> Vec<u8> {
+    let mut w = Writer(Vec::new());
+    w.u32(1229542210).u32(2);
+
+    for structure_id in 1..=structures {
+        w.u32(0).u8(1).u32(structure_id);
+        w.string(&format!("unit_type_{}", structure_id));
+        w.u32(0x01).string("name");
+        w.u32(0x03).string("token");
+        w.u32(0x25).string("count");
+        w.u32(0x27).string("money");
+        w.u32(0x05).string("ratio");
+        w.u32(0x09).string("position");
+        w.u32(0x19).string("placement");
+        w.u32(0x35).string("enabled");
+        w.u32(0x37).string("kind");
+        w.u32(3).u32(0).string("alpha").u32(1).string("beta");
+        w.u32(3).string("gamma");
+        w.u32(0x39).string("owner");
+        w.u32(0x26).string("values");
+        w.u32(0x3A).string("links");
+        w.u32(0x02).string("labels");
+        w.u32(0x06).string("weights");
+        w.u32(0);
+    }
+
+    for unit in 0..units {
+        let structure_id = (unit as u32 % structures) + 1;
+        w.u32(structure_id).id(&format!("unit.u{}", unit));
+        w.string(&format!("Unit number {}", unit));
+        w.u64(token("token"));
+        w.u32(unit as u32);
+        w.u32(if unit % 7 == 0 {
+            u32::MAX
+        } else {
+            unit as u32 * 3
+        });
+        w.f32(unit as f32 * 0.25);
+        w.f32(1.0).f32(2.5).f32(unit as f32);
+        w.f32(12.5)
+            .f32(3.0)
+            .f32(-4.75)
+            .f32((2048 | (2049 << 12)) as f32);
+        w.f32(1.0).f32(0.0).f32(0.5).f32(0.25);
+        w.u8((unit % 2) as u8);
+        w.u32((unit % 3) as u32);
+        w.id(&format!("owner.o{}", unit % 100));
+        w.u32(4).u32(1).u32(2).u32(3).u32(unit as u32);
+        w.u32(2).id("link.a").u8(0);
+        w.u32(2).string("first|First").string("second|Second");
+        w.u32(3).f32(0.5).f32(unit as f32).f32(1e8);
+    }
+
+    w.u32(0).u8(0);
+    w.0
+}
+
+/// Runs `f` `iterations` times after one warm-up call and returns the
+/// median duration.
+pub fn median<T>(iterations: usize, mut f: impl FnMut() -> T) -> Duration {
+    black_box(f());
+
+    let mut times: Vec<Duration> = (0..iterations)
+        .map(|_| {
+            let start = Instant::now();
+            black_box(f());
+            start.elapsed()
+        })
+        .collect();
+
+    times.sort();
+    times[times.len() / 2]
+}
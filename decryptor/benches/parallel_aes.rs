@@ -0,0 +1,94 @@
+//! Decryption of the ScsC payload. The payload is split in 1 MiB chunks
+//! that are decrypted independently, each starting from the ciphertext
+//! block before it. Columns:
+//!
+//! - baseline: the ciphertext copied with `to_vec` and decrypted in one
+//!   `decrypt_padded_mut` call, as before the chunks
+//! - 1 thread: the chunked path on a one-thread rayon pool
+//! - parallel: the chunked path on the global pool
+//!
+//! Run with `cargo bench --bench parallel_aes`.
+
+mod common;
+
+use aes::Aes256;
+use cipher::block_padding::Pkcs7;
+use cipher::{BlockDecryptMut, BlockEncryptMut, KeyIvInit};
+use decrypt_truck::decrypt_scsc;
+
+const MB: usize = 1 << 20;
+
+const SII_KEY: [u8; 32] = [
+    0x2a, 0x5f, 0xcb, 0x17, 0x91, 0xd2, 0x2f, 0xb6, 0x02, 0x45, 0xb3, 0xd8, 0x36, 0x9e, 0xd0, 0xb2,
+    0xc2, 0x73, 0x71, 0x56, 0x3f, 0xbf, 0x1f, 0x3c, 0x9e, 0xdf, 0x6b, 0x11, 0x82, 0x5a, 0x5d, 0x0a,
+];
+
+/// An encrypted (ScsC) file around `payload`, with a zeroed HMAC: the
+/// signature, HMAC, IV and data size headers, then the ciphertext.
+fn scsc(payload: &[u8]) -> Vec<u8> {
+    let iv = [7u8; 16];
+    let padded_len = (payload.len() / 16 + 1) * 16;
+
+    let mut file = Vec::with_capacity(56 + padded_len);
+    file.extend_from_slice(&1131635539u32.to_le_bytes());
+    file.extend_from_slice(&[0u8; 32]);
+    file.extend_from_slice(&iv);
+    file.extend_from_slice(&(payload.len() as u32).to_le_bytes());
+    file.extend_from_slice(payload);
+    file.resize(56 + padded_len, 0);
+
+    let cipher = cbc::Encryptor::<Aes256>::new_from_slices(&SII_KEY, &iv).unwrap();
+    cipher
+        .encrypt_padded_mut::<Pkcs7>(&mut file[56..], payload.len())
+        .unwrap();
+    file
+}
+
+/// `decrypt_scsc` before the chunks: signature, HMAC, IV and data size
+/// headers, then the whole ciphertext decrypted in place in a copy.
+fn baseline(file: &[u8]) -> Vec<u8> {
+    let iv = &file[36..52];
+    let mut data = file[56..].to_vec();
+
+    let cipher = cbc::Decryptor::<Aes256>::new_from_slices(&SII_KEY, iv).unwrap();
+    let size = cipher.decrypt_padded_mut::<Pkcs7>(&mut data).unwrap().len();
+    data.truncate(size);
+    data
+}
+
+fn main() {
+    let single = rayon::ThreadPoolBuilder::new()
+        .num_threads(1)
+        .build()
+        .unwrap();
+
+    println!(
+        "{:>8} {:>12} {:>12} {:>12} {:>8} ({} threads)",
+        "payload",
+        "baseline",
+        "1 thread",
+        "parallel",
+        "speedup",
+        rayon::current_num_threads()
+    );
+
+    for size in [50 * MB, 100 * MB, 200 * MB] {
+        // decrypt_scsc does not inflate, so any payload will do
+        let payload: Vec<u8> = (0..size).map(|i| (i * 31 % 251) as u8).collect();
+        let file = scsc(&payload);
+        assert!(baseline(&file) == decrypt_scsc(&file).unwrap());
+
+        let base = common::median(5, || baseline(&file));
+        let one_thread = single.install(|| common::median(5, || decrypt_scsc(&file).unwrap()));
+        let parallel = common::median(5, || decrypt_scsc(&file).unwrap());
+
+        println!(
+            "{:>6}MB {:>10.2?} {:>10.2?} {:>10.2?} {:>7.2}x",
+            size / MB,
+            base,
+            one_thread,
+            parallel,
+            base.as_secs_f64() / parallel.as_secs_f64()
+        );
+    }
+}
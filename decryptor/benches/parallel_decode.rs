@@ -0,0 +1,60 @@
+//! Full decode with 1 to N rayon threads. Data blocks are located by a
+//! sequential skip pass and then decoded in parallel. The pass is timed
+//! on its own as a filtered decode that wants no units.
+//!
+//! Run with `cargo bench --bench parallel_decode [-- path/to/game.sii]`.
+//! Without a path a synthetic save of about 100 MB of text is used.
+//!
+//! Recorded on the synthetic save, on a machine with a single core, so
+//! there is only the one-thread row and no speedup has been measured:
+//!
+//! ```text
+//!     scan    23.82ms
+//!  threads       decode  speedup
+//!        1   916.25ms    1.00x
+//! ```
+
+mod common;
+
+use decrypt_truck::{decrypt_bin_file, decrypt_bin_file_units};
+use std::collections::HashSet;
+
+fn main() {
+    let path = std::env::args().skip(1).find(|arg| !arg.starts_with("--"));
+    let data = match &path {
+        Some(path) => std::fs::read(path).unwrap(),
+        None => common::sample_bsii(200, 200_000),
+    };
+
+    let cores = std::thread::available_parallelism().map_or(1, |n| n.get());
+
+    let no_units = HashSet::new();
+    let scan = common::median(5, || decrypt_bin_file_units(&data, &no_units).unwrap());
+    println!("{:>8} {:>10.2?}", "scan", scan);
+
+    println!("{:>8} {:>12} {:>8}", "threads", "decode", "speedup");
+
+    let mut single = None;
+    let mut threads = 1;
+    while threads <= cores {
+        let pool = rayon::ThreadPoolBuilder::new()
+            .num_threads(threads)
+            .build()
+            .unwrap();
+        let time = pool.install(|| common::median(5, || decrypt_bin_file(&data).unwrap()));
+        let single = *single.get_or_insert(time);
+
+        println!(
+            "{:>8} {:>10.2?} {:>7.2}x",
+            threads,
+            time,
+            single.as_secs_f64() / time.as_secs_f64()
+        );
+
+        threads = if threads == cores {
+            cores + 1
+        } else {
+            (threads * 2).min(cores)
+        };
+    }
+}
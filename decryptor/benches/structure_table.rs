@@ -0,0 +1,30 @@
+//! Decode of saves with many structure definitions, where looking up the
+//! structure of each data block used to be a linear scan. The filtered
+//! decode skips most blocks, so the lookup is a larger share of its time.
+//!
+//! Run with `cargo bench --bench structure_table`.
+
+mod common;
+
+use decrypt_truck::{decrypt_bin_file, decrypt_bin_file_units};
+use std::collections::HashSet;
+
+fn main() {
+    println!(
+        "{:>10} {:>8} {:>12} {:>12}",
+        "structures", "units", "full", "filtered"
+    );
+
+    for (structures, units) in [(50, 20_000), (500, 20_000), (2_000, 20_000)] {
+        let data = common::sample_bsii(structures, units);
+        let wanted: HashSet<String> = HashSet::from(["unit_type_1".to_string()]);
+
+        let full = common::median(9, || decrypt_bin_file(&data).unwrap());
+        let filtered = common::median(9, || decrypt_bin_file_units(&data, &wanted).unwrap());
+
+        println!(
+            "{:>10} {:>8} {:>10.2?} {:>10.2?}",
+            structures, units, full, filtered
+        );
+    }
+}
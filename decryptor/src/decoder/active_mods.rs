@@ -0,0 +1,354 @@
+use crate::decoder::bsii_decoder::read_structures;
+use crate::decoder::bsii_serializer::serialize_utf8_string;
+use crate::decoder::skip_data_block::skip_segments;
+use crate::strucs::data_sii::{BSIIData, OrdinalTable, SignatureType};
+use crate::strucs::sii_types::DataTypeIdFormat;
+use crate::utils::file_type::try_read_u32;
+use crate::utils::{decode_utils, encode_utils};
+use std::collections::HashMap;
+use std::ops::Range;
+use std::sync::Arc;
+
+const PROFILE_UNIT: &str = "user_profile";
+const ACTIVE_MODS: &str = "active_mods";
+
+/// Where `active_mods` of the profile unit is stored in the document, and
+/// its current value.
+struct ActiveMods {
+    binary: bool,
+    span: Range<usize>,
+    mods: Vec<String>,
+}
+
+fn profile_not_found() -> String {
+    "Profile block not found".to_string()
+}
+
+/// Finds the array in BSII data: the first `user_profile` block is located
+/// by skipping over the blocks before it, then the segments before the
+/// array are skipped too.
+fn find_binary(data: &[u8]) -> Result<ActiveMods, String> {
+    let mut ordinal_lists: HashMap<u32, Arc<OrdinalTable>> = HashMap::new();
+    let mut stream_pos: usize = 0;
+    let mut file_data = BSIIData::new();
+
+    let mut block_type =
+        match read_structures(data, &mut stream_pos, &mut ordinal_lists, &mut file_data) {
+            Ok(res) => res,
+            Err(e) => return Err(e),
+        };
+
+    let profile = match file_data
+        .blocks
+        .iter()
+        .find(|block| block.validity && &*block.name == PROFILE_UNIT)
+    {
+        Some(res) => res,
+        None => return Err(profile_not_found()),
+    };
+
+    let position = match profile
+        .segments
+        .iter()
+        .position(|segment| &*segment.name == ACTIVE_MODS)
+    {
+        Some(res) => res,
+        None => return Err("Profile has no active_mods".to_string()),
+    };
+
+    if profile.segments[position].segment_type != DataTypeIdFormat::ArrayOfUTF8String as u32 {
+        return Err("Unexpected active_mods type".to_string());
+    }
+
+    let format_version = file_data.header.version;
+    let mut first_block = true;
+
+    loop {
+        if stream_pos >= data.len() {
+            return Err(profile_not_found());
+        }
+        if first_block {
+            first_block = false;
+        } else {
+            block_type = match decode_utils::decode_u32(data, &mut stream_pos) {
+                Ok(res) => res,
+                Err(e) => return Err(e),
+            };
+        }
+
+        // End of data marker
+        if block_type == 0 && !decode_utils::decode_bool(data, &mut stream_pos) {
+            return Err(profile_not_found());
+        }
+
+        let structure = match file_data.structure(block_type) {
+            Some(block) => block,
+            None => return Err("Block not found".to_string()),
+        };
+
+        match decode_utils::skip_id(data, &mut stream_pos) {
+            Ok(_) => (),
+            Err(e) => return Err(e),
+        }
+
+        if block_type != profile.structure_id {
+            match skip_segments(data, &mut stream_pos, &structure.segments, format_version) {
+                Ok(_) => continue,
+                Err(e) => return Err(e),
+            }
+        }
+
+        match skip_segments(
+            data,
+            &mut stream_pos,
+            &structure.segments[..position],
+            format_version,
+        ) {
+            Ok(_) => (),
+            Err(e) => return Err(e),
+        }
+
+        let start = stream_pos;
+        let mods = match decode_utils::decode_utf8_string_array(data, &mut stream_pos) {
+            Ok(res) => res,
+            Err(e) => return Err(e),
+        };
+
+        return Ok(ActiveMods {
+            binary: true,
+            span: start..stream_pos,
+            mods,
+        });
+    }
+}
+
+fn unquote(value: &str) -> &str {
+    if value.len() >= 2 && value.starts_with('"') && value.ends_with('"') {
+        &value[1..value.len() - 1]
+    } else {
+        value
+    }
+}
+
+/// Finds the array in SiiNunit text. The span covers the `active_mods: N`
+/// line and the element lines after it.
+fn find_text(text: &str) -> Result<ActiveMods, String> {
+    let mut in_profile = false;
+    let mut span: Option<Range<usize>> = None;
+    let mut mods: Vec<String> = Vec::new();
+    let mut line_start = 0;
+
+    for raw_line in text.split_inclusive('\n') {
+        let line_end = line_start + raw_line.len();
+        let line = raw_line.trim();
+
+        if !in_profile {
+            // Unit header: `user_profile : id {`
+            in_profile = line.ends_with('{')
+                && line
+                    .split_once(':')
+                    .is_some_and(|(name, _)| name.trim() == PROFILE_UNIT);
+        } else if line == "}" {
+            break;
+        } else if let Some((key, value)) = line.split_once(':') {
+            let key = key.trim();
+
+            if key == ACTIVE_MODS {
+                span = Some(line_start..line_end);
+            } else if let (Some(found), Some(index)) =
+                (span.as_mut(), key.strip_prefix("active_mods["))
+            {
+                if index != format!("{}]", mods.len()) {
+                    return Err("Unordered active_mods index".to_string());
+                }
+
+                found.end = line_end;
+                mods.push(unquote(value.trim()).to_string());
+            }
+        }
+
+        line_start = line_end;
+    }
+
+    if !in_profile {
+        return Err(profile_not_found());
+    }
+
+    match span {
+        Some(span) => Ok(ActiveMods {
+            binary: false,
+            span,
+            mods,
+        }),
+        None => Err("Profile has no active_mods".to_string()),
+    }
+}
+
+fn find(data: &[u8]) -> Result<ActiveMods, String> {
+    let signature = match try_read_u32(data) {
+        Ok(res) => res,
+        Err(e) => return Err(e),
+    };
+
+    if signature == SignatureType::Binary as u32 {
+        return find_binary(data);
+    }
+
+    match std::str::from_utf8(data) {
+        Ok(text) => find_text(text),
+        Err(_) => Err("Invalid file type".to_string()),
+    }
+}
+
+/// Reads `user_profile.active_mods` from decompressed BSII data or
+/// SiiNunit text, without decoding anything else.
+pub fn get_active_mods(data: &[u8]) -> Result<Vec<String>, String> {
+    match find(data) {
+        Ok(found) => Ok(found.mods),
+        Err(e) => Err(e),
+    }
+}
+
+/// Returns `data` with `user_profile.active_mods` replaced by `mods`. Only
+/// the bytes of that array change; the rest is copied as is.
+pub fn set_active_mods(data: &[u8], mods: &[String]) -> Result<Vec<u8>, String> {
+    let found = match find(data) {
+        Ok(res) => res,
+        Err(e) => return Err(e),
+    };
+
+    let mut replacement: Vec<u8> = Vec::new();
+
+    if found.binary {
+        encode_utils::encode_u32(&mut replacement, mods.len() as u32);
+        for value in mods {
+            encode_utils::encode_utf8_string(&mut replacement, value);
+        }
+    } else {
+        // Keep the indentation and line ending the document already uses
+        let old = &data[found.span.clone()];
+        let indent = &old[..old.len() - old.trim_ascii_start().len()];
+        let newline: &[u8] = if old.ends_with(b"\r\n") {
+            b"\r\n"
+        } else {
+            b"\n"
+        };
+
+        replacement.extend_from_slice(indent);
+        replacement.extend_from_slice(ACTIVE_MODS.as_bytes());
+        replacement.extend_from_slice(format!(": {}", mods.len()).as_bytes());
+        replacement.extend_from_slice(newline);
+
+        for (i, value) in mods.iter().enumerate() {
+            replacement.extend_from_slice(indent);
+            replacement.extend_from_slice(format!("{}[{}]: ", ACTIVE_MODS, i).as_bytes());
+            serialize_utf8_string(&mut replacement, value, value.parse::<u32>().is_ok());
+            replacement.extend_from_slice(newline);
+        }
+    }
+
+    let mut out = Vec::with_capacity(data.len() - found.span.len() + replacement.len());
+    out.extend_from_slice(&data[..found.span.start]);
+    out.extend_from_slice(&replacement);
+    out.extend_from_slice(&data[found.span.end..]);
+
+    Ok(out)
+}
+
+#[cfg(test)]
+pub(crate) mod tests {
+    use super::*;
+    use crate::utils::encode_utils::{encode_u8, encode_u32, encode_u64, encode_utf8_string};
+
+    /// A BSII document with an `economy` unit before and after a
+    /// `user_profile { face, active_mods, money }` unit.
+    pub(crate) fn sample_profile(mods: &[&str]) -> Vec<u8> {
+        let mut out = Vec::new();
+        encode_u32(&mut out, SignatureType::Binary as u32);
+        encode_u32(&mut out, 2);
+
+        for (id, name, segments) in [
+            (1, "economy", &[(0x27, "x"), (0x01, "name")][..]),
+            (
+                2,
+                PROFILE_UNIT,
+                &[(0x01, "face"), (0x02, ACTIVE_MODS), (0x27, "money")][..],
+            ),
+        ] {
+            encode_u32(&mut out, 0);
+            encode_u8(&mut out, 1);
+            encode_u32(&mut out, id);
+            encode_utf8_string(&mut out, name);
+            for (segment_type, segment_name) in segments {
+                encode_u32(&mut out, *segment_type);
+                encode_utf8_string(&mut out, segment_name);
+            }
+            encode_u32(&mut out, 0);
+        }
+
+        let economy = |out: &mut Vec<u8>, id: u64| {
+            encode_u32(out, 1);
+            encode_u8(out, 0xFF);
+            encode_u64(out, id);
+            encode_u32(out, id as u32);
+            encode_utf8_string(out, "hello world");
+        };
+
+        economy(&mut out, 0x1234);
+        encode_u32(&mut out, 2);
+        encode_u8(&mut out, 0xFF);
+        encode_u64(&mut out, 0xABCD);
+        encode_utf8_string(&mut out, "face_1");
+        encode_u32(&mut out, mods.len() as u32);
+        for value in mods {
+            encode_utf8_string(&mut out, value);
+        }
+        encode_u32(&mut out, 777);
+        economy(&mut out, 0x9999);
+
+        encode_u32(&mut out, 0);
+        encode_u8(&mut out, 0);
+        out
+    }
+
+    fn strings(values: &[&str]) -> Vec<String> {
+        values.iter().map(|value| value.to_string()).collect()
+    }
+
+    #[test]
+    fn binary_splice_matches_a_fresh_document() {
+        let old = sample_profile(&["mod_a|Mod A", "promods|ProMods 2.6"]);
+        let new = ["x|X", "y", "12", "z|Zed \"q\""];
+
+        assert_eq!(
+            get_active_mods(&old).unwrap(),
+            strings(&["mod_a|Mod A", "promods|ProMods 2.6"])
+        );
+        assert_eq!(
+            set_active_mods(&old, &strings(&new)).unwrap(),
+            sample_profile(&new)
+        );
+        assert_eq!(set_active_mods(&old, &[]).unwrap(), sample_profile(&[]));
+    }
+
+    #[test]
+    fn text_splice_keeps_layout() {
+        let text = "SiiNunit\r\n{\r\nuser_profile : _nameless.1 {\r\n  face: 0\r\n  \
+                    active_mods: 1\r\n  active_mods[0]: \"a|A\"\r\n  money: 5\r\n}\r\n}";
+        let set = set_active_mods(text.as_bytes(), &strings(&["b|B b", "c"])).unwrap();
+
+        assert_eq!(
+            String::from_utf8(set).unwrap(),
+            "SiiNunit\r\n{\r\nuser_profile : _nameless.1 {\r\n  face: 0\r\n  \
+             active_mods: 2\r\n  active_mods[0]: \"b|B b\"\r\n  active_mods[1]: c\r\n  \
+             money: 5\r\n}\r\n}"
+        );
+        assert_eq!(get_active_mods(text.as_bytes()).unwrap(), strings(&["a|A"]));
+    }
+
+    #[test]
+    fn missing_profile_is_an_error() {
+        assert!(get_active_mods(b"SiiNunit\n{\n}").is_err());
+        assert!(get_active_mods(b"").is_err());
+    }
+}
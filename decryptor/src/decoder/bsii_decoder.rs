@@ -1,12 +1,25 @@
-use crate::decoder::bsii_serializer;
 use crate::decoder::load_data_block::load_data_block_local;
+use crate::decoder::skip_data_block::skip_data_block_local;
+use crate::decoder::{bsii_serializer, bsii_units};
 use crate::strucs::data_sii::{
     BSIIData, BsiiDataSegment, BsiiStructureBlock, BsiiStructureDecodedBlock,
-    BsiiSupportedVersions, IDComplexType,
+    BsiiSupportedVersions, IDComplexType, OrdinalTable, SegmentValue, SiiUnit,
 };
 use crate::strucs::sii_types::DataTypeIdFormat;
 use crate::utils::decode_utils;
-use std::collections::HashMap;
+use rayon::prelude::*;
+use std::collections::{HashMap, HashSet};
+use std::io::Write;
+use std::sync::Arc;
+
+// Decoded blocks held at once when streaming text out
+const STREAM_WINDOW_BLOCKS: usize = 4096;
+// Blocks located by the scan before they are decoded in parallel. Small
+// batches keep the per-batch buffers short-lived and below the allocator's
+// mmap threshold, so they do not inflate the peak of the serializer.
+const DECODE_BATCH_BLOCKS: usize = 1024;
+// Smallest run of blocks decoded by one rayon task
+const MIN_BLOCKS_PER_TASK: usize = 32;
 
 fn check_version(file_data: &BSIIData) -> bool {
     file_data.header.version != BsiiSupportedVersions::Version1 as u32
@@ -16,9 +29,9 @@ fn check_version(file_data: &BSIIData) -> bool {
 
 fn read_data_block(bytes: &[u8], stream_pos: &mut usize) -> Result<BsiiDataSegment, String> {
     let mut result = BsiiDataSegment {
-        name: String::new(),
+        name: Arc::from(""),
         segment_type: 0,
-        value: Vec::new(),
+        value: SegmentValue::None,
         ordinal_string_hash: None,
     };
 
@@ -28,7 +41,7 @@ fn read_data_block(bytes: &[u8], stream_pos: &mut usize) -> Result<BsiiDataSegme
     };
     if result.segment_type != 0 {
         result.name = match decode_utils::decode_utf8_string(bytes, stream_pos) {
-            Ok(res) => res,
+            Ok(res) => Arc::from(res),
             Err(e) => return Err(e),
         };
     }
@@ -40,7 +53,7 @@ fn read_data_block(bytes: &[u8], stream_pos: &mut usize) -> Result<BsiiDataSegme
             Ok(res) => res,
             Err(e) => return Err(e),
         };
-        result.ordinal_string_hash = Some(ordinal_string);
+        result.ordinal_string_hash = Some(Arc::new(ordinal_string));
     }
 
     Ok(result)
@@ -49,7 +62,7 @@ fn read_data_block(bytes: &[u8], stream_pos: &mut usize) -> Result<BsiiDataSegme
 fn structure_block(
     file_bin: &[u8],
     stream_pos: &mut usize,
-    ordinal_lists: &mut HashMap<u32, HashMap<u32, String>>,
+    ordinal_lists: &mut HashMap<u32, Arc<OrdinalTable>>,
     file_data: &mut BSIIData,
     block_type: u32,
 ) -> Result<(), String> {
@@ -58,7 +71,7 @@ fn structure_block(
     current_block.validity = decode_utils::decode_bool(&file_bin, stream_pos);
 
     if !current_block.validity {
-        file_data.blocks.push(current_block);
+        file_data.push_block(current_block);
         return Ok(());
     }
 
@@ -67,7 +80,7 @@ fn structure_block(
         Err(e) => return Err(e),
     };
     current_block.name = match decode_utils::decode_utf8_string(&file_bin, stream_pos) {
-        Ok(res) => res,
+        Ok(res) => Arc::from(res),
         Err(e) => return Err(e),
     };
 
@@ -94,42 +107,108 @@ fn structure_block(
         current_block.segments.push(segment_data);
     }
 
-    if !file_data
-        .blocks
-        .iter()
-        .any(|x| x.structure_id == current_block.structure_id)
-    {
-        file_data.blocks.push(current_block);
+    if !file_data.has_structure(current_block.structure_id) {
+        file_data.push_block(current_block);
     }
 
     Ok(())
 }
 
-fn data_block(
+/// Start of a data block found by `scan_blocks`: the structure it is
+/// decoded with and the position of its id.
+struct BlockBoundary {
+    structure_id: u32,
+    position: usize,
+}
+
+/// First decode phase: steps over data blocks with the skip decoder and
+/// records where each wanted block starts. Stops after `limit` boundaries
+/// or at the end of the data; returns whether the end was reached.
+fn scan_blocks(
     file_bin: &[u8],
     stream_pos: &mut usize,
-    ordinal_lists: &mut HashMap<u32, HashMap<u32, String>>,
+    first_block_type: &mut Option<u32>,
     file_data: &mut BSIIData,
-    block_type: u32,
-    decode_block_count: &mut u32,
-) -> Result<(), String> {
-    *decode_block_count += 1;
-
-    let mut block_data_item = match file_data
-        .blocks
-        .iter()
-        .find(|block| block.structure_id == block_type)
-    {
-        Some(block) => BsiiStructureDecodedBlock {
-            order_pos: *decode_block_count,
-            id: block.id.clone(),
-            structure_id: block.structure_id,
-            name: block.name.clone(),
-            segments: block.segments.clone(),
-        },
+    units: Option<&HashSet<String>>,
+    limit: usize,
+    boundaries: &mut Vec<BlockBoundary>,
+) -> Result<bool, String> {
+    while boundaries.len() < limit {
+        if *stream_pos >= file_bin.len() {
+            return Ok(true);
+        }
+
+        // The type of the first block was read with the structures
+        let block_type = match first_block_type.take() {
+            Some(res) => res,
+            None => match decode_utils::decode_u32(&file_bin, stream_pos) {
+                Ok(res) => res,
+                Err(e) => return Err(e),
+            },
+        };
+
+        if block_type == 0 {
+            let mut current_block = BsiiStructureBlock::new();
+            current_block.block_type = block_type;
+            current_block.validity = decode_utils::decode_bool(&file_bin, stream_pos);
+
+            if !current_block.validity {
+                file_data.push_block(current_block);
+                return Ok(true);
+            }
+        }
+
+        let structure = match file_data.structure(block_type) {
+            Some(block) => block,
+            None => return Err("Block not found".to_string()),
+        };
+
+        // Unwanted units are only stepped over, never materialized
+        let wanted = match units {
+            Some(wanted) => wanted.contains(&*structure.name),
+            None => true,
+        };
+        let position = *stream_pos;
+
+        match skip_data_block_local(
+            &file_bin,
+            stream_pos,
+            &structure.segments,
+            file_data.header.version,
+        ) {
+            Ok(_) => (),
+            Err(e) => return Err(e),
+        }
+
+        if wanted {
+            boundaries.push(BlockBoundary {
+                structure_id: block_type,
+                position,
+            });
+        }
+    }
+
+    Ok(false)
+}
+
+fn data_block(
+    file_bin: &[u8],
+    boundary: &BlockBoundary,
+    ordinal_lists: &HashMap<u32, Arc<OrdinalTable>>,
+    file_data: &BSIIData,
+) -> Result<BsiiStructureDecodedBlock, String> {
+    let structure = match file_data.structure(boundary.structure_id) {
+        Some(block) => block,
         None => return Err("Block not found".to_string()),
     };
 
+    let mut block_data_item = BsiiStructureDecodedBlock {
+        id: structure.id.clone(),
+        structure_id: structure.structure_id,
+        name: structure.name.clone(),
+        segments: structure.segments.clone(),
+    };
+
     /*
 
     for segment in &block_data_item.segments {
@@ -158,39 +237,102 @@ fn data_block(
         };
     }
 
-    let mut list: HashMap<u32, String> = HashMap::new();
-
-    if let Some(existing_list) = ordinal_lists.get(&block_data_item.structure_id) {
-        list = existing_list.clone();
-    }
+    let list = ordinal_lists
+        .get(&block_data_item.structure_id)
+        .map(|list| list.as_ref());
 
+    let mut stream_pos = boundary.position;
     match load_data_block_local(
         &file_bin,
-        stream_pos,
+        &mut stream_pos,
         &mut block_data_item,
         file_data.header.version,
-        &mut list,
+        list,
     ) {
+        Ok(_) => Ok(block_data_item),
+        Err(e) => Err(e),
+    }
+}
+
+/// Second decode phase: decodes the scanned blocks in parallel. Results
+/// come back in file order.
+fn decode_blocks(
+    file_bin: &[u8],
+    boundaries: &[BlockBoundary],
+    ordinal_lists: &HashMap<u32, Arc<OrdinalTable>>,
+    file_data: &BSIIData,
+) -> Result<Vec<BsiiStructureDecodedBlock>, String> {
+    boundaries
+        .par_iter()
+        .with_min_len(MIN_BLOCKS_PER_TASK)
+        .map(|boundary| data_block(file_bin, boundary, ordinal_lists, file_data))
+        .collect()
+}
+
+/// Decodes a BSII document to SiiNunit text. When `units` is given, only
+/// blocks whose structure name is in the set are decoded and serialized.
+pub fn decode(file_bin: &[u8], units: Option<&HashSet<String>>) -> Result<Vec<u8>, String> {
+    match decode_data(file_bin, units) {
+        Ok(file_data) => Ok(bsii_serializer::serializer(&file_data)),
+        Err(e) => Err(e),
+    }
+}
+
+/// Streaming counterpart of `decode`: blocks are decoded and serialized
+/// in windows of `STREAM_WINDOW_BLOCKS` and written to `out` as each
+/// window finishes, so memory use does not grow with the document.
+pub fn decode_to<W: Write + ?Sized>(
+    file_bin: &[u8],
+    units: Option<&HashSet<String>>,
+    out: &mut W,
+) -> Result<(), String> {
+    let write_error = |e: std::io::Error| format!("Error writing output: {}", e);
+
+    match bsii_serializer::write_header(out) {
+        Ok(_) => (),
+        Err(e) => return Err(write_error(e)),
+    }
+
+    match decode_data_windowed(file_bin, units, Some(STREAM_WINDOW_BLOCKS), |blocks| {
+        bsii_serializer::write_blocks(blocks, out).map_err(write_error)
+    }) {
         Ok(_) => (),
         Err(e) => return Err(e),
     }
 
-    file_data.decoded_blocks.push(block_data_item);
-    Ok(())
+    match bsii_serializer::write_footer(out) {
+        Ok(_) => Ok(()),
+        Err(e) => Err(write_error(e)),
+    }
 }
 
-pub fn decode(file_bin: &[u8]) -> Result<Vec<u8>, String> {
-    let mut block_type: u32;
-    let mut ordinal_lists: HashMap<u32, HashMap<u32, String>> = HashMap::new();
+/// Decodes a BSII document to structured units, skipping the text step.
+pub fn decode_units(
+    file_bin: &[u8],
+    units: Option<&HashSet<String>>,
+) -> Result<Vec<SiiUnit>, String> {
+    match decode_data(file_bin, units) {
+        Ok(file_data) => Ok(bsii_units::units_from_data(&file_data)),
+        Err(e) => Err(e),
+    }
+}
 
-    let mut stream_pos: usize = 0;
-    let mut file_data = BSIIData::new();
+/// Reads the header and the structure definitions that precede the data
+/// blocks. Returns the type of the first data block, with `stream_pos`
+/// left just after it.
+pub fn read_structures(
+    file_bin: &[u8],
+    stream_pos: &mut usize,
+    ordinal_lists: &mut HashMap<u32, Arc<OrdinalTable>>,
+    file_data: &mut BSIIData,
+) -> Result<u32, String> {
+    let mut block_type: u32;
 
-    file_data.header.signature = match decode_utils::decode_u32(&file_bin, &mut stream_pos) {
+    file_data.header.signature = match decode_utils::decode_u32(&file_bin, stream_pos) {
         Ok(res) => res,
         Err(e) => return Err(e),
     };
-    file_data.header.version = match decode_utils::decode_u32(&file_bin, &mut stream_pos) {
+    file_data.header.version = match decode_utils::decode_u32(&file_bin, stream_pos) {
         Ok(res) => res,
         Err(e) => return Err(e),
     };
@@ -200,23 +342,17 @@ pub fn decode(file_bin: &[u8]) -> Result<Vec<u8>, String> {
     }
 
     loop {
-        if stream_pos >= file_bin.len() {
+        if *stream_pos >= file_bin.len() {
             return Err("End of file".to_string());
         }
 
-        block_type = match decode_utils::decode_u32(&file_bin, &mut stream_pos) {
+        block_type = match decode_utils::decode_u32(&file_bin, stream_pos) {
             Ok(res) => res,
             Err(e) => return Err(e),
         };
 
         if block_type == 0 {
-            match structure_block(
-                &file_bin,
-                &mut stream_pos,
-                &mut ordinal_lists,
-                &mut file_data,
-                block_type,
-            ) {
+            match structure_block(&file_bin, stream_pos, ordinal_lists, file_data, block_type) {
                 Ok(_) => (),
                 Err(e) => return Err(e),
             }
@@ -225,44 +361,79 @@ pub fn decode(file_bin: &[u8]) -> Result<Vec<u8>, String> {
         }
     }
 
-    let mut decode_block_count: u32 = 0;
-    let mut firt_load_block = true;
-    loop {
-        if stream_pos >= file_bin.len() {
-            break;
-        }
-        if firt_load_block {
-            firt_load_block = false;
-        } else {
-            block_type = match decode_utils::decode_u32(&file_bin, &mut stream_pos) {
-                Ok(res) => res,
-                Err(e) => return Err(e),
-            };
-        }
+    Ok(block_type)
+}
 
-        if block_type == 0 {
-            let mut current_block = BsiiStructureBlock::new();
-            current_block.block_type = block_type;
-            current_block.validity = decode_utils::decode_bool(&file_bin, &mut stream_pos);
+fn decode_data(file_bin: &[u8], units: Option<&HashSet<String>>) -> Result<BSIIData, String> {
+    decode_data_windowed(file_bin, units, None, |_| Ok(()))
+}
 
-            if !current_block.validity {
-                file_data.blocks.push(current_block);
-                break;
-            }
-        }
+/// Decodes the data blocks into `decoded_blocks`, a batch at a time: a
+/// sequential scan finds where each block of the batch starts, then the
+/// blocks are decoded in parallel. With a `window`, every `window` decoded
+/// blocks (and the remainder at the end) are handed to `flush` and then
+/// dropped, so only that many are held at once.
+fn decode_data_windowed(
+    file_bin: &[u8],
+    units: Option<&HashSet<String>>,
+    window: Option<usize>,
+    mut flush: impl FnMut(&[BsiiStructureDecodedBlock]) -> Result<(), String>,
+) -> Result<BSIIData, String> {
+    let mut ordinal_lists: HashMap<u32, Arc<OrdinalTable>> = HashMap::new();
+
+    let mut stream_pos: usize = 0;
+    let mut file_data = BSIIData::new();
+
+    let block_type = match read_structures(
+        &file_bin,
+        &mut stream_pos,
+        &mut ordinal_lists,
+        &mut file_data,
+    ) {
+        Ok(res) => res,
+        Err(e) => return Err(e),
+    };
 
-        match data_block(
+    let mut first_block_type = Some(block_type);
+    let mut boundaries: Vec<BlockBoundary> = Vec::new();
+
+    loop {
+        let finished = match scan_blocks(
             &file_bin,
             &mut stream_pos,
-            &mut ordinal_lists,
+            &mut first_block_type,
             &mut file_data,
-            block_type,
-            &mut decode_block_count,
+            units,
+            DECODE_BATCH_BLOCKS,
+            &mut boundaries,
         ) {
-            Ok(_) => (),
+            Ok(res) => res,
             Err(e) => return Err(e),
+        };
+
+        let decoded = match decode_blocks(&file_bin, &boundaries, &ordinal_lists, &file_data) {
+            Ok(res) => res,
+            Err(e) => return Err(e),
+        };
+        file_data.decoded_blocks.extend(decoded);
+        boundaries.clear();
+
+        let window_full = match window {
+            Some(window) => finished || file_data.decoded_blocks.len() >= window,
+            None => false,
+        };
+
+        if window_full {
+            match flush(&file_data.decoded_blocks) {
+                Ok(_) => file_data.decoded_blocks.clear(),
+                Err(e) => return Err(e),
+            }
+        }
+
+        if finished {
+            break;
         }
     }
 
-    Ok(bsii_serializer::serializer(&file_data))
+    Ok(file_data)
 }
@@ -0,0 +1,196 @@
+use crate::decoder::bsii_decoder::read_structures;
+use crate::decoder::bsii_units::unit_from_block;
+use crate::decoder::load_data_block::load_data_block_local;
+use crate::decoder::skip_data_block::skip_segments;
+use crate::strucs::data_sii::{BSIIData, BsiiStructureDecodedBlock, OrdinalTable, SiiUnit};
+use crate::utils::decode_utils;
+use rayon::prelude::*;
+use std::collections::{HashMap, HashSet};
+use std::sync::Arc;
+
+pub struct BsiiIndexEntry {
+    pub structure_id: u32,
+    pub id: String,
+    // Offset of the block id, where `load_data_block_local` starts reading
+    pub offset: usize,
+}
+
+/// Index of the data blocks of a decompressed BSII document, built in one
+/// pass. Units are only decoded when they are asked for.
+pub struct BsiiIndex {
+    data: Vec<u8>,
+    file_data: BSIIData,
+    ordinal_lists: HashMap<u32, Arc<OrdinalTable>>,
+    entries: Vec<BsiiIndexEntry>,
+    by_id: HashMap<String, usize>,
+    // Positions of the units of each structure name, in file order
+    by_name: HashMap<Arc<str>, Vec<usize>>,
+}
+
+impl BsiiIndex {
+    pub fn build(data: Vec<u8>) -> Result<Self, String> {
+        let mut ordinal_lists: HashMap<u32, Arc<OrdinalTable>> = HashMap::new();
+        let mut stream_pos: usize = 0;
+        let mut file_data = BSIIData::new();
+
+        let mut block_type =
+            match read_structures(&data, &mut stream_pos, &mut ordinal_lists, &mut file_data) {
+                Ok(res) => res,
+                Err(e) => return Err(e),
+            };
+
+        let mut entries: Vec<BsiiIndexEntry> = Vec::new();
+        let mut by_id: HashMap<String, usize> = HashMap::new();
+        let mut by_name: HashMap<Arc<str>, Vec<usize>> = HashMap::new();
+        let mut first_block = true;
+
+        loop {
+            if stream_pos >= data.len() {
+                break;
+            }
+            if first_block {
+                first_block = false;
+            } else {
+                block_type = match decode_utils::decode_u32(&data, &mut stream_pos) {
+                    Ok(res) => res,
+                    Err(e) => return Err(e),
+                };
+            }
+
+            // End of data marker
+            if block_type == 0 && !decode_utils::decode_bool(&data, &mut stream_pos) {
+                break;
+            }
+
+            let structure = match file_data.structure(block_type) {
+                Some(block) => block,
+                None => return Err("Block not found".to_string()),
+            };
+
+            let offset = stream_pos;
+            let id = match decode_utils::decode_id(&data, &mut stream_pos) {
+                Ok(res) => res.value,
+                Err(e) => return Err(e),
+            };
+
+            match skip_segments(
+                &data,
+                &mut stream_pos,
+                &structure.segments,
+                file_data.header.version,
+            ) {
+                Ok(_) => (),
+                Err(e) => return Err(e),
+            }
+
+            by_id.entry(id.clone()).or_insert(entries.len());
+            by_name
+                .entry(structure.name.clone())
+                .or_default()
+                .push(entries.len());
+            entries.push(BsiiIndexEntry {
+                structure_id: block_type,
+                id,
+                offset,
+            });
+        }
+
+        Ok(BsiiIndex {
+            data,
+            file_data,
+            ordinal_lists,
+            entries,
+            by_id,
+            by_name,
+        })
+    }
+
+    pub fn entries(&self) -> &[BsiiIndexEntry] {
+        &self.entries
+    }
+
+    pub fn structure_name(&self, structure_id: u32) -> Option<&str> {
+        self.file_data
+            .structure(structure_id)
+            .map(|block| &*block.name)
+    }
+
+    /// Names of the structures that have at least one unit.
+    pub fn structure_names(&self) -> Vec<&str> {
+        let used: HashSet<u32> = self
+            .entries
+            .iter()
+            .map(|entry| entry.structure_id)
+            .collect();
+
+        self.file_data
+            .blocks
+            .iter()
+            .filter(|block| used.contains(&block.structure_id))
+            .map(|block| &*block.name)
+            .collect()
+    }
+
+    /// Position of the unit with the given id.
+    pub fn find(&self, id: &str) -> Option<usize> {
+        self.by_id.get(id).copied()
+    }
+
+    /// Positions of every unit of the given structure, in file order.
+    pub fn positions_of(&self, name: &str) -> &[usize] {
+        match self.by_name.get(name) {
+            Some(positions) => positions,
+            None => &[],
+        }
+    }
+
+    /// Decodes the unit at `position`.
+    pub fn unit_at(&self, position: usize) -> Result<SiiUnit, String> {
+        let entry = match self.entries.get(position) {
+            Some(res) => res,
+            None => return Err("Unit index out of range".to_string()),
+        };
+
+        let structure = match self.file_data.structure(entry.structure_id) {
+            Some(block) => block,
+            None => return Err("Block not found".to_string()),
+        };
+
+        let mut block = BsiiStructureDecodedBlock {
+            id: structure.id.clone(),
+            structure_id: structure.structure_id,
+            name: structure.name.clone(),
+            segments: structure.segments.clone(),
+        };
+
+        let list = self
+            .ordinal_lists
+            .get(&entry.structure_id)
+            .map(|list| list.as_ref());
+
+        let mut stream_pos = entry.offset;
+        match load_data_block_local(
+            &self.data,
+            &mut stream_pos,
+            &mut block,
+            self.file_data.header.version,
+            list,
+        ) {
+            Ok(_) => (),
+            Err(e) => return Err(e),
+        }
+
+        match unit_from_block(&block) {
+            Some(unit) => Ok(unit),
+            None => Err("Block is not a unit".to_string()),
+        }
+    }
+
+    /// Decodes several units in parallel, keeping their order.
+    pub fn units_at(&self, positions: &[usize]) -> Result<Vec<SiiUnit>, String> {
+        positions
+            .par_iter()
+            .map(|position| self.unit_at(*position))
+            .collect()
+    }
+}
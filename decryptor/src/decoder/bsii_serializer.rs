@@ -1,335 +1,318 @@
-use crate::strucs::data_sii::{BSIIData, BsiiDataSegment, BsiiStructureDecodedBlock};
+use crate::strucs::data_sii::{BSIIData, BsiiDataSegment, BsiiStructureDecodedBlock, SegmentValue};
 use crate::strucs::sii_types::DataTypeIdFormat;
+use crate::utils::serialize;
 use rayon::prelude::*;
+use std::io::{self, Write};
 
-static IDENT: &str = " ";
-const LIMITED_ALPHABET: [char; 63] = [
-    '0', '1', '2', '3', '4', '5', '6', '7', '8', '9', 'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i',
-    'j', 'k', 'l', 'm', 'n', 'o', 'p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z', 'A', 'B',
-    'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 'N', 'O', 'P', 'Q', 'R', 'S', 'T', 'U',
-    'V', 'W', 'X', 'Y', 'Z', '_',
-];
+static IDENT: &[u8] = b" ";
+static HEADER: &[u8] = b"SiiNunit\n{\n";
+static FOOTER: &[u8] = b"}";
 
-fn segment_serialize(block: &BsiiStructureDecodedBlock, header_version: u32) -> String {
-    let mut str_build = String::new();
+// Blocks per rayon task; each task serializes into its own buffer
+const CHUNK_BLOCKS: usize = 256;
+// Initial buffer size per segment, about one short line
+const SEGMENT_SIZE_HINT: usize = 24;
 
+fn segment_serialize(out: &mut Vec<u8>, block: &BsiiStructureDecodedBlock) {
     for segment in &block.segments {
         if segment.segment_type != 0 {
-            let data_type = segment.segment_type as i32;
-
-            match data_type {
-                x if x == DataTypeIdFormat::ArrayOfByteBool as i32 => {
-                    str_build.push_str(&serialize_vec(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::ArrayOfEncodedString as i32 => {
-                    str_build.push_str(&serialize_vec(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::ArrayOfIdA as i32 => {
-                    str_build.push_str(&serialize_vec(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::ArrayOfIdC as i32 => {
-                    str_build.push_str(&serialize_vec(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::ArrayOfIdE as i32 => {
-                    str_build.push_str(&serialize_vec(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::ArrayOfInt32 as i32 => {
-                    str_build.push_str(&serialize_vec(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::ArrayOfSingle as i32 => {
-                    str_build.push_str(&serialize_vec(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::ArrayOfUInt16 as i32 => {
-                    str_build.push_str(&serialize_vec(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::ArrayOfUInt32 as i32 => {
-                    str_build.push_str(&serialize_vec(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::ArrayOfUInt64 as i32 => {
-                    str_build.push_str(&serialize_vec(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::ArrayOfUTF8String as i32 => {
-                    str_build.push_str(&serialize_utf8_string_vec(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::ArrayOfVectorOf3Int32 as i32 => {
-                    str_build.push_str(&serialize_vec(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::ArrayOfVectorOf3Single as i32 => {
-                    str_build.push_str(&serialize_vec(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::ArrayOfVectorOf4Single as i32 => {
-                    str_build.push_str(&serialize_vec(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::ArrayOfVectorOf8Single as i32 => {
-                    if header_version == 1 {
-                        str_build.push_str(&serialize_vec(&segment));
-                    } else {
-                        str_build.push_str(&serialize_vec(&segment));
-                    }
-                    continue;
-                }
-                x if x == DataTypeIdFormat::ByteBool as i32 => {
-                    str_build.push_str(&serialize_single_value(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::EncodedString as i32 => {
-                    str_build.push_str(&serialize_single_value_string(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::IdType3 as i32 => {
-                    str_build.push_str(&serialize_single_value(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::IdType2 as i32 => {
-                    str_build.push_str(&serialize_single_value(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::Id as i32 => {
-                    str_build.push_str(&serialize_single_value(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::Int32 as i32 => {
-                    // There are doubts with “nil” values if value is "null"
-                    str_build.push_str(&serialize_single_value(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::Int64 as i32 => {
-                    // There are doubts with “nil” values if value is "null"
-                    str_build.push_str(&serialize_single_value(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::UInt32Type2 as i32 => {
-                    // There are doubts with “nil” values if value is "null"
-                    str_build.push_str(&serialize_single_value(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::UInt32 as i32 => {
-                    // There are doubts with “nil” values if value is "null"
-                    str_build.push_str(&serialize_single_value(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::UInt64 as i32 => {
-                    // There are doubts with “nil” values if value is "null"
-                    str_build.push_str(&serialize_single_value(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::UInt16 as i32 => {
-                    // There are doubts with “nil” values if value is "null"
-                    str_build.push_str(&serialize_single_value(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::OrdinalString as i32 => {
-                    str_build.push_str(&serialize_single_value_string(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::Single as i32 => {
-                    str_build.push_str(&serialize_single_value(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::UTF8String as i32 => {
-                    str_build.push_str(&serialize_utf8_string(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::VectorOf2Single as i32 => {
-                    str_build.push_str(&serialize_single_value(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::VectorOf3Int32 as i32 => {
-                    str_build.push_str(&serialize_single_value(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::VectorOf3Single as i32 => {
-                    str_build.push_str(&serialize_single_value(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::VectorOf4Single as i32 => {
-                    str_build.push_str(&serialize_single_value(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::VectorOf8Single as i32 => {
-                    if header_version == 1 {
-                        str_build.push_str(&serialize_single_value(&segment));
-                    } else {
-                        str_build.push_str(&serialize_single_value(&segment));
-                    }
-                    continue;
-                }
-                x if x == DataTypeIdFormat::ArrayOfInt64 as i32 => {
-                    str_build.push_str(&serialize_vec(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::ArrayOfVectorOf2Single as i32 => {
-                    str_build.push_str(&serialize_vec(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::Int16 as i32 => {
-                    str_build.push_str(&serialize_single_value(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::ArrayOfInt16 as i32 => {
-                    str_build.push_str(&serialize_vec(&segment));
-                    continue;
-                }
-                x if x == DataTypeIdFormat::ArrayOfVectorOf2Int32 as i32 => {
-                    str_build.push_str(&serialize_single_value(&segment));
-                    continue;
-                }
-                0 => {
-                    continue;
-                }
-                _ => {
-                    panic!("Unknown data type: {}", data_type);
-                }
-            }
+            serialize_segment(out, segment);
         }
     }
-
-    str_build
 }
 
-fn serialize_vec(data: &BsiiDataSegment) -> String {
-    let value = &data.value;
-    let mut text = String::new();
-
-    text.push_str(&format!("{}{}: {}\n", IDENT, data.name, value.len()));
+fn serialize_segment(out: &mut Vec<u8>, data: &BsiiDataSegment) {
+    let data_type = data.segment_type as i32;
 
-    for (i, val) in value.iter().enumerate() {
-        text.push_str(&format!("{}{}[{}]: {}\n", IDENT, data.name, i, val));
+    match &data.value {
+        SegmentValue::None => (),
+        SegmentValue::Bool(value) => {
+            write_key(out, data);
+            serialize::write_bool(out, *value);
+            out.push(b'\n');
+        }
+        // There are doubts with “nil” values if value is "null"
+        SegmentValue::Int16(value) => {
+            write_key(out, data);
+            serialize::write_integer_or_nil(out, *value, i16::MAX);
+            out.push(b'\n');
+        }
+        SegmentValue::Int32(value) => {
+            write_key(out, data);
+            serialize::write_integer(out, *value);
+            out.push(b'\n');
+        }
+        SegmentValue::Int64(value) => {
+            write_key(out, data);
+            serialize::write_integer(out, *value);
+            out.push(b'\n');
+        }
+        SegmentValue::UInt16(value) => {
+            write_key(out, data);
+            serialize::write_integer_or_nil(out, *value, u16::MAX);
+            out.push(b'\n');
+        }
+        SegmentValue::UInt32(value) => {
+            write_key(out, data);
+            serialize::write_integer_or_nil(out, *value, u32::MAX);
+            out.push(b'\n');
+        }
+        SegmentValue::UInt64(value) => {
+            write_key(out, data);
+            serialize::write_integer_or_nil(out, *value, u64::MAX);
+            out.push(b'\n');
+        }
+        SegmentValue::Single(value) => {
+            write_key(out, data);
+            serialize::write_single(out, *value);
+            out.push(b'\n');
+        }
+        SegmentValue::Vector2(value) => {
+            write_key(out, data);
+            serialize::write_single_vector(out, value);
+            out.push(b'\n');
+        }
+        SegmentValue::Vector3(value) => {
+            write_key(out, data);
+            serialize::write_single_vector(out, value);
+            out.push(b'\n');
+        }
+        SegmentValue::Vector4(value) => {
+            write_key(out, data);
+            serialize::write_single_vector_4(out, value);
+            out.push(b'\n');
+        }
+        SegmentValue::Vector7(value) => {
+            write_key(out, data);
+            serialize::write_single_vector_7(out, value);
+            out.push(b'\n');
+        }
+        SegmentValue::IntVector2(value) => {
+            write_key(out, data);
+            serialize::write_int_vector(out, value);
+            out.push(b'\n');
+        }
+        SegmentValue::IntVector3(value) => {
+            write_key(out, data);
+            serialize::write_int_vector(out, value);
+            out.push(b'\n');
+        }
+        SegmentValue::String(value) if data_type == DataTypeIdFormat::UTF8String as i32 => {
+            write_key(out, data);
+            serialize_utf8_string(out, value, value.parse::<i32>().is_ok());
+            out.push(b'\n');
+        }
+        // Encoded strings (tokens)
+        SegmentValue::String(value) => serialize_single_value_string(out, data, value),
+        SegmentValue::Ordinal(_, Some(value)) => serialize_single_value_string(out, data, value),
+        // Not in the ordinal table: keep the index so it encodes back
+        SegmentValue::Ordinal(index, None) => {
+            write_key(out, data);
+            serialize::write_integer(out, *index);
+            out.push(b'\n');
+        }
+        SegmentValue::Id(value) => {
+            write_key(out, data);
+            out.extend_from_slice(value.as_bytes());
+            out.push(b'\n');
+        }
+        SegmentValue::Bools(values) => {
+            serialize_vec(out, data, values, |out, v| serialize::write_bool(out, *v))
+        }
+        SegmentValue::Int16s(values) => serialize_vec(out, data, values, |out, v| {
+            serialize::write_integer(out, *v)
+        }),
+        SegmentValue::Int32s(values) => serialize_vec(out, data, values, |out, v| {
+            serialize::write_integer(out, *v)
+        }),
+        SegmentValue::Int64s(values) => serialize_vec(out, data, values, |out, v| {
+            serialize::write_integer(out, *v)
+        }),
+        SegmentValue::UInt16s(values) => serialize_vec(out, data, values, |out, v| {
+            serialize::write_integer(out, *v)
+        }),
+        SegmentValue::UInt32s(values) => serialize_vec(out, data, values, |out, v| {
+            serialize::write_integer_or_nil(out, *v, u32::MAX)
+        }),
+        SegmentValue::UInt64s(values) => serialize_vec(out, data, values, |out, v| {
+            serialize::write_integer(out, *v)
+        }),
+        SegmentValue::Singles(values) => {
+            serialize_vec(out, data, values, |out, v| serialize::write_single(out, *v))
+        }
+        SegmentValue::Vector2s(values) => serialize_vec(out, data, values, |out, v| {
+            serialize::write_single_vector(out, v)
+        }),
+        SegmentValue::Vector3s(values) => serialize_vec(out, data, values, |out, v| {
+            serialize::write_single_vector(out, v)
+        }),
+        SegmentValue::Vector4s(values) => {
+            serialize_vec(out, data, values, serialize::write_single_vector_4)
+        }
+        SegmentValue::Vector7s(values) => {
+            serialize_vec(out, data, values, serialize::write_single_vector_7)
+        }
+        SegmentValue::IntVector3s(values) => serialize_vec(out, data, values, |out, v| {
+            serialize::write_int_vector(out, v)
+        }),
+        SegmentValue::Strings(values)
+            if data_type == DataTypeIdFormat::ArrayOfUTF8String as i32 =>
+        {
+            serialize_vec(out, data, values, |out, v| {
+                serialize_utf8_string(out, v, v.parse::<u32>().is_ok())
+            })
+        }
+        SegmentValue::Strings(values) | SegmentValue::Ids(values) => {
+            serialize_vec(out, data, values, |out, v| {
+                out.extend_from_slice(v.as_bytes())
+            })
+        }
     }
+}
 
-    text
+/// ` name: `
+fn write_key(out: &mut Vec<u8>, data: &BsiiDataSegment) {
+    out.extend_from_slice(IDENT);
+    out.extend_from_slice(data.name.as_bytes());
+    out.extend_from_slice(b": ");
 }
 
-fn serialize_single_value(data: &BsiiDataSegment) -> String {
-    let value = &data.value;
+/// ` name: N` followed by one ` name[i]: value` line per element.
+fn serialize_vec<T>(
+    out: &mut Vec<u8>,
+    data: &BsiiDataSegment,
+    values: &[T],
+    write_value: impl Fn(&mut Vec<u8>, &T),
+) {
+    write_key(out, data);
+    serialize::write_integer(out, values.len());
+    out.push(b'\n');
 
-    format!("{}{}: {}\n", IDENT, data.name, value[0])
+    for (i, val) in values.iter().enumerate() {
+        out.extend_from_slice(IDENT);
+        out.extend_from_slice(data.name.as_bytes());
+        out.push(b'[');
+        serialize::write_integer(out, i);
+        out.extend_from_slice(b"]: ");
+        write_value(out, val);
+        out.push(b'\n');
+    }
 }
 
-fn serialize_single_value_string(data: &BsiiDataSegment) -> String {
-    let value = &data.value[0];
-
+fn serialize_single_value_string(out: &mut Vec<u8>, data: &BsiiDataSegment, value: &str) {
     let value_compare = match value {
         /*
         Support for external decryptors (more data types possible)
         */
-        v if data.name == "part_type" && v == "vehicle" => "unknown".to_string(),
-        v if data.name == "type" && v == "parking" => "spot".to_string(),
-        v if data.name == "setup" && v == "low_beam" => "candela_hue_saturation".to_string(),
-        v if data.name == "setup" && v == "parking" => "lumen_hue_saturation".to_string(),
-        v if data.name == "dir_type" && v == "parking" => "wide".to_string(),
-        v if data.name == "dir_type" && v == "low_beam" => "narrow".to_string(),
-        v if data.name == "cut_direction" && v.is_empty() => "forward".to_string(),
+        v if &*data.name == "part_type" && v == "vehicle" => "unknown",
+        v if &*data.name == "type" && v == "parking" => "spot",
+        v if &*data.name == "setup" && v == "low_beam" => "candela_hue_saturation",
+        v if &*data.name == "setup" && v == "parking" => "lumen_hue_saturation",
+        v if &*data.name == "dir_type" && v == "parking" => "wide",
+        v if &*data.name == "dir_type" && v == "low_beam" => "narrow",
+        v if &*data.name == "cut_direction" && v.is_empty() => "forward",
         /*
         Standard types
         */
-        v if v.is_empty() => "\"\"".to_string(),
-        _ => value.to_string(),
+        v if v.is_empty() => "\"\"",
+        _ => value,
     };
 
-    format!("{}{}: {}\n", IDENT, data.name, value_compare)
+    write_key(out, data);
+    out.extend_from_slice(value_compare.as_bytes());
+    out.push(b'\n');
 }
 
-fn serialize_utf8_string_vec(data: &BsiiDataSegment) -> String {
-    let value = &data.value;
-    let mut text = String::new();
-
-    text.push_str(&format!("{}{}: {}\n", IDENT, data.name, value.len()));
-
-    for (i, val) in value.iter().enumerate() {
-        if val.parse::<u32>().is_ok() {
-            text.push_str(&format!("{}{}[{}]: {}\n", IDENT, data.name, i, val));
-        } else {
-            if val.is_empty() {
-                text.push_str(&format!("{}{}[{}]: \"\"\n", IDENT, data.name, i));
-            } else {
-                if is_limited_alphabet(val) {
-                    text.push_str(&format!("{}{}[{}]: {}\n", IDENT, data.name, i, val));
-                } else {
-                    text.push_str(&format!("{}{}[{}]: \"{}\"\n", IDENT, data.name, i, val));
-                }
-            }
-        }
+/// Numbers and identifier-like strings are written bare, anything else
+/// quoted.
+pub fn serialize_utf8_string(out: &mut Vec<u8>, value: &str, is_number: bool) {
+    if is_number || (!value.is_empty() && is_limited_alphabet(value)) {
+        out.extend_from_slice(value.as_bytes());
+    } else {
+        out.push(b'"');
+        out.extend_from_slice(value.as_bytes());
+        out.push(b'"');
     }
+}
 
-    text
+// [0-9a-zA-Z_]
+fn is_limited_alphabet(value: &str) -> bool {
+    value
+        .bytes()
+        .all(|c| c.is_ascii_alphanumeric() || c == b'_')
 }
 
-fn serialize_utf8_string(data: &BsiiDataSegment) -> String {
-    let value = &data.value[0];
-    let mut text = format!("{}{}: ", IDENT, data.name);
+fn serialize_block(out: &mut Vec<u8>, block: &BsiiStructureDecodedBlock) {
+    out.extend_from_slice(block.name.as_bytes());
+    out.extend_from_slice(b" : ");
+    out.extend_from_slice(block.id.value.as_bytes());
+    out.extend_from_slice(b" {\n");
+    segment_serialize(out, block);
+    out.extend_from_slice(b"}\n\n");
+}
 
-    if let Ok(_) = value.parse::<i32>() {
-        text.push_str(&format!("{}\n", value));
-    } else {
-        if value.is_empty() {
-            text.push_str("\"\"\n");
-        } else {
-            if is_limited_alphabet(value) {
-                text.push_str(&format!("{}\n", value));
-            } else {
-                text.push_str(&format!("\"{}\"\n", value));
-            }
-        }
-    }
+/// Serializes blocks to one buffer per chunk of `CHUNK_BLOCKS`, in
+/// parallel. The chunks are returned in block order.
+fn serialize_chunks(blocks: &[BsiiStructureDecodedBlock]) -> Vec<Vec<u8>> {
+    blocks
+        .par_chunks(CHUNK_BLOCKS)
+        .map(|blocks| {
+            let size_hint: usize = blocks
+                .iter()
+                .map(|block| block.segments.len() * SEGMENT_SIZE_HINT)
+                .sum();
 
-    text
+            let mut out = Vec::with_capacity(size_hint);
+            for block in blocks {
+                serialize_block(&mut out, block);
+            }
+            out
+        })
+        .collect()
 }
 
-fn is_limited_alphabet(value: &str) -> bool {
-    for c in value.chars() {
-        if !LIMITED_ALPHABET.contains(&c) {
-            return false;
-        }
+/// Serializes the decoded blocks to SiiNunit text. Blocks are kept in
+/// `decoded_blocks` in file order; chunks of them are written to separate
+/// buffers in parallel and joined in that order.
+pub fn serializer(data: &BSIIData) -> Vec<u8> {
+    let chunks = serialize_chunks(&data.decoded_blocks);
+
+    let size = HEADER.len() + chunks.iter().map(Vec::len).sum::<usize>() + FOOTER.len();
+    let mut out = Vec::with_capacity(size);
+
+    out.extend_from_slice(HEADER);
+    for chunk in chunks {
+        out.extend_from_slice(&chunk);
     }
+    out.extend_from_slice(FOOTER);
 
-    true
+    out
 }
 
-pub fn serializer(data: &BSIIData) -> Vec<u8> {
-    let mut str_build = String::new();
-    str_build.push_str("SiiNunit\n{\n");
+// Streaming: `write_header`, then `write_blocks` for each run of blocks in
+// file order, then `write_footer`.
 
-    let mut partial_results: Vec<(u32, String)> = data
-        .decoded_blocks
-        .par_iter()
-        .filter_map(|block| {
-            if block.name.is_empty() || block.id.value.is_empty() {
-                return None;
-            }
+pub fn write_header<W: Write + ?Sized>(out: &mut W) -> io::Result<()> {
+    out.write_all(HEADER)
+}
 
-            Some((
-                block.order_pos,
-                format!(
-                    "{} : {} {{\n{}}}\n\n",
-                    block.name,
-                    block.id.value,
-                    segment_serialize(block, data.header.version)
-                ),
-            ))
-        })
-        .collect();
+pub fn write_blocks<W: Write + ?Sized>(
+    blocks: &[BsiiStructureDecodedBlock],
+    out: &mut W,
+) -> io::Result<()> {
+    for chunk in serialize_chunks(blocks) {
+        match out.write_all(&chunk) {
+            Ok(_) => (),
+            Err(e) => return Err(e),
+        }
+    }
 
-    partial_results.sort_by_key(|(pos, _)| *pos);
+    Ok(())
+}
 
-    for (_, value) in partial_results {
-        str_build.push_str(&value);
+pub fn write_footer<W: Write + ?Sized>(out: &mut W) -> io::Result<()> {
+    match out.write_all(FOOTER) {
+        Ok(_) => out.flush(),
+        Err(e) => Err(e),
     }
-
-    str_build.push('}');
-    str_build.into_bytes()
 }
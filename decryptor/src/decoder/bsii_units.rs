@@ -0,0 +1,87 @@
+use crate::strucs::data_sii::{
+    BSIIData, BsiiDataSegment, BsiiStructureDecodedBlock, SegmentValue, SiiUnit, SiiValue,
+};
+
+// `nil` follows the serializer: scalar unsigned and i16 sentinels, and
+// u32 sentinels inside arrays.
+
+fn uint_or_nil(value: u64, nil: u64) -> SiiValue {
+    if value == nil {
+        SiiValue::Nil
+    } else {
+        SiiValue::UInt(value)
+    }
+}
+
+fn array<T>(values: &[T], convert: impl Fn(&T) -> SiiValue) -> SiiValue {
+    SiiValue::Array(values.iter().map(convert).collect())
+}
+
+fn segment_value(segment: &BsiiDataSegment) -> Option<SiiValue> {
+    let value = match &segment.value {
+        SegmentValue::None => return None,
+        SegmentValue::Bool(value) => SiiValue::Bool(*value),
+        SegmentValue::Int16(value) if *value == i16::MAX => SiiValue::Nil,
+        SegmentValue::Int16(value) => SiiValue::Int(*value as i64),
+        SegmentValue::Int32(value) => SiiValue::Int(*value as i64),
+        SegmentValue::Int64(value) => SiiValue::Int(*value),
+        SegmentValue::UInt16(value) => uint_or_nil(*value as u64, u16::MAX as u64),
+        SegmentValue::UInt32(value) => uint_or_nil(*value as u64, u32::MAX as u64),
+        SegmentValue::UInt64(value) => uint_or_nil(*value, u64::MAX),
+        SegmentValue::Single(value) => SiiValue::Float(*value),
+        SegmentValue::Vector2(value) => SiiValue::Vector(value.to_vec()),
+        SegmentValue::Vector3(value) => SiiValue::Vector(value.to_vec()),
+        SegmentValue::Vector4(value) => SiiValue::Vector(value.to_vec()),
+        SegmentValue::Vector7(value) => SiiValue::Vector(value.to_vec()),
+        SegmentValue::IntVector2(value) => SiiValue::IntVector(value.to_vec()),
+        SegmentValue::IntVector3(value) => SiiValue::IntVector(value.to_vec()),
+        SegmentValue::String(value) => SiiValue::String(value.clone()),
+        SegmentValue::Ordinal(_, Some(value)) => SiiValue::String(value.to_string()),
+        SegmentValue::Ordinal(index, None) => SiiValue::UInt(*index as u64),
+        SegmentValue::Id(value) => SiiValue::Id(value.clone()),
+        SegmentValue::Bools(values) => array(values, |v| SiiValue::Bool(*v)),
+        SegmentValue::Int16s(values) => array(values, |v| SiiValue::Int(*v as i64)),
+        SegmentValue::Int32s(values) => array(values, |v| SiiValue::Int(*v as i64)),
+        SegmentValue::Int64s(values) => array(values, |v| SiiValue::Int(*v)),
+        SegmentValue::UInt16s(values) => array(values, |v| SiiValue::UInt(*v as u64)),
+        SegmentValue::UInt32s(values) => array(values, |v| uint_or_nil(*v as u64, u32::MAX as u64)),
+        SegmentValue::UInt64s(values) => array(values, |v| SiiValue::UInt(*v)),
+        SegmentValue::Singles(values) => array(values, |v| SiiValue::Float(*v)),
+        SegmentValue::Vector2s(values) => array(values, |v| SiiValue::Vector(v.to_vec())),
+        SegmentValue::Vector3s(values) => array(values, |v| SiiValue::Vector(v.to_vec())),
+        SegmentValue::Vector4s(values) => array(values, |v| SiiValue::Vector(v.to_vec())),
+        SegmentValue::Vector7s(values) => array(values, |v| SiiValue::Vector(v.to_vec())),
+        SegmentValue::IntVector3s(values) => array(values, |v| SiiValue::IntVector(v.to_vec())),
+        SegmentValue::Strings(values) => array(values, |v| SiiValue::String(v.clone())),
+        SegmentValue::Ids(values) => array(values, |v| SiiValue::Id(v.clone())),
+    };
+
+    Some(value)
+}
+
+pub fn unit_from_block(block: &BsiiStructureDecodedBlock) -> Option<SiiUnit> {
+    // Same rule as the serializer: unnamed blocks are not units
+    if block.name.is_empty() || block.id.value.is_empty() {
+        return None;
+    }
+
+    Some(SiiUnit {
+        name: block.name.to_string(),
+        id: block.id.value.clone(),
+        attributes: block
+            .segments
+            .iter()
+            .filter(|segment| segment.segment_type != 0)
+            .filter_map(|segment| {
+                segment_value(segment).map(|value| (segment.name.to_string(), value))
+            })
+            .collect(),
+    })
+}
+
+pub fn units_from_data(data: &BSIIData) -> Vec<SiiUnit> {
+    data.decoded_blocks
+        .iter()
+        .filter_map(unit_from_block)
+        .collect()
+}
@@ -1,14 +1,13 @@
-use crate::strucs::data_sii::BsiiStructureDecodedBlock;
+use crate::strucs::data_sii::{BsiiStructureDecodedBlock, OrdinalTable, SegmentValue};
 use crate::strucs::sii_types::DataTypeIdFormat;
-use crate::utils::{decode_utils, serialize};
-use std::collections::HashMap;
+use crate::utils::decode_utils;
 
 pub fn load_data_block_local(
     bytes: &[u8],
     stream_pos: &mut usize,
     segment: &mut BsiiStructureDecodedBlock,
     format_version: u32,
-    values: &mut HashMap<u32, String>,
+    values: Option<&OrdinalTable>,
 ) -> Result<(), String> {
     segment.id = match decode_utils::decode_id(bytes, stream_pos) {
         Ok(res) => res,
@@ -25,7 +24,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = serialize::bool_vec_to_string_vec(&res);
+                segment.segments[i].value = SegmentValue::Bools(res);
                 continue;
             }
             x if x == DataTypeIdFormat::ArrayOfEncodedString as i32 => {
@@ -34,7 +33,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = res;
+                segment.segments[i].value = SegmentValue::Strings(res);
                 continue;
             }
             x if x == DataTypeIdFormat::ArrayOfIdA as i32 => {
@@ -43,7 +42,8 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = serialize::id_complex_to_string_vec(&res);
+                segment.segments[i].value =
+                    SegmentValue::Ids(res.into_iter().map(|id| id.value).collect());
                 continue;
             }
             x if x == DataTypeIdFormat::ArrayOfIdC as i32 => {
@@ -52,7 +52,8 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = serialize::id_complex_to_string_vec(&res);
+                segment.segments[i].value =
+                    SegmentValue::Ids(res.into_iter().map(|id| id.value).collect());
                 continue;
             }
             x if x == DataTypeIdFormat::ArrayOfIdE as i32 => {
@@ -61,7 +62,8 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = serialize::id_complex_to_string_vec(&res);
+                segment.segments[i].value =
+                    SegmentValue::Ids(res.into_iter().map(|id| id.value).collect());
                 continue;
             }
             x if x == DataTypeIdFormat::ArrayOfInt32 as i32 => {
@@ -70,7 +72,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = serialize::i32_vec_to_string_vec(&res);
+                segment.segments[i].value = SegmentValue::Int32s(res);
                 continue;
             }
             x if x == DataTypeIdFormat::ArrayOfSingle as i32 => {
@@ -79,7 +81,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = serialize::f32_vec_to_string_vec(&res);
+                segment.segments[i].value = SegmentValue::Singles(res);
                 continue;
             }
             x if x == DataTypeIdFormat::ArrayOfUInt16 as i32 => {
@@ -88,7 +90,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = serialize::u16_vec_to_string_vec(&res);
+                segment.segments[i].value = SegmentValue::UInt16s(res);
                 continue;
             }
             x if x == DataTypeIdFormat::ArrayOfUInt32 as i32 => {
@@ -97,7 +99,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = serialize::u32_vec_to_string_vec(&res);
+                segment.segments[i].value = SegmentValue::UInt32s(res);
                 continue;
             }
             x if x == DataTypeIdFormat::ArrayOfUInt64 as i32 => {
@@ -106,7 +108,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = serialize::u64_vec_to_string_vec(&res);
+                segment.segments[i].value = SegmentValue::UInt64s(res);
                 continue;
             }
             x if x == DataTypeIdFormat::ArrayOfUTF8String as i32 => {
@@ -115,7 +117,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = res;
+                segment.segments[i].value = SegmentValue::Strings(res);
                 continue;
             }
             x if x == DataTypeIdFormat::ArrayOfVectorOf3Int32 as i32 => {
@@ -124,7 +126,8 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = serialize::i32_vec3_to_string_vec(&res);
+                segment.segments[i].value =
+                    SegmentValue::IntVector3s(res.iter().map(|v| [v.a, v.b, v.c]).collect());
                 continue;
             }
             x if x == DataTypeIdFormat::ArrayOfVectorOf3Single as i32 => {
@@ -133,7 +136,8 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = serialize::single_vector_3_vec_to_string_vec(&res);
+                segment.segments[i].value =
+                    SegmentValue::Vector3s(res.iter().map(|v| [v.a, v.b, v.c]).collect());
                 continue;
             }
             x if x == DataTypeIdFormat::ArrayOfVectorOf4Single as i32 => {
@@ -142,7 +146,8 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = serialize::single_vector_4_vec_to_string_vec(&res);
+                segment.segments[i].value =
+                    SegmentValue::Vector4s(res.iter().map(|v| [v.a, v.b, v.c, v.d]).collect());
                 continue;
             }
             x if x == DataTypeIdFormat::ArrayOfVectorOf8Single as i32 => {
@@ -151,13 +156,21 @@ pub fn load_data_block_local(
                         Ok(res) => res,
                         Err(e) => return Err(e),
                     };
-                    segment.segments[i].value = serialize::single_vector_7_vec_to_string_vec(&res);
+                    segment.segments[i].value = SegmentValue::Vector7s(
+                        res.iter()
+                            .map(|v| [v.a, v.b, v.c, v.d, v.e, v.f, v.g])
+                            .collect(),
+                    );
                 } else {
                     let res = match decode_utils::decode_single_vector8_array(bytes, stream_pos) {
                         Ok(res) => res,
                         Err(e) => return Err(e),
                     };
-                    segment.segments[i].value = serialize::single_vector_8_vec_to_string_vec(&res);
+                    segment.segments[i].value = SegmentValue::Vector7s(
+                        res.iter()
+                            .map(|v| [v.a, v.b, v.c, v.e, v.f, v.g, v.h])
+                            .collect(),
+                    );
                 }
 
                 continue;
@@ -165,7 +178,7 @@ pub fn load_data_block_local(
             x if x == DataTypeIdFormat::ByteBool as i32 => {
                 let res = decode_utils::decode_bool(bytes, stream_pos);
 
-                segment.segments[i].value = vec![res.to_string()];
+                segment.segments[i].value = SegmentValue::Bool(res);
                 continue;
             }
             x if x == DataTypeIdFormat::EncodedString as i32 => {
@@ -174,7 +187,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = vec![res];
+                segment.segments[i].value = SegmentValue::String(res);
                 continue;
             }
             x if x == DataTypeIdFormat::IdType3 as i32 => {
@@ -183,7 +196,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = vec![res.value];
+                segment.segments[i].value = SegmentValue::Id(res.value);
                 continue;
             }
             x if x == DataTypeIdFormat::IdType2 as i32 => {
@@ -192,7 +205,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = vec![res.value];
+                segment.segments[i].value = SegmentValue::Id(res.value);
                 continue;
             }
             x if x == DataTypeIdFormat::Id as i32 => {
@@ -201,7 +214,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = vec![res.value];
+                segment.segments[i].value = SegmentValue::Id(res.value);
                 continue;
             }
             x if x == DataTypeIdFormat::Int32 as i32 => {
@@ -210,7 +223,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = vec![res.to_string()];
+                segment.segments[i].value = SegmentValue::Int32(res);
                 continue;
             }
             x if x == DataTypeIdFormat::Int64 as i32 => {
@@ -219,7 +232,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = vec![res.to_string()];
+                segment.segments[i].value = SegmentValue::Int64(res);
                 continue;
             }
             x if x == DataTypeIdFormat::UInt32Type2 as i32 => {
@@ -228,7 +241,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = serialize::u32_to_string_vec(res);
+                segment.segments[i].value = SegmentValue::UInt32(res);
                 continue;
             }
             x if x == DataTypeIdFormat::UInt32 as i32 => {
@@ -237,7 +250,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = serialize::u32_to_string_vec(res);
+                segment.segments[i].value = SegmentValue::UInt32(res);
                 continue;
             }
             x if x == DataTypeIdFormat::UInt64 as i32 => {
@@ -246,7 +259,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = serialize::u64_to_string_vec(res);
+                segment.segments[i].value = SegmentValue::UInt64(res);
                 continue;
             }
             x if x == DataTypeIdFormat::UInt16 as i32 => {
@@ -255,17 +268,17 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = serialize::u16_to_string_vec(res);
+                segment.segments[i].value = SegmentValue::UInt16(res);
                 continue;
             }
             x if x == DataTypeIdFormat::OrdinalString as i32 => {
-                let res =
+                let (index, value) =
                     match decode_utils::get_ordinal_string_from_values(values, bytes, stream_pos) {
                         Ok(res) => res,
                         Err(e) => return Err(e),
                     };
 
-                segment.segments[i].value = vec![res];
+                segment.segments[i].value = SegmentValue::Ordinal(index, value);
                 continue;
             }
             x if x == DataTypeIdFormat::Single as i32 => {
@@ -274,7 +287,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = vec![serialize::single_to_string(res)];
+                segment.segments[i].value = SegmentValue::Single(res);
                 continue;
             }
             x if x == DataTypeIdFormat::UTF8String as i32 => {
@@ -283,7 +296,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = vec![res];
+                segment.segments[i].value = SegmentValue::String(res);
                 continue;
             }
             x if x == DataTypeIdFormat::VectorOf2Single as i32 => {
@@ -292,7 +305,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = vec![serialize::single_vector_2_string(&res)];
+                segment.segments[i].value = SegmentValue::Vector2([res.a, res.b]);
                 continue;
             }
             x if x == DataTypeIdFormat::VectorOf3Int32 as i32 => {
@@ -301,7 +314,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = vec![serialize::vec3_u32_to_string(&res)];
+                segment.segments[i].value = SegmentValue::IntVector3([res.a, res.b, res.c]);
                 continue;
             }
             x if x == DataTypeIdFormat::VectorOf3Single as i32 => {
@@ -310,7 +323,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = vec![serialize::single_vector_3_to_string(&res)];
+                segment.segments[i].value = SegmentValue::Vector3([res.a, res.b, res.c]);
                 continue;
             }
             x if x == DataTypeIdFormat::VectorOf4Single as i32 => {
@@ -319,7 +332,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = vec![serialize::single_vector_4_to_string(&res)];
+                segment.segments[i].value = SegmentValue::Vector4([res.a, res.b, res.c, res.d]);
                 continue;
             }
             x if x == DataTypeIdFormat::VectorOf8Single as i32 => {
@@ -329,14 +342,16 @@ pub fn load_data_block_local(
                         Err(e) => return Err(e),
                     };
 
-                    segment.segments[i].value = vec![serialize::single_vector_7_to_string(&res)];
+                    segment.segments[i].value =
+                        SegmentValue::Vector7([res.a, res.b, res.c, res.d, res.e, res.f, res.g]);
                 } else {
                     let res = match decode_utils::decode_single_vector8(bytes, stream_pos) {
                         Ok(res) => res,
                         Err(e) => return Err(e),
                     };
 
-                    segment.segments[i].value = vec![serialize::single_vector_8_to_string(&res)];
+                    segment.segments[i].value =
+                        SegmentValue::Vector7([res.a, res.b, res.c, res.e, res.f, res.g, res.h]);
                 }
 
                 continue;
@@ -347,7 +362,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = serialize::i64_vec_to_string_vec(&res);
+                segment.segments[i].value = SegmentValue::Int64s(res);
                 continue;
             }
             x if x == DataTypeIdFormat::ArrayOfInt16 as i32 => {
@@ -356,7 +371,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = serialize::i16_vec_to_string_vec(&res);
+                segment.segments[i].value = SegmentValue::Int16s(res);
                 continue;
             }
             x if x == DataTypeIdFormat::Int16 as i32 => {
@@ -365,7 +380,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = serialize::i16_to_string_vec(res);
+                segment.segments[i].value = SegmentValue::Int16(res);
                 continue;
             }
             x if x == DataTypeIdFormat::ArrayOfVectorOf2Single as i32 => {
@@ -374,7 +389,8 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = serialize::single_vector_2_vec_to_string_vec(&res);
+                segment.segments[i].value =
+                    SegmentValue::Vector2s(res.iter().map(|v| [v.a, v.b]).collect());
                 continue;
             }
             x if x == DataTypeIdFormat::ArrayOfVectorOf2Int32 as i32 => {
@@ -383,7 +399,7 @@ pub fn load_data_block_local(
                     Err(e) => return Err(e),
                 };
 
-                segment.segments[i].value = vec![serialize::vec2_u32_to_string(&res)];
+                segment.segments[i].value = SegmentValue::IntVector2([res.a, res.b]);
                 continue;
             }
             0 => {
@@ -1,3 +1,7 @@
+pub mod active_mods;
 pub mod bsii_decoder;
+pub mod bsii_index;
 mod bsii_serializer;
+mod bsii_units;
 mod load_data_block;
+mod skip_data_block;
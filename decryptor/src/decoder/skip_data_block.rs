@@ -0,0 +1,146 @@
+use crate::strucs::data_sii::BsiiDataSegment;
+use crate::strucs::sii_types::DataTypeIdFormat;
+use crate::utils::decode_utils;
+
+// Byte size of the fixed-size value types
+const SIZE_BOOL: usize = 1;
+const SIZE_U16: usize = 2;
+const SIZE_U32: usize = 4;
+const SIZE_U64: usize = 8;
+
+/// Byte size of a fixed-size segment type, or `None` if its length is
+/// stored in the data itself.
+fn fixed_size(data_type: i32, format_version: u32) -> Option<usize> {
+    match data_type {
+        x if x == DataTypeIdFormat::ByteBool as i32 => Some(SIZE_BOOL),
+        x if x == DataTypeIdFormat::Int16 as i32 => Some(SIZE_U16),
+        x if x == DataTypeIdFormat::UInt16 as i32 => Some(SIZE_U16),
+        x if x == DataTypeIdFormat::Int32 as i32 => Some(SIZE_U32),
+        x if x == DataTypeIdFormat::UInt32 as i32 => Some(SIZE_U32),
+        x if x == DataTypeIdFormat::UInt32Type2 as i32 => Some(SIZE_U32),
+        x if x == DataTypeIdFormat::OrdinalString as i32 => Some(SIZE_U32),
+        x if x == DataTypeIdFormat::Single as i32 => Some(SIZE_U32),
+        x if x == DataTypeIdFormat::Int64 as i32 => Some(SIZE_U64),
+        x if x == DataTypeIdFormat::UInt64 as i32 => Some(SIZE_U64),
+        x if x == DataTypeIdFormat::EncodedString as i32 => Some(SIZE_U64),
+        x if x == DataTypeIdFormat::VectorOf2Single as i32 => Some(SIZE_U32 * 2),
+        // Decoded as a single vector of two i32, not as an array
+        x if x == DataTypeIdFormat::ArrayOfVectorOf2Int32 as i32 => Some(SIZE_U32 * 2),
+        x if x == DataTypeIdFormat::VectorOf3Single as i32 => Some(SIZE_U32 * 3),
+        x if x == DataTypeIdFormat::VectorOf3Int32 as i32 => Some(SIZE_U32 * 3),
+        x if x == DataTypeIdFormat::VectorOf4Single as i32 => Some(SIZE_U32 * 4),
+        x if x == DataTypeIdFormat::VectorOf8Single as i32 => {
+            if format_version == 1 {
+                Some(SIZE_U32 * 7)
+            } else {
+                Some(SIZE_U32 * 8)
+            }
+        }
+        _ => None,
+    }
+}
+
+/// Byte size of one element of a fixed-size array type.
+fn fixed_array_element_size(data_type: i32, format_version: u32) -> Option<usize> {
+    match data_type {
+        x if x == DataTypeIdFormat::ArrayOfByteBool as i32 => Some(SIZE_BOOL),
+        x if x == DataTypeIdFormat::ArrayOfInt16 as i32 => Some(SIZE_U16),
+        x if x == DataTypeIdFormat::ArrayOfUInt16 as i32 => Some(SIZE_U16),
+        x if x == DataTypeIdFormat::ArrayOfInt32 as i32 => Some(SIZE_U32),
+        x if x == DataTypeIdFormat::ArrayOfUInt32 as i32 => Some(SIZE_U32),
+        x if x == DataTypeIdFormat::ArrayOfSingle as i32 => Some(SIZE_U32),
+        x if x == DataTypeIdFormat::ArrayOfInt64 as i32 => Some(SIZE_U64),
+        x if x == DataTypeIdFormat::ArrayOfUInt64 as i32 => Some(SIZE_U64),
+        x if x == DataTypeIdFormat::ArrayOfEncodedString as i32 => Some(SIZE_U64),
+        x if x == DataTypeIdFormat::ArrayOfVectorOf2Single as i32 => Some(SIZE_U32 * 2),
+        x if x == DataTypeIdFormat::ArrayOfVectorOf3Single as i32 => Some(SIZE_U32 * 3),
+        x if x == DataTypeIdFormat::ArrayOfVectorOf3Int32 as i32 => Some(SIZE_U32 * 3),
+        x if x == DataTypeIdFormat::ArrayOfVectorOf4Single as i32 => Some(SIZE_U32 * 4),
+        x if x == DataTypeIdFormat::ArrayOfVectorOf8Single as i32 => {
+            if format_version == 1 {
+                Some(SIZE_U32 * 7)
+            } else {
+                Some(SIZE_U32 * 8)
+            }
+        }
+        _ => None,
+    }
+}
+
+/// Advances `stream_pos` past one value of `data_type`.
+pub fn skip_segment_value(
+    bytes: &[u8],
+    stream_pos: &mut usize,
+    data_type: i32,
+    format_version: u32,
+) -> Result<(), String> {
+    if let Some(size) = fixed_size(data_type, format_version) {
+        return decode_utils::skip_bytes(bytes, stream_pos, size);
+    }
+
+    if let Some(size) = fixed_array_element_size(data_type, format_version) {
+        return decode_utils::skip_fixed_array(bytes, stream_pos, size);
+    }
+
+    match data_type {
+        x if x == DataTypeIdFormat::UTF8String as i32 => {
+            decode_utils::skip_utf8_string(bytes, stream_pos)
+        }
+        x if x == DataTypeIdFormat::ArrayOfUTF8String as i32 => {
+            decode_utils::skip_utf8_string_array(bytes, stream_pos)
+        }
+        x if x == DataTypeIdFormat::Id as i32
+            || x == DataTypeIdFormat::IdType2 as i32
+            || x == DataTypeIdFormat::IdType3 as i32 =>
+        {
+            decode_utils::skip_id(bytes, stream_pos)
+        }
+        x if x == DataTypeIdFormat::ArrayOfIdA as i32
+            || x == DataTypeIdFormat::ArrayOfIdC as i32
+            || x == DataTypeIdFormat::ArrayOfIdE as i32 =>
+        {
+            decode_utils::skip_id_array(bytes, stream_pos)
+        }
+        0 => Ok(()),
+        _ => Err(format!("Unknown data type: {}", data_type)),
+    }
+}
+
+/// Counterpart of `load_data_block_local` that only advances `stream_pos`
+/// past the block, using the segment types of its structure definition.
+pub fn skip_data_block_local(
+    bytes: &[u8],
+    stream_pos: &mut usize,
+    segments: &[BsiiDataSegment],
+    format_version: u32,
+) -> Result<(), String> {
+    match decode_utils::skip_id(bytes, stream_pos) {
+        Ok(_) => (),
+        Err(e) => return Err(e),
+    };
+
+    skip_segments(bytes, stream_pos, segments, format_version)
+}
+
+/// Advances `stream_pos` past the segment values of a block whose id has
+/// already been read.
+pub fn skip_segments(
+    bytes: &[u8],
+    stream_pos: &mut usize,
+    segments: &[BsiiDataSegment],
+    format_version: u32,
+) -> Result<(), String> {
+    for segment in segments {
+        match skip_segment_value(
+            bytes,
+            stream_pos,
+            segment.segment_type as i32,
+            format_version,
+        ) {
+            Ok(_) => (),
+            Err(e) => return Err(e),
+        }
+    }
+
+    Ok(())
+}
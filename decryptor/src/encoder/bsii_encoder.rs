@@ -0,0 +1,557 @@
+use crate::decoder::bsii_decoder::read_structures;
+use crate::encoder::sii_text::{TextUnit, parse_units};
+use crate::strucs::data_sii::{
+    BSIIData, BsiiDataSegment, BsiiStructureBlock, OrdinalTable, SignatureType,
+};
+use crate::strucs::sii_types::DataTypeIdFormat;
+use crate::utils::encode_utils;
+use std::collections::HashMap;
+use std::sync::Arc;
+
+fn parse_single(value: &str) -> Result<f32, String> {
+    match value.strip_prefix('&') {
+        Some(hex) => match u32::from_str_radix(hex, 16) {
+            Ok(bits) => Ok(f32::from_bits(bits)),
+            Err(_) => Err(format!("Invalid float: {}", value)),
+        },
+        None => match value.parse::<f32>() {
+            Ok(res) => Ok(res),
+            Err(_) => Err(format!("Invalid float: {}", value)),
+        },
+    }
+}
+
+fn parse_number<T: std::str::FromStr>(value: &str, nil: Option<T>) -> Result<T, String> {
+    if value == "nil" {
+        if let Some(nil) = nil {
+            return Ok(nil);
+        }
+    }
+
+    match value.parse::<T>() {
+        Ok(res) => Ok(res),
+        Err(_) => Err(format!("Invalid number: {}", value)),
+    }
+}
+
+fn vector_parts(value: &str) -> Vec<&str> {
+    value
+        .split(|c: char| matches!(c, '(' | ')' | ',' | ';') || c.is_whitespace())
+        .filter(|part| !part.is_empty())
+        .collect()
+}
+
+fn encode_single_vector(out: &mut Vec<u8>, value: &str, size: usize) -> Result<(), String> {
+    let parts = vector_parts(value);
+    if parts.len() != size {
+        return Err(format!("Expected {} components: {}", size, value));
+    }
+
+    for part in parts {
+        match parse_single(part) {
+            Ok(res) => encode_utils::encode_single(out, res),
+            Err(e) => return Err(e),
+        }
+    }
+
+    Ok(())
+}
+
+fn encode_int_vector(out: &mut Vec<u8>, value: &str, size: usize) -> Result<(), String> {
+    let parts = vector_parts(value);
+    if parts.len() != size {
+        return Err(format!("Expected {} components: {}", size, value));
+    }
+
+    for part in parts {
+        match parse_number::<i32>(part, None) {
+            Ok(res) => encode_utils::encode_u32(out, res as u32),
+            Err(e) => return Err(e),
+        }
+    }
+
+    Ok(())
+}
+
+// Splits a coordinate into the stored float and the 12-bit bias group that
+// decode_single_vector8 adds back (in units of 512). The bias is rounded
+// toward zero so the subtraction is exact; values the clamped range cannot
+// take back exactly are stored unbiased
+fn split_bias(value: f32) -> (f32, i64) {
+    let group = ((value / 512.0).trunc() as i64 + 2048).clamp(0, 0xFFF);
+    let bias = ((group - 2048) << 9) as f32;
+    let stored = value - bias;
+
+    if stored + bias == value {
+        (stored, group)
+    } else {
+        (value, 2048)
+    }
+}
+
+// 0x19: text holds `(x, y, z) (w; a, b, c)`; format 2+ stores the bias of
+// x and z in a fourth float
+fn encode_single_vector8(
+    out: &mut Vec<u8>,
+    value: &str,
+    format_version: u32,
+) -> Result<(), String> {
+    let parts = vector_parts(value);
+    if parts.len() != 7 {
+        return Err(format!("Expected 7 components: {}", value));
+    }
+
+    let mut values = Vec::with_capacity(parts.len());
+    for part in parts {
+        match parse_single(part) {
+            Ok(res) => values.push(res),
+            Err(e) => return Err(e),
+        }
+    }
+
+    if format_version == 1 {
+        for value in values {
+            encode_utils::encode_single(out, value);
+        }
+        return Ok(());
+    }
+
+    let (x, x_group) = split_bias(values[0]);
+    let (z, z_group) = split_bias(values[2]);
+    let bias = ((z_group << 12) | x_group) as f32;
+
+    for value in [
+        x, values[1], z, bias, values[3], values[4], values[5], values[6],
+    ] {
+        encode_utils::encode_single(out, value);
+    }
+
+    Ok(())
+}
+
+// The serializer renames a few ordinal values; map them back
+fn ordinal_alias<'a>(name: &str, value: &'a str) -> &'a str {
+    match (name, value) {
+        ("part_type", "unknown") => "vehicle",
+        ("type", "spot") => "parking",
+        ("setup", "candela_hue_saturation") => "low_beam",
+        ("setup", "lumen_hue_saturation") => "parking",
+        ("dir_type", "wide") => "parking",
+        ("dir_type", "narrow") => "low_beam",
+        ("cut_direction", "forward") => "",
+        _ => value,
+    }
+}
+
+fn encode_ordinal_string(
+    out: &mut Vec<u8>,
+    segment: &BsiiDataSegment,
+    value: &str,
+) -> Result<(), String> {
+    let values = match &segment.ordinal_string_hash {
+        Some(res) => res,
+        None => return Err("Ordinal string hash is empty".to_string()),
+    };
+
+    for candidate in [value, ordinal_alias(&segment.name, value)] {
+        if let Some((ordinal, _)) = values
+            .iter()
+            .find(|(_, string)| string.as_ref() == candidate)
+        {
+            encode_utils::encode_u32(out, *ordinal);
+            return Ok(());
+        }
+    }
+
+    // The serializer writes indexes missing from the table as numbers
+    if let Ok(index) = value.parse::<u32>() {
+        if !values.contains_key(&index) {
+            encode_utils::encode_u32(out, index);
+            return Ok(());
+        }
+    }
+
+    Err(format!("Unknown value for {}: {}", segment.name, value))
+}
+
+/// Element type of an array type, or `None` for scalar types.
+fn array_element_type(data_type: i32) -> Option<i32> {
+    let element_type = match data_type {
+        x if x == DataTypeIdFormat::ArrayOfUTF8String as i32 => DataTypeIdFormat::UTF8String,
+        x if x == DataTypeIdFormat::ArrayOfEncodedString as i32 => DataTypeIdFormat::EncodedString,
+        x if x == DataTypeIdFormat::ArrayOfSingle as i32 => DataTypeIdFormat::Single,
+        x if x == DataTypeIdFormat::ArrayOfVectorOf2Single as i32 => {
+            DataTypeIdFormat::VectorOf2Single
+        }
+        x if x == DataTypeIdFormat::ArrayOfVectorOf3Single as i32 => {
+            DataTypeIdFormat::VectorOf3Single
+        }
+        x if x == DataTypeIdFormat::ArrayOfVectorOf3Int32 as i32 => {
+            DataTypeIdFormat::VectorOf3Int32
+        }
+        x if x == DataTypeIdFormat::ArrayOfVectorOf4Single as i32 => {
+            DataTypeIdFormat::VectorOf4Single
+        }
+        x if x == DataTypeIdFormat::ArrayOfVectorOf8Single as i32 => {
+            DataTypeIdFormat::VectorOf8Single
+        }
+        x if x == DataTypeIdFormat::ArrayOfInt32 as i32 => DataTypeIdFormat::Int32,
+        x if x == DataTypeIdFormat::ArrayOfUInt32 as i32 => DataTypeIdFormat::UInt32,
+        x if x == DataTypeIdFormat::ArrayOfInt16 as i32 => DataTypeIdFormat::Int16,
+        x if x == DataTypeIdFormat::ArrayOfUInt16 as i32 => DataTypeIdFormat::UInt16,
+        x if x == DataTypeIdFormat::ArrayOfInt64 as i32 => DataTypeIdFormat::Int64,
+        x if x == DataTypeIdFormat::ArrayOfUInt64 as i32 => DataTypeIdFormat::UInt64,
+        x if x == DataTypeIdFormat::ArrayOfByteBool as i32 => DataTypeIdFormat::ByteBool,
+        x if x == DataTypeIdFormat::ArrayOfIdA as i32
+            || x == DataTypeIdFormat::ArrayOfIdC as i32
+            || x == DataTypeIdFormat::ArrayOfIdE as i32 =>
+        {
+            DataTypeIdFormat::Id
+        }
+        _ => return None,
+    };
+
+    Some(element_type as i32)
+}
+
+/// Inverse of the scalar branches of `load_data_block_local`.
+fn encode_value(
+    out: &mut Vec<u8>,
+    segment: &BsiiDataSegment,
+    data_type: i32,
+    value: &str,
+    format_version: u32,
+) -> Result<(), String> {
+    match data_type {
+        x if x == DataTypeIdFormat::UTF8String as i32 => {
+            encode_utils::encode_utf8_string(out, value);
+            Ok(())
+        }
+        x if x == DataTypeIdFormat::EncodedString as i32 => {
+            match encode_utils::u64_string_value(value) {
+                Ok(res) => encode_utils::encode_u64(out, res),
+                Err(e) => return Err(e),
+            }
+            Ok(())
+        }
+        x if x == DataTypeIdFormat::Single as i32 => match parse_single(value) {
+            Ok(res) => {
+                encode_utils::encode_single(out, res);
+                Ok(())
+            }
+            Err(e) => Err(e),
+        },
+        x if x == DataTypeIdFormat::VectorOf2Single as i32 => encode_single_vector(out, value, 2),
+        x if x == DataTypeIdFormat::VectorOf3Single as i32 => encode_single_vector(out, value, 3),
+        x if x == DataTypeIdFormat::VectorOf4Single as i32 => encode_single_vector(out, value, 4),
+        x if x == DataTypeIdFormat::VectorOf8Single as i32 => {
+            encode_single_vector8(out, value, format_version)
+        }
+        x if x == DataTypeIdFormat::VectorOf3Int32 as i32 => encode_int_vector(out, value, 3),
+        // Decoded as a single vector of two i32, not as an array
+        x if x == DataTypeIdFormat::ArrayOfVectorOf2Int32 as i32 => {
+            encode_int_vector(out, value, 2)
+        }
+        x if x == DataTypeIdFormat::Int32 as i32 => match parse_number::<i32>(value, None) {
+            Ok(res) => {
+                encode_utils::encode_u32(out, res as u32);
+                Ok(())
+            }
+            Err(e) => Err(e),
+        },
+        x if x == DataTypeIdFormat::UInt32 as i32 || x == DataTypeIdFormat::UInt32Type2 as i32 => {
+            match parse_number::<u32>(value, Some(u32::MAX)) {
+                Ok(res) => {
+                    encode_utils::encode_u32(out, res);
+                    Ok(())
+                }
+                Err(e) => Err(e),
+            }
+        }
+        x if x == DataTypeIdFormat::Int16 as i32 => {
+            match parse_number::<i16>(value, Some(i16::MAX)) {
+                Ok(res) => {
+                    encode_utils::encode_u16(out, res as u16);
+                    Ok(())
+                }
+                Err(e) => Err(e),
+            }
+        }
+        x if x == DataTypeIdFormat::UInt16 as i32 => {
+            match parse_number::<u16>(value, Some(u16::MAX)) {
+                Ok(res) => {
+                    encode_utils::encode_u16(out, res);
+                    Ok(())
+                }
+                Err(e) => Err(e),
+            }
+        }
+        x if x == DataTypeIdFormat::Int64 as i32 => match parse_number::<i64>(value, None) {
+            Ok(res) => {
+                encode_utils::encode_u64(out, res as u64);
+                Ok(())
+            }
+            Err(e) => Err(e),
+        },
+        x if x == DataTypeIdFormat::UInt64 as i32 => {
+            match parse_number::<u64>(value, Some(u64::MAX)) {
+                Ok(res) => {
+                    encode_utils::encode_u64(out, res);
+                    Ok(())
+                }
+                Err(e) => Err(e),
+            }
+        }
+        x if x == DataTypeIdFormat::ByteBool as i32 => {
+            encode_utils::encode_u8(out, (value == "true") as u8);
+            Ok(())
+        }
+        x if x == DataTypeIdFormat::OrdinalString as i32 => {
+            encode_ordinal_string(out, segment, value)
+        }
+        x if x == DataTypeIdFormat::Id as i32
+            || x == DataTypeIdFormat::IdType2 as i32
+            || x == DataTypeIdFormat::IdType3 as i32 =>
+        {
+            encode_utils::encode_id(out, value)
+        }
+        _ => Err(format!("Unknown data type: {}", data_type)),
+    }
+}
+
+fn encode_segment(
+    out: &mut Vec<u8>,
+    segment: &BsiiDataSegment,
+    unit: &TextUnit,
+    format_version: u32,
+) -> Result<(), String> {
+    let data_type = segment.segment_type as i32;
+
+    let element_type = match array_element_type(data_type) {
+        Some(res) => res,
+        None => {
+            return match unit.values.get(&*segment.name) {
+                Some(value) => encode_value(out, segment, data_type, value, format_version),
+                None => Err(format!("Missing {} in unit {}", segment.name, unit.id)),
+            };
+        }
+    };
+
+    let elements: &[&str] = match unit.arrays.get(&*segment.name) {
+        Some(res) => res,
+        None => &[],
+    };
+
+    // `name: N` must agree with the indexed lines that follow it
+    if let Some(count) = unit.values.get(&*segment.name) {
+        if count.parse::<usize>() != Ok(elements.len()) {
+            return Err(format!(
+                "Wrong item count for {} in unit {}",
+                segment.name, unit.id
+            ));
+        }
+    }
+
+    encode_utils::encode_u32(out, elements.len() as u32);
+    for element in elements {
+        match encode_value(out, segment, element_type, element, format_version) {
+            Ok(_) => (),
+            Err(e) => return Err(e),
+        }
+    }
+
+    Ok(())
+}
+
+fn encode_structure(out: &mut Vec<u8>, structure: &BsiiStructureBlock) {
+    encode_utils::encode_u32(out, 0);
+    encode_utils::encode_u8(out, 1);
+    encode_utils::encode_u32(out, structure.structure_id);
+    encode_utils::encode_utf8_string(out, &structure.name);
+
+    // The definition ends with its type 0 segment, written without a name
+    for segment in &structure.segments {
+        encode_utils::encode_u32(out, segment.segment_type);
+        if segment.segment_type == 0 {
+            continue;
+        }
+
+        encode_utils::encode_utf8_string(out, &segment.name);
+
+        if let Some(values) = &segment.ordinal_string_hash {
+            let mut ordinals: Vec<(&u32, &Arc<str>)> = values.iter().collect();
+            ordinals.sort_by_key(|(ordinal, _)| **ordinal);
+
+            encode_utils::encode_u32(out, ordinals.len() as u32);
+            for (ordinal, value) in ordinals {
+                encode_utils::encode_u32(out, *ordinal);
+                encode_utils::encode_utf8_string(out, value);
+            }
+        }
+    }
+}
+
+/// Encodes SiiNunit text to BSII binary. Text carries no value types, so
+/// the structure definitions are taken from `template`, the decompressed
+/// BSII data of the save the text was decoded from.
+pub fn encode(text: &str, template: &[u8]) -> Result<Vec<u8>, String> {
+    let mut ordinal_lists: HashMap<u32, Arc<OrdinalTable>> = HashMap::new();
+    let mut stream_pos: usize = 0;
+    let mut file_data = BSIIData::new();
+
+    match read_structures(
+        template,
+        &mut stream_pos,
+        &mut ordinal_lists,
+        &mut file_data,
+    ) {
+        Ok(_) => (),
+        Err(e) => return Err(e),
+    };
+
+    let units = match parse_units(text) {
+        Ok(res) => res,
+        Err(e) => return Err(e),
+    };
+
+    let structures: HashMap<&str, &BsiiStructureBlock> = file_data
+        .blocks
+        .iter()
+        .filter(|block| block.validity)
+        .map(|block| (&*block.name, block))
+        .collect();
+
+    let format_version = file_data.header.version;
+    let mut out: Vec<u8> = Vec::with_capacity(text.len() / 2);
+
+    encode_utils::encode_u32(&mut out, SignatureType::Binary as u32);
+    encode_utils::encode_u32(&mut out, format_version);
+
+    for structure in file_data.blocks.iter().filter(|block| block.validity) {
+        encode_structure(&mut out, structure);
+    }
+
+    for unit in &units {
+        let structure = match structures.get(unit.name) {
+            Some(res) => res,
+            None => return Err(format!("Unknown unit type: {}", unit.name)),
+        };
+
+        encode_utils::encode_u32(&mut out, structure.structure_id);
+        match encode_utils::encode_id(&mut out, unit.id) {
+            Ok(_) => (),
+            Err(e) => return Err(e),
+        }
+
+        for segment in structure.segments.iter().filter(|s| s.segment_type != 0) {
+            match encode_segment(&mut out, segment, unit, format_version) {
+                Ok(_) => (),
+                Err(e) => return Err(e),
+            }
+        }
+    }
+
+    // End of data marker: an invalid structure block
+    encode_utils::encode_u32(&mut out, 0);
+    encode_utils::encode_u8(&mut out, 0);
+
+    Ok(out)
+}
+
+#[cfg(test)]
+#[path = "../../benches/common/mod.rs"]
+mod bench_common;
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::decoder::bsii_decoder::decode;
+    use crate::utils::encode_utils::{encode_single, encode_u8, encode_u32, encode_u64};
+
+    fn text(data: &[u8]) -> String {
+        String::from_utf8(decode(data, None).unwrap()).unwrap()
+    }
+
+    /// A `thing { owner: id; placement: vector8; kind: ordinal }` document,
+    /// one unit per `(address, x)`: a nameless id and the vector's x.
+    fn sample_things(units: &[(u64, f32)]) -> Vec<u8> {
+        let mut out = Vec::new();
+        encode_u32(&mut out, SignatureType::Binary as u32);
+        encode_u32(&mut out, 2);
+
+        encode_u32(&mut out, 0);
+        encode_u8(&mut out, 1);
+        encode_u32(&mut out, 1);
+        encode_utils::encode_utf8_string(&mut out, "thing");
+        encode_u32(&mut out, DataTypeIdFormat::Id as u32);
+        encode_utils::encode_utf8_string(&mut out, "owner");
+        encode_u32(&mut out, DataTypeIdFormat::VectorOf8Single as u32);
+        encode_utils::encode_utf8_string(&mut out, "placement");
+        encode_u32(&mut out, DataTypeIdFormat::OrdinalString as u32);
+        encode_utils::encode_utf8_string(&mut out, "kind");
+        encode_u32(&mut out, 1);
+        encode_u32(&mut out, 0);
+        encode_utils::encode_utf8_string(&mut out, "alpha");
+        encode_u32(&mut out, 0);
+
+        for (i, (address, x)) in units.iter().enumerate() {
+            encode_u32(&mut out, 1);
+            encode_u8(&mut out, 0xFF);
+            encode_u64(&mut out, *address);
+            // owner: a one-part id whose token is empty
+            encode_u8(&mut out, 1);
+            encode_u64(&mut out, 0);
+            for value in [*x, 2.0, 3.5, 2048.0 + 2048.0 * 4096.0, 1.0, 0.0, 0.0, 0.0] {
+                encode_single(&mut out, value);
+            }
+            // index 1 is not in the ordinal table
+            encode_u32(&mut out, (i % 2) as u32);
+        }
+
+        encode_u32(&mut out, 0);
+        encode_u8(&mut out, 0);
+        out
+    }
+
+    #[test]
+    fn sample_bsii_round_trips() {
+        let data = bench_common::sample_bsii(3, 50);
+        let decoded = text(&data);
+        let encoded = encode(&decoded, &data).unwrap();
+
+        assert_eq!(text(&encoded), decoded);
+    }
+
+    #[test]
+    fn nameless_ids_keep_every_group() {
+        let data = sample_things(&[
+            (0x1234_5678, 0.0),
+            (0x0001_0000_1234_5678, 0.0),
+            (0x0001_0002_0000_0000, 0.0),
+            (0x0001_0000_0000_0000, 0.0),
+            (0xFFFF_FFFF_FFFF_FFFF, 0.0),
+        ]);
+        let decoded = text(&data);
+
+        assert!(decoded.contains("thing : _nameless.1.0.1234.5678 {"));
+        assert!(decoded.contains("thing : _nameless.1.0.0000.0000 {"));
+        assert_eq!(encode(&decoded, &data).unwrap(), data);
+    }
+
+    #[test]
+    fn vector8_and_ordinals_round_trip() {
+        let data = sample_things(&[
+            (1, -0.1),
+            (2, -511.75),
+            (3, 1000.25),
+            (4, -1e-30),
+            (5, 3e9),
+            (6, -3e9),
+        ]);
+        let decoded = text(&data);
+        let encoded = encode(&decoded, &data).unwrap();
+
+        assert!(decoded.contains("kind: 1\n"));
+        assert_eq!(text(&encoded), decoded);
+    }
+}
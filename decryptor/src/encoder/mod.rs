@@ -0,0 +1,2 @@
+pub mod bsii_encoder;
+mod sii_text;
@@ -0,0 +1,114 @@
+use std::collections::HashMap;
+
+/// One unit of a SiiNunit document, with its attribute values still in
+/// text form (quotes removed).
+pub struct TextUnit<'a> {
+    pub name: &'a str,
+    pub id: &'a str,
+    pub values: HashMap<&'a str, &'a str>,
+    pub arrays: HashMap<&'a str, Vec<&'a str>>,
+}
+
+fn unquote(value: &str) -> &str {
+    if value.len() >= 2 && value.starts_with('"') && value.ends_with('"') {
+        &value[1..value.len() - 1]
+    } else {
+        value
+    }
+}
+
+/// Splits `name[index]` into `name` and the index; `name[]` appends.
+fn array_key(key: &str) -> Option<(&str, Option<usize>)> {
+    let open = match key.find('[') {
+        Some(res) => res,
+        None => return None,
+    };
+
+    if !key.ends_with(']') {
+        return None;
+    }
+
+    let index = &key[open + 1..key.len() - 1];
+    if index.is_empty() {
+        return Some((&key[..open], None));
+    }
+
+    match index.parse::<usize>() {
+        Ok(res) => Some((&key[..open], Some(res))),
+        Err(_) => None,
+    }
+}
+
+/// Parses the units of a SiiNunit document, as produced by the serializer.
+pub fn parse_units(text: &str) -> Result<Vec<TextUnit<'_>>, String> {
+    let mut units: Vec<TextUnit> = Vec::new();
+    let mut current: Option<TextUnit> = None;
+
+    for (line_number, raw_line) in text.lines().enumerate() {
+        let line = raw_line.trim();
+
+        if line.is_empty() || line.starts_with('#') || line.starts_with("//") {
+            continue;
+        }
+
+        let unit = match current.as_mut() {
+            Some(res) => res,
+            None => {
+                if line == "SiiNunit" || line == "{" || line == "}" {
+                    continue;
+                }
+
+                // Unit header: `name : id {`
+                let header = match line.strip_suffix('{') {
+                    Some(res) => res,
+                    None => return Err(format!("Unexpected line {}", line_number + 1)),
+                };
+
+                let (name, id) = match header.split_once(':') {
+                    Some(res) => res,
+                    None => return Err(format!("Invalid unit header line {}", line_number + 1)),
+                };
+
+                current = Some(TextUnit {
+                    name: name.trim(),
+                    id: id.trim(),
+                    values: HashMap::new(),
+                    arrays: HashMap::new(),
+                });
+                continue;
+            }
+        };
+
+        if line == "}" {
+            units.extend(current.take());
+            continue;
+        }
+
+        let (key, value) = match line.split_once(':') {
+            Some((key, value)) => (key.trim(), unquote(value.trim())),
+            None => return Err(format!("Invalid attribute line {}", line_number + 1)),
+        };
+
+        match array_key(key) {
+            Some((name, index)) => {
+                let values = unit.arrays.entry(name).or_default();
+
+                match index {
+                    Some(index) if index != values.len() => {
+                        return Err(format!("Unordered array index line {}", line_number + 1));
+                    }
+                    _ => values.push(value),
+                }
+            }
+            None => {
+                unit.values.insert(key, value);
+            }
+        }
+    }
+
+    if current.is_some() {
+        return Err("Unterminated unit".to_string());
+    }
+
+    Ok(units)
+}
@@ -1,74 +1,962 @@
 mod decoder;
+mod encoder;
 mod strucs;
 mod utils;
 
-use decoder::bsii_decoder::decode;
+use decoder::active_mods;
+use decoder::bsii_decoder::{decode, decode_to, decode_units};
+use encoder::bsii_encoder::encode;
+use rayon::prelude::*;
+use std::borrow::Cow;
+use std::collections::HashSet;
+use std::io::Write;
+use std::path::{Path, PathBuf};
 use strucs::data_sii::SignatureType;
-use utils::aes::decrypt;
+use utils::aes::{decrypt, decrypt_reader};
+use utils::chunks::spawn_chunks;
 use utils::file_type::try_read_u32;
-use utils::zlib::uncompress;
+use utils::mmap::map_file;
+use utils::zlib::uncompress_from;
 
-// ==========================
-// Core Rust API (UNCHANGED)
-// ==========================
-pub fn decrypt_bin_file(file_bin: &Vec<u8>) -> Result<Vec<u8>, String> {
+pub use decoder::bsii_index::{BsiiIndex, BsiiIndexEntry};
+pub use strucs::data_sii::{SiiUnit, SiiValue};
+pub use utils::chunks::Chunks;
+
+// =============
+// Core Rust API
+// =============
+pub fn decrypt_bin_file(file_bin: &[u8]) -> Result<Vec<u8>, String> {
+    decrypt_with_units(file_bin, None)
+}
+
+/// Like `decrypt_bin_file`, but only decodes units whose structure name
+/// (e.g. `user_profile`) is in `units`. Plain text saves are returned whole.
+pub fn decrypt_bin_file_units(file_bin: &[u8], units: &HashSet<String>) -> Result<Vec<u8>, String> {
+    decrypt_with_units(file_bin, Some(units))
+}
+
+/// Decrypts and decompresses `file_bin` when needed. The result is either
+/// SiiNunit text or BSII binary data; unencrypted input is borrowed as is.
+fn unpack_bin_file(file_bin: &[u8]) -> Result<Cow<'_, [u8]>, String> {
     let file_type = match try_read_u32(file_bin) {
         Ok(res) => res,
         Err(e) => return Err(e),
     };
 
-    if file_type == SignatureType::PlainText as u32 {
-        return Ok(file_bin.clone());
+    if file_type == SignatureType::PlainText as u32 || file_type == SignatureType::Binary as u32 {
+        return Ok(Cow::Borrowed(file_bin));
     }
 
-    if file_type == SignatureType::Encrypted as u32 {
-        let mut data = match decrypt(file_bin) {
-            Ok(res) => res,
-            Err(_) => return Err("Error decrypting data".to_string()),
-        };
+    if file_type != SignatureType::Encrypted as u32 {
+        return Err("Invalid file type".to_string());
+    }
 
-        match uncompress(&data.data) {
-            Ok(res) => data.data = res,
-            Err(e) => return Err(e),
-        };
+    // The payload is decrypted a window at a time straight into the
+    // decoder, so only the inflated output is held in full
+    let (header, reader) = match decrypt_reader(file_bin) {
+        Ok(res) => res,
+        Err(_) => return Err("Error decrypting data".to_string()),
+    };
+
+    match uncompress_from(reader, file_bin.len(), header.data_size as usize) {
+        Ok(res) => Ok(Cow::Owned(res)),
+        Err(e) => Err(e),
+    }
+}
+
+/// Decrypts an encrypted (ScsC) save to its zlib payload, without
+/// inflating it.
+pub fn decrypt_scsc(file_bin: &[u8]) -> Result<Vec<u8>, String> {
+    match try_read_u32(file_bin) {
+        Ok(file_type) if file_type == SignatureType::Encrypted as u32 => (),
+        Ok(_) => return Err("Invalid file type".to_string()),
+        Err(e) => return Err(e),
+    }
+
+    match decrypt(file_bin) {
+        Ok(res) => Ok(res.data),
+        Err(e) => Err(e),
+    }
+}
 
-        let file_type_verify = match try_read_u32(&data.data) {
-            Ok(file_type) => file_type,
+fn is_plain_text(data: &[u8]) -> Result<bool, String> {
+    match try_read_u32(data) {
+        Ok(file_type) => Ok(file_type == SignatureType::PlainText as u32),
+        Err(e) => Err(e),
+    }
+}
+
+fn decrypt_with_units(file_bin: &[u8], units: Option<&HashSet<String>>) -> Result<Vec<u8>, String> {
+    let data = match unpack_bin_file(file_bin) {
+        Ok(res) => res,
+        Err(e) => return Err(e),
+    };
+
+    match is_plain_text(&data) {
+        Ok(true) => Ok(data.into_owned()),
+        Ok(false) => decode(&data, units),
+        Err(e) => Err(e),
+    }
+}
+
+/// Decodes a binary save into structured units instead of SiiNunit text.
+/// `units` optionally restricts the result to the given structure names.
+pub fn decrypt_bin_file_to_units(
+    file_bin: &[u8],
+    units: Option<&HashSet<String>>,
+) -> Result<Vec<SiiUnit>, String> {
+    let data = match unpack_bin_file(file_bin) {
+        Ok(res) => res,
+        Err(e) => return Err(e),
+    };
+
+    match is_plain_text(&data) {
+        Ok(true) => Err("Plain text saves cannot be decoded to units".to_string()),
+        Ok(false) => decode_units(&data, units),
+        Err(e) => Err(e),
+    }
+}
+
+/// Decrypts a save straight from a memory mapping of `path`, without
+/// reading the whole file into a buffer first.
+pub fn decrypt_file(path: &Path) -> Result<Vec<u8>, String> {
+    let mapped = match map_file(path) {
+        Ok(res) => res,
+        Err(e) => return Err(e),
+    };
+
+    decrypt_bin_file(&mapped)
+}
+
+/// Memory-mapped counterpart of `decrypt_bin_file_units`.
+pub fn decrypt_file_units(path: &Path, units: &HashSet<String>) -> Result<Vec<u8>, String> {
+    let mapped = match map_file(path) {
+        Ok(res) => res,
+        Err(e) => return Err(e),
+    };
+
+    decrypt_bin_file_units(&mapped, units)
+}
+
+/// Builds a lazy block index over a binary save. Only the decompressed
+/// BSII data is kept; units are decoded when they are looked up.
+pub fn index_bin_file(file_bin: &[u8]) -> Result<BsiiIndex, String> {
+    let data = match unpack_bin_file(file_bin) {
+        Ok(res) => res,
+        Err(e) => return Err(e),
+    };
+
+    match is_plain_text(&data) {
+        Ok(true) => Err("Plain text saves cannot be indexed".to_string()),
+        Ok(false) => BsiiIndex::build(data.into_owned()),
+        Err(e) => Err(e),
+    }
+}
+
+/// Memory-mapped counterpart of `index_bin_file`.
+pub fn index_file(path: &Path) -> Result<BsiiIndex, String> {
+    let mapped = match map_file(path) {
+        Ok(res) => res,
+        Err(e) => return Err(e),
+    };
+
+    index_bin_file(&mapped)
+}
+
+/// Memory-mapped counterpart of `decrypt_bin_file_to_units`.
+pub fn decrypt_file_to_units(
+    path: &Path,
+    units: Option<&HashSet<String>>,
+) -> Result<Vec<SiiUnit>, String> {
+    let mapped = match map_file(path) {
+        Ok(res) => res,
+        Err(e) => return Err(e),
+    };
+
+    decrypt_bin_file_to_units(&mapped, units)
+}
+
+/// Decrypts every file in `paths` in parallel. Each file gets its own
+/// result, so one broken save does not abort the rest of the batch.
+pub fn decrypt_many(paths: &[PathBuf]) -> Vec<Result<Vec<u8>, String>> {
+    paths.par_iter().map(|path| decrypt_file(path)).collect()
+}
+
+/// Streaming counterpart of `decrypt_bin_file`: the text is written to
+/// `out` block by block instead of being returned as one buffer.
+pub fn decrypt_bin_file_to_writer<W: Write + ?Sized>(
+    file_bin: &[u8],
+    units: Option<&HashSet<String>>,
+    out: &mut W,
+) -> Result<(), String> {
+    let data = match unpack_bin_file(file_bin) {
+        Ok(res) => res,
+        Err(e) => return Err(e),
+    };
+
+    match is_plain_text(&data) {
+        Ok(true) => match out.write_all(&data).and_then(|_| out.flush()) {
+            Ok(_) => Ok(()),
+            Err(e) => Err(format!("Error writing output: {}", e)),
+        },
+        Ok(false) => decode_to(&data, units, out),
+        Err(e) => Err(e),
+    }
+}
+
+/// Memory-mapped counterpart of `decrypt_bin_file_to_writer`.
+pub fn decrypt_file_to_writer<W: Write + ?Sized>(
+    path: &Path,
+    units: Option<&HashSet<String>>,
+    out: &mut W,
+) -> Result<(), String> {
+    let mapped = match map_file(path) {
+        Ok(res) => res,
+        Err(e) => return Err(e),
+    };
+
+    decrypt_bin_file_to_writer(&mapped, units, out)
+}
+
+/// Decrypts `path` on a background thread and yields the text in chunks
+/// of about 1 MiB as it is produced.
+pub fn decrypt_file_chunks(path: PathBuf, units: Option<HashSet<String>>) -> Chunks {
+    spawn_chunks(move |out| decrypt_file_to_writer(&path, units.as_ref(), out))
+}
+
+/// Encodes SiiNunit text back into a save. Text has no type information,
+/// so binary output needs `template`: the save the text was decoded from,
+/// in any format, whose structure definitions are reused. Without a
+/// template, or with a plain text one, the text itself is written.
+///
+/// The result is unencrypted BSII data or text, which the game loads as
+/// is. Encrypted (ScsC) output is not offered: its HMAC is not computed.
+pub fn encode_sii(text: &[u8], template: Option<&[u8]>) -> Result<Vec<u8>, String> {
+    let template_data = match template {
+        Some(template) => match unpack_bin_file(template) {
+            Ok(res) => Some(res),
             Err(e) => return Err(e),
-        };
+        },
+        None => None,
+    };
+
+    match template_data {
+        Some(data) if !is_plain_text(&data)? => {
+            let text = match std::str::from_utf8(text) {
+                Ok(res) => res,
+                Err(_) => return Err("Text is not valid UTF-8".to_string()),
+            };
+
+            encode(text, &data)
+        }
+        _ => Ok(text.to_vec()),
+    }
+}
 
-        if file_type_verify == SignatureType::PlainText as u32 {
-            return Ok(data.data);
+/// Encodes `text` with `encode_sii` and writes it to `path`. `template`
+/// may be `path` itself: it is fully read before the output is written.
+pub fn encode_file(path: &Path, text: &[u8], template: Option<&Path>) -> Result<(), String> {
+    let encoded = match template {
+        Some(template) => {
+            let mapped = match map_file(template) {
+                Ok(res) => res,
+                Err(e) => return Err(e),
+            };
+
+            encode_sii(text, Some(&mapped))
         }
+        None => encode_sii(text, None),
+    };
 
-        decode(&data.data)
-    } else if file_type == SignatureType::Binary as u32 {
-        decode(file_bin)
-    } else {
-        Err("Invalid file type".to_string())
+    let encoded = match encoded {
+        Ok(res) => res,
+        Err(e) => return Err(e),
+    };
+
+    match std::fs::write(path, encoded) {
+        Ok(_) => Ok(()),
+        Err(e) => Err(format!("Error writing file: {}", e)),
     }
 }
 
+/// Reads `user_profile.active_mods` from a save in any format. Only the
+/// blocks before the profile are stepped over; nothing is decoded to text.
+pub fn get_active_mods(file_bin: &[u8]) -> Result<Vec<String>, String> {
+    match unpack_bin_file(file_bin) {
+        Ok(data) => active_mods::get_active_mods(&data),
+        Err(e) => Err(e),
+    }
+}
+
+/// Returns the save with `user_profile.active_mods` replaced by `mods`.
+/// Everything but that array is kept byte for byte. Text and BSII saves
+/// keep their format; an encrypted save comes back as its decrypted
+/// payload (BSII or text), which the game loads as is. It is not
+/// re-encrypted, like `encode_sii` output.
+pub fn set_active_mods(file_bin: &[u8], mods: &[String]) -> Result<Vec<u8>, String> {
+    match unpack_bin_file(file_bin) {
+        Ok(data) => active_mods::set_active_mods(&data, mods),
+        Err(e) => Err(e),
+    }
+}
+
+/// Memory-mapped counterpart of `get_active_mods`.
+pub fn get_active_mods_file(path: &Path) -> Result<Vec<String>, String> {
+    let mapped = match map_file(path) {
+        Ok(res) => res,
+        Err(e) => return Err(e),
+    };
+
+    get_active_mods(&mapped)
+}
+
+/// Memory-mapped counterpart of `set_active_mods`. The file itself is
+/// left untouched; the updated save is returned.
+pub fn set_active_mods_file(path: &Path, mods: &[String]) -> Result<Vec<u8>, String> {
+    let mapped = match map_file(path) {
+        Ok(res) => res,
+        Err(e) => return Err(e),
+    };
+
+    set_active_mods(&mapped, mods)
+}
+
 // =====================================================
 // PyO3 bindings (ONLY compiled with feature = "python")
 // =====================================================
 #[cfg(feature = "python")]
+use pyo3::buffer::PyBuffer;
+#[cfg(feature = "python")]
 use pyo3::prelude::*;
 #[cfg(feature = "python")]
-use pyo3::types::PyBytes;
+use pyo3::types::{PyBytes, PyList, PyTuple};
+
+#[cfg(feature = "python")]
+impl ToPyObject for SiiValue {
+    fn to_object(&self, py: Python<'_>) -> PyObject {
+        match self {
+            SiiValue::Nil => py.None(),
+            SiiValue::Bool(value) => value.to_object(py),
+            SiiValue::Int(value) => value.to_object(py),
+            SiiValue::UInt(value) => value.to_object(py),
+            SiiValue::Float(value) => value.to_object(py),
+            SiiValue::String(value) | SiiValue::Id(value) => value.to_object(py),
+            SiiValue::Vector(values) => PyTuple::new(py, values).to_object(py),
+            SiiValue::IntVector(values) => PyTuple::new(py, values).to_object(py),
+            SiiValue::Array(values) => PyList::new(py, values).to_object(py),
+        }
+    }
+}
+
+/// Read-only view of a decoded unit. Attributes keep their file order.
+#[cfg(feature = "python")]
+#[pyclass(name = "SiiUnit", module = "decrypt_truck")]
+struct PySiiUnit {
+    unit: SiiUnit,
+}
+
+#[cfg(feature = "python")]
+#[pymethods]
+impl PySiiUnit {
+    #[getter]
+    fn name(&self) -> &str {
+        &self.unit.name
+    }
+
+    #[getter]
+    fn id(&self) -> &str {
+        &self.unit.id
+    }
+
+    /// List of `(name, value)` tuples.
+    #[getter]
+    fn attributes(&self, py: Python<'_>) -> Vec<(String, PyObject)> {
+        self.unit
+            .attributes
+            .iter()
+            .map(|(name, value)| (name.clone(), value.to_object(py)))
+            .collect()
+    }
+
+    #[pyo3(signature = (name, default=None))]
+    fn get(&self, py: Python<'_>, name: &str, default: Option<PyObject>) -> PyObject {
+        match self.unit.get(name) {
+            Some(value) => value.to_object(py),
+            None => default.unwrap_or_else(|| py.None()),
+        }
+    }
+
+    fn __getitem__(&self, py: Python<'_>, name: &str) -> PyResult<PyObject> {
+        match self.unit.get(name) {
+            Some(value) => Ok(value.to_object(py)),
+            None => Err(pyo3::exceptions::PyKeyError::new_err(name.to_string())),
+        }
+    }
+
+    fn __contains__(&self, name: &str) -> bool {
+        self.unit.get(name).is_some()
+    }
+
+    fn __repr__(&self) -> String {
+        format!("<SiiUnit {} : {}>", self.unit.name, self.unit.id)
+    }
+}
+
+/// Lazy index over a binary save: `idx["user_profile"]`, `idx[unit_id]`,
+/// `idx.units_of("mod")`. Units are decoded on access.
+#[cfg(feature = "python")]
+#[pyclass(name = "BsiiIndex", module = "decrypt_truck")]
+struct PyBsiiIndex {
+    index: BsiiIndex,
+}
+
+#[cfg(feature = "python")]
+impl PyBsiiIndex {
+    fn unit(&self, py: Python<'_>, position: usize) -> PyResult<Py<PySiiUnit>> {
+        let unit = py
+            .allow_threads(|| self.index.unit_at(position))
+            .map_err(|e| pyo3::exceptions::PyValueError::new_err(e))?;
+
+        Py::new(py, PySiiUnit { unit })
+    }
+
+    /// Unit id first, then the first unit of a structure name.
+    fn lookup(&self, key: &str) -> Option<usize> {
+        match self.index.find(key) {
+            Some(position) => Some(position),
+            None => self.index.positions_of(key).first().copied(),
+        }
+    }
+}
+
+#[cfg(feature = "python")]
+#[pymethods]
+impl PyBsiiIndex {
+    #[new]
+    fn new(py: Python<'_>, data: PyBuffer<u8>) -> PyResult<Self> {
+        let bytes = buffer_slice(&data)?;
 
+        let index = py
+            .allow_threads(|| index_bin_file(bytes))
+            .map_err(|e| pyo3::exceptions::PyValueError::new_err(e))?;
+
+        Ok(PyBsiiIndex { index })
+    }
+
+    #[staticmethod]
+    fn from_file(py: Python<'_>, path: PathBuf) -> PyResult<Self> {
+        let index = py
+            .allow_threads(|| index_file(&path))
+            .map_err(|e| pyo3::exceptions::PyValueError::new_err(e))?;
+
+        Ok(PyBsiiIndex { index })
+    }
+
+    fn __len__(&self) -> usize {
+        self.index.entries().len()
+    }
+
+    fn __contains__(&self, key: &str) -> bool {
+        self.lookup(key).is_some()
+    }
+
+    fn __getitem__(&self, py: Python<'_>, key: &str) -> PyResult<Py<PySiiUnit>> {
+        match self.lookup(key) {
+            Some(position) => self.unit(py, position),
+            None => Err(pyo3::exceptions::PyKeyError::new_err(key.to_string())),
+        }
+    }
+
+    /// Unit with the given id, or `None`.
+    fn get(&self, py: Python<'_>, id: &str) -> PyResult<Option<Py<PySiiUnit>>> {
+        match self.index.find(id) {
+            Some(position) => self.unit(py, position).map(Some),
+            None => Ok(None),
+        }
+    }
+
+    /// Every unit of a structure, decoded in parallel.
+    fn units_of(&self, py: Python<'_>, name: &str) -> PyResult<Vec<Py<PySiiUnit>>> {
+        let positions = self.index.positions_of(name);
+
+        let decoded = py
+            .allow_threads(|| self.index.units_at(positions))
+            .map_err(|e| pyo3::exceptions::PyValueError::new_err(e))?;
+
+        units_to_py(py, decoded)
+    }
+
+    /// Ids of every unit of a structure, without decoding them.
+    fn ids_of(&self, name: &str) -> Vec<String> {
+        let entries = self.index.entries();
+
+        self.index
+            .positions_of(name)
+            .iter()
+            .map(|position| entries[*position].id.clone())
+            .collect()
+    }
+
+    #[getter]
+    fn structure_names(&self) -> Vec<String> {
+        self.index
+            .structure_names()
+            .into_iter()
+            .map(|name| name.to_string())
+            .collect()
+    }
+}
+
+#[cfg(feature = "python")]
+fn units_to_py(py: Python<'_>, units: Vec<SiiUnit>) -> PyResult<Vec<Py<PySiiUnit>>> {
+    units
+        .into_iter()
+        .map(|unit| Py::new(py, PySiiUnit { unit }))
+        .collect()
+}
+
+/// Borrows the memory of a contiguous Python buffer as a byte slice.
+#[cfg(feature = "python")]
+fn buffer_slice(data: &PyBuffer<u8>) -> PyResult<&[u8]> {
+    if !data.is_c_contiguous() {
+        return Err(pyo3::exceptions::PyValueError::new_err(
+            "Buffer must be C-contiguous",
+        ));
+    }
+
+    // SAFETY: the caller holds the buffer export for as long as the
+    // slice is used, which keeps the underlying memory alive.
+    Ok(match data.len_bytes() {
+        0 => &[],
+        len => unsafe { std::slice::from_raw_parts(data.buf_ptr() as *const u8, len) },
+    })
+}
+
+#[cfg(feature = "python")]
+fn decrypt_slice(data: &[u8], units: Option<&HashSet<String>>) -> Result<Vec<u8>, String> {
+    match units {
+        Some(units) => decrypt_bin_file_units(data, units),
+        None => decrypt_bin_file(data),
+    }
+}
+
+/// `units` optionally restricts decoding to the given structure names.
 #[cfg(feature = "python")]
 #[pyfunction]
-fn decrypt_sii_bytes(py: Python<'_>, data: &[u8]) -> PyResult<Py<PyBytes>> {
-    let decrypted = decrypt_bin_file(&data.to_vec())
+#[pyo3(signature = (data, units=None))]
+fn decrypt_sii_bytes(
+    py: Python<'_>,
+    data: &[u8],
+    units: Option<HashSet<String>>,
+) -> PyResult<Py<PyBytes>> {
+    // `bytes` objects are immutable, so the borrowed slice stays valid
+    // while the GIL is released.
+    let decrypted = py
+        .allow_threads(|| decrypt_slice(data, units.as_ref()))
         .map_err(|e| pyo3::exceptions::PyValueError::new_err(e))?;
 
     Ok(PyBytes::new(py, &decrypted).into())
 }
 
+/// Same as `decrypt_sii_bytes`, but borrows any contiguous buffer
+/// (bytes, bytearray, memoryview, mmap, ...) without copying it.
+///
+/// The caller must not resize or write to a mutable buffer while the
+/// call is running: the GIL is released during decoding.
+#[cfg(feature = "python")]
+#[pyfunction]
+#[pyo3(signature = (data, units=None))]
+fn decrypt_sii_buffer(
+    py: Python<'_>,
+    data: PyBuffer<u8>,
+    units: Option<HashSet<String>>,
+) -> PyResult<Py<PyBytes>> {
+    let bytes = buffer_slice(&data)?;
+
+    let decrypted = py
+        .allow_threads(|| decrypt_slice(bytes, units.as_ref()))
+        .map_err(|e| pyo3::exceptions::PyValueError::new_err(e))?;
+
+    Ok(PyBytes::new(py, &decrypted).into())
+}
+
+#[cfg(feature = "python")]
+#[pyfunction]
+#[pyo3(signature = (path, units=None))]
+fn decrypt_sii_file(
+    py: Python<'_>,
+    path: PathBuf,
+    units: Option<HashSet<String>>,
+) -> PyResult<Py<PyBytes>> {
+    let decrypted = py
+        .allow_threads(|| match units {
+            Some(units) => decrypt_file_units(&path, &units),
+            None => decrypt_file(&path),
+        })
+        .map_err(|e| pyo3::exceptions::PyValueError::new_err(e))?;
+
+    Ok(PyBytes::new(py, &decrypted).into())
+}
+
+/// Decodes a binary save into a list of `SiiUnit` objects, without going
+/// through SiiNunit text. Plain text saves raise `ValueError`.
+#[cfg(feature = "python")]
+#[pyfunction]
+#[pyo3(signature = (data, units=None))]
+fn decrypt_sii_units(
+    py: Python<'_>,
+    data: PyBuffer<u8>,
+    units: Option<HashSet<String>>,
+) -> PyResult<Vec<Py<PySiiUnit>>> {
+    let bytes = buffer_slice(&data)?;
+
+    let decoded = py
+        .allow_threads(|| decrypt_bin_file_to_units(bytes, units.as_ref()))
+        .map_err(|e| pyo3::exceptions::PyValueError::new_err(e))?;
+
+    units_to_py(py, decoded)
+}
+
+/// Memory-mapped counterpart of `decrypt_sii_units`.
+#[cfg(feature = "python")]
+#[pyfunction]
+#[pyo3(signature = (path, units=None))]
+fn decrypt_sii_file_units(
+    py: Python<'_>,
+    path: PathBuf,
+    units: Option<HashSet<String>>,
+) -> PyResult<Vec<Py<PySiiUnit>>> {
+    let decoded = py
+        .allow_threads(|| decrypt_file_to_units(&path, units.as_ref()))
+        .map_err(|e| pyo3::exceptions::PyValueError::new_err(e))?;
+
+    units_to_py(py, decoded)
+}
+
+/// Returns one item per path: the decrypted bytes, or a `ValueError`
+/// instance describing why that file failed.
+#[cfg(feature = "python")]
+#[pyfunction(name = "decrypt_many")]
+fn decrypt_sii_many(py: Python<'_>, paths: Vec<PathBuf>) -> Vec<PyObject> {
+    let results = py.allow_threads(|| decrypt_many(&paths));
+
+    results
+        .into_iter()
+        .map(|result| match result {
+            Ok(decrypted) => PyBytes::new(py, &decrypted).into_py(py),
+            Err(e) => pyo3::exceptions::PyValueError::new_err(e)
+                .into_value(py)
+                .into_py(py),
+        })
+        .collect()
+}
+
+/// `user_profile.active_mods` of a save held in any buffer; see
+/// `get_active_mods`.
+#[cfg(feature = "python")]
+#[pyfunction(name = "get_active_mods")]
+fn get_active_mods_buffer(py: Python<'_>, data: PyBuffer<u8>) -> PyResult<Vec<String>> {
+    let bytes = buffer_slice(&data)?;
+
+    py.allow_threads(|| get_active_mods(bytes))
+        .map_err(|e| pyo3::exceptions::PyValueError::new_err(e))
+}
+
+/// The save in `data` with its active mods replaced; see `set_active_mods`.
+#[cfg(feature = "python")]
+#[pyfunction(name = "set_active_mods")]
+fn set_active_mods_buffer(
+    py: Python<'_>,
+    data: PyBuffer<u8>,
+    mods: Vec<String>,
+) -> PyResult<Py<PyBytes>> {
+    let bytes = buffer_slice(&data)?;
+
+    let updated = py
+        .allow_threads(|| set_active_mods(bytes, &mods))
+        .map_err(|e| pyo3::exceptions::PyValueError::new_err(e))?;
+
+    Ok(PyBytes::new(py, &updated).into())
+}
+
+/// The active mods of the save at `path`; see `get_active_mods_file`.
+#[cfg(feature = "python")]
+#[pyfunction(name = "get_active_mods_file")]
+fn get_active_mods_path(py: Python<'_>, path: PathBuf) -> PyResult<Vec<String>> {
+    py.allow_threads(|| get_active_mods_file(&path))
+        .map_err(|e| pyo3::exceptions::PyValueError::new_err(e))
+}
+
+/// The save at `path` with its active mods replaced; see
+/// `set_active_mods_file`.
+#[cfg(feature = "python")]
+#[pyfunction(name = "set_active_mods_file")]
+fn set_active_mods_path(py: Python<'_>, path: PathBuf, mods: Vec<String>) -> PyResult<Py<PyBytes>> {
+    let updated = py
+        .allow_threads(|| set_active_mods_file(&path, &mods))
+        .map_err(|e| pyo3::exceptions::PyValueError::new_err(e))?;
+
+    Ok(PyBytes::new(py, &updated).into())
+}
+
+/// Encodes SiiNunit text into a save; see `encode_sii`. `template` is
+/// the original save as any contiguous buffer.
+#[cfg(feature = "python")]
+#[pyfunction]
+#[pyo3(signature = (text, template=None))]
+fn encode_sii_bytes(
+    py: Python<'_>,
+    text: &[u8],
+    template: Option<PyBuffer<u8>>,
+) -> PyResult<Py<PyBytes>> {
+    let template = match &template {
+        Some(buffer) => Some(buffer_slice(buffer)?),
+        None => None,
+    };
+
+    let encoded = py
+        .allow_threads(|| encode_sii(text, template))
+        .map_err(|e| pyo3::exceptions::PyValueError::new_err(e))?;
+
+    Ok(PyBytes::new(py, &encoded).into())
+}
+
+/// Encodes SiiNunit text and writes it to `path`; see `encode_file`.
+#[cfg(feature = "python")]
+#[pyfunction]
+#[pyo3(signature = (path, text, template=None))]
+fn encode_sii_file(
+    py: Python<'_>,
+    path: PathBuf,
+    text: &[u8],
+    template: Option<PathBuf>,
+) -> PyResult<()> {
+    py.allow_threads(|| encode_file(&path, text, template.as_deref()))
+        .map_err(|e| pyo3::exceptions::PyValueError::new_err(e))
+}
+
+/// Adapts a Python binary file object (`write(bytes)` returning the
+/// number of bytes written, as `io` files do) to `Write`. The GIL is taken for each write, so wrap it in a `BufWriter`.
+#[cfg(feature = "python")]
+struct PyFileWriter {
+    file: PyObject,
+}
+
+#[cfg(feature = "python")]
+impl Write for PyFileWriter {
+    fn write(&mut self, buf: &[u8]) -> std::io::Result<usize> {
+        Python::with_gil(|py| {
+            match self
+                .file
+                .call_method1(py, "write", (PyBytes::new(py, buf),))
+            {
+                // Raw files may write less than asked, which write_all
+                // retries. None means a non-blocking raw file wrote
+                // nothing, so it is not taken as a full write
+                Ok(written) if written.is_none(py) => Err(std::io::Error::new(
+                    std::io::ErrorKind::WouldBlock,
+                    "write() returned None: the file is non-blocking",
+                )),
+                Ok(written) => match written.extract::<usize>(py) {
+                    Ok(res) => Ok(res),
+                    Err(_) => Err(std::io::Error::new(
+                        std::io::ErrorKind::Other,
+                        "write() did not return the number of bytes written",
+                    )),
+                },
+                Err(e) => Err(std::io::Error::new(
+                    std::io::ErrorKind::Other,
+                    e.to_string(),
+                )),
+            }
+        })
+    }
+
+    fn flush(&mut self) -> std::io::Result<()> {
+        Python::with_gil(|py| {
+            if !self.file.as_ref(py).hasattr("flush").unwrap_or(false) {
+                return Ok(());
+            }
+
+            match self.file.call_method0(py, "flush") {
+                Ok(_) => Ok(()),
+                Err(e) => Err(std::io::Error::new(
+                    std::io::ErrorKind::Other,
+                    e.to_string(),
+                )),
+            }
+        })
+    }
+}
+
+/// Buffer in front of output files and Python file objects.
+#[cfg(feature = "python")]
+const SINK_BUFFER_SIZE: usize = 1 << 20;
+
+/// Streams the text of `path` into the file `out_path`. Writing over the
+/// input would truncate the mapping being read, so that case is decoded
+/// to memory first.
+#[cfg(feature = "python")]
+fn write_file_streamed(
+    path: &Path,
+    out_path: &Path,
+    units: Option<&HashSet<String>>,
+) -> Result<(), String> {
+    let same_file = match (path.canonicalize(), out_path.canonicalize()) {
+        (Ok(input), Ok(output)) => input == output,
+        _ => false,
+    };
+
+    if same_file {
+        let decrypted = match units {
+            Some(units) => decrypt_file_units(path, units),
+            None => decrypt_file(path),
+        };
+
+        return match decrypted {
+            Ok(res) => match std::fs::write(out_path, res) {
+                Ok(_) => Ok(()),
+                Err(e) => Err(format!("Error writing file: {}", e)),
+            },
+            Err(e) => Err(e),
+        };
+    }
+
+    let file = match std::fs::File::create(out_path) {
+        Ok(res) => res,
+        Err(e) => return Err(format!("Error writing file: {}", e)),
+    };
+
+    let mut out = std::io::BufWriter::with_capacity(SINK_BUFFER_SIZE, file);
+    decrypt_file_to_writer(path, units, &mut out)
+}
+
+/// Writes the decrypted text of `path` to `sink` as it is decoded, without
+/// holding the whole document. `sink` is an output path, an open file
+/// descriptor, or a binary file-like object with `write()`.
+#[cfg(feature = "python")]
+#[pyfunction]
+#[pyo3(signature = (path, sink, units=None))]
+fn decrypt_sii_file_to(
+    py: Python<'_>,
+    path: PathBuf,
+    sink: &PyAny,
+    units: Option<HashSet<String>>,
+) -> PyResult<()> {
+    let result = if let Ok(out_path) = sink.extract::<PathBuf>() {
+        py.allow_threads(|| write_file_streamed(&path, &out_path, units.as_ref()))
+    } else {
+        // Descriptors get a file object that leaves them open
+        let file: PyObject = if sink.is_instance_of::<pyo3::types::PyLong>() {
+            let kwargs = pyo3::types::PyDict::new(py);
+            kwargs.set_item("closefd", false)?;
+            py.import("io")?
+                .call_method("open", (sink, "wb"), Some(kwargs))?
+                .into()
+        } else {
+            sink.into()
+        };
+
+        py.allow_threads(|| {
+            let mut out =
+                std::io::BufWriter::with_capacity(SINK_BUFFER_SIZE, PyFileWriter { file });
+            decrypt_file_to_writer(&path, units.as_ref(), &mut out)
+        })
+    };
+
+    result.map_err(|e| pyo3::exceptions::PyValueError::new_err(e))
+}
+
+/// Iterator over the decrypted text of a file as `bytes` chunks of about
+/// 1 MiB; decoding runs on a background thread a couple of chunks ahead.
+#[cfg(feature = "python")]
+#[pyclass(name = "DecryptChunks", module = "decrypt_truck")]
+struct PyDecryptChunks {
+    // None once exhausted or failed
+    chunks: Option<Chunks>,
+}
+
+#[cfg(feature = "python")]
+#[pymethods]
+impl PyDecryptChunks {
+    fn __iter__(slf: PyRef<'_, Self>) -> PyRef<'_, Self> {
+        slf
+    }
+
+    fn __next__(&mut self, py: Python<'_>) -> PyResult<Option<Py<PyBytes>>> {
+        let chunks = match self.chunks.as_mut() {
+            Some(res) => res,
+            None => return Ok(None),
+        };
+
+        match py.allow_threads(|| chunks.next()) {
+            Some(Ok(chunk)) => Ok(Some(PyBytes::new(py, &chunk).into())),
+            Some(Err(e)) => {
+                self.chunks = None;
+                Err(pyo3::exceptions::PyValueError::new_err(e))
+            }
+            None => {
+                self.chunks = None;
+                Ok(None)
+            }
+        }
+    }
+}
+
+/// Decrypts `path` lazily; see `DecryptChunks`.
+#[cfg(feature = "python")]
+#[pyfunction]
+#[pyo3(signature = (path, units=None))]
+fn iter_decrypt_sii_file(path: PathBuf, units: Option<HashSet<String>>) -> PyDecryptChunks {
+    PyDecryptChunks {
+        chunks: Some(decrypt_file_chunks(path, units)),
+    }
+}
+
 #[cfg(feature = "python")]
 #[pymodule]
 fn decrypt_truck(_py: Python, m: &PyModule) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(decrypt_sii_bytes, m)?)?;
+    m.add_function(wrap_pyfunction!(decrypt_sii_buffer, m)?)?;
+    m.add_function(wrap_pyfunction!(decrypt_sii_file, m)?)?;
+    m.add_function(wrap_pyfunction!(decrypt_sii_many, m)?)?;
+    m.add_function(wrap_pyfunction!(decrypt_sii_units, m)?)?;
+    m.add_function(wrap_pyfunction!(decrypt_sii_file_units, m)?)?;
+    m.add_function(wrap_pyfunction!(decrypt_sii_file_to, m)?)?;
+    m.add_function(wrap_pyfunction!(iter_decrypt_sii_file, m)?)?;
+    m.add_function(wrap_pyfunction!(get_active_mods_buffer, m)?)?;
+    m.add_function(wrap_pyfunction!(set_active_mods_buffer, m)?)?;
+    m.add_function(wrap_pyfunction!(get_active_mods_path, m)?)?;
+    m.add_function(wrap_pyfunction!(set_active_mods_path, m)?)?;
+    m.add_function(wrap_pyfunction!(encode_sii_bytes, m)?)?;
+    m.add_function(wrap_pyfunction!(encode_sii_file, m)?)?;
+    m.add_class::<PySiiUnit>()?;
+    m.add_class::<PyBsiiIndex>()?;
+    m.add_class::<PyDecryptChunks>()?;
     Ok(())
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use decoder::active_mods::tests::sample_profile;
+    use utils::aes::tests::encrypt;
+    use utils::zlib::tests::compress;
+
+    #[test]
+    fn set_active_mods_returns_encrypted_saves_decrypted() {
+        let profile = sample_profile(&["mod_a|Mod A"]);
+        let encrypted = encrypt(&compress(&profile, 6), profile.len() as u32);
+        assert_eq!(
+            try_read_u32(&encrypted).unwrap(),
+            SignatureType::Encrypted as u32
+        );
+
+        let mods = vec!["x|X".to_string(), "y".to_string()];
+        let set = set_active_mods(&encrypted, &mods).unwrap();
+
+        // The patched payload, not a re-encrypted save
+        assert_eq!(set, sample_profile(&["x|X", "y"]));
+        assert_eq!(get_active_mods(&set).unwrap(), mods);
+    }
+}
@@ -1,10 +1,5 @@
-use decrypt_truck::decrypt_bin_file;
-use std::{
-    env,
-    fs::File,
-    io::{Read, Write},
-    time::Instant,
-};
+use decrypt_truck::decrypt_file;
+use std::{env, fs::File, io::Write, path::Path, time::Instant};
 
 pub fn save_to_file(filename: &str, data: Vec<u8>) -> Option<()> {
     let mut file = match File::create(filename) {
@@ -18,19 +13,6 @@ pub fn save_to_file(filename: &str, data: Vec<u8>) -> Option<()> {
     }
 }
 
-pub fn read_file_bin(path: &str) -> Option<Vec<u8>> {
-    let mut file = match File::open(path) {
-        Ok(res) => res,
-        Err(_) => return None,
-    };
-
-    let mut buffer = Vec::new();
-    match file.read_to_end(&mut buffer) {
-        Ok(_) => Some(buffer),
-        Err(_) => None,
-    }
-}
-
 fn main() {
     let start = Instant::now();
     let args: Vec<String> = env::args().collect();
@@ -48,15 +30,7 @@ fn main() {
         }
     };
 
-    let bin_file = match read_file_bin(&args_paths.0) {
-        Some(res) => res,
-        None => {
-            eprintln!("Error reading file");
-            return;
-        }
-    };
-
-    match decrypt_bin_file(&bin_file) {
+    match decrypt_file(Path::new(&args_paths.0)) {
         Ok(res) => {
             save_to_file(&args_paths.1, res);
         }
@@ -1,4 +1,5 @@
 use std::collections::HashMap;
+use std::sync::Arc;
 
 pub enum SignatureType {
     PlainText = 1315531091,
@@ -27,6 +28,8 @@ pub struct BSIIData {
     pub header: BSIIHeader,
     pub blocks: Vec<BsiiStructureBlock>,
     pub decoded_blocks: Vec<BsiiStructureDecodedBlock>,
+    // Position in `blocks` of the first block with each structure id
+    structure_index: HashMap<u32, usize>,
 }
 
 #[derive(Clone)]
@@ -42,11 +45,10 @@ pub struct BSIIHeader {
 }
 
 pub struct BsiiStructureDecodedBlock {
-    pub order_pos: u32,
     //pub block_type: u32,
     pub structure_id: u32,
     //pub validity: bool,
-    pub name: String,
+    pub name: Arc<str>,
     pub segments: Vec<BsiiDataSegment>,
     pub id: IDComplexType,
 }
@@ -56,17 +58,96 @@ pub struct BsiiStructureBlock {
     pub block_type: u32,
     pub structure_id: u32,
     pub validity: bool,
-    pub name: String,
+    // Names are shared with the blocks decoded from this structure
+    pub name: Arc<str>,
     pub segments: Vec<BsiiDataSegment>,
     pub id: IDComplexType,
 }
 
+/// Ordinal values of a type 55 segment, by ordinal.
+pub type OrdinalTable = HashMap<u32, Arc<str>>;
+
 #[derive(Clone)]
 pub struct BsiiDataSegment {
-    pub name: String,
+    pub name: Arc<str>,
     pub segment_type: u32,
-    pub value: Vec<String>,
-    pub ordinal_string_hash: Option<HashMap<u32, String>>,
+    pub value: SegmentValue,
+    // Shared by every block of the structure, so cloning segments is cheap
+    pub ordinal_string_hash: Option<Arc<OrdinalTable>>,
+}
+
+/// A decoded segment value, kept in its binary form. Text formatting is
+/// left to the serializer; `nil` sentinels are kept as their raw values.
+/// Vectors of 8 floats are stored without the bias, as 7 floats.
+#[derive(Clone, Default)]
+pub enum SegmentValue {
+    #[default]
+    None,
+    Bool(bool),
+    Int16(i16),
+    Int32(i32),
+    Int64(i64),
+    UInt16(u16),
+    UInt32(u32),
+    UInt64(u64),
+    Single(f32),
+    Vector2([f32; 2]),
+    Vector3([f32; 3]),
+    Vector4([f32; 4]),
+    Vector7([f32; 7]),
+    IntVector2([i32; 2]),
+    IntVector3([i32; 3]),
+    String(String),
+    // The stored index, and its string; `None` if the table lacks it
+    Ordinal(u32, Option<Arc<str>>),
+    Id(String),
+    Bools(Vec<bool>),
+    Int16s(Vec<i16>),
+    Int32s(Vec<i32>),
+    Int64s(Vec<i64>),
+    UInt16s(Vec<u16>),
+    UInt32s(Vec<u32>),
+    UInt64s(Vec<u64>),
+    Singles(Vec<f32>),
+    Vector2s(Vec<[f32; 2]>),
+    Vector3s(Vec<[f32; 3]>),
+    Vector4s(Vec<[f32; 4]>),
+    Vector7s(Vec<[f32; 7]>),
+    IntVector3s(Vec<[i32; 3]>),
+    Strings(Vec<String>),
+    Ids(Vec<String>),
+}
+
+/// A decoded value with its SII type mapped to a small set of variants.
+#[derive(Clone, Debug, PartialEq)]
+pub enum SiiValue {
+    Nil,
+    Bool(bool),
+    Int(i64),
+    UInt(u64),
+    Float(f32),
+    String(String),
+    Id(String),
+    Vector(Vec<f32>),
+    IntVector(Vec<i32>),
+    Array(Vec<SiiValue>),
+}
+
+/// A decoded unit, e.g. `user_profile : _nameless.1234 { ... }`.
+#[derive(Clone, Debug)]
+pub struct SiiUnit {
+    pub name: String,
+    pub id: String,
+    pub attributes: Vec<(String, SiiValue)>,
+}
+
+impl SiiUnit {
+    pub fn get(&self, name: &str) -> Option<&SiiValue> {
+        self.attributes
+            .iter()
+            .find(|(attribute, _)| attribute == name)
+            .map(|(_, value)| value)
+    }
 }
 
 impl BSIIData {
@@ -75,8 +156,28 @@ impl BSIIData {
             header: BSIIHeader::new(),
             blocks: Vec::new(),
             decoded_blocks: Vec::new(),
+            structure_index: HashMap::new(),
         }
     }
+
+    /// Appends a structure definition. Lookups by id keep resolving to the
+    /// first block added with that id.
+    pub fn push_block(&mut self, block: BsiiStructureBlock) {
+        self.structure_index
+            .entry(block.structure_id)
+            .or_insert(self.blocks.len());
+        self.blocks.push(block);
+    }
+
+    pub fn has_structure(&self, structure_id: u32) -> bool {
+        self.structure_index.contains_key(&structure_id)
+    }
+
+    pub fn structure(&self, structure_id: u32) -> Option<&BsiiStructureBlock> {
+        self.structure_index
+            .get(&structure_id)
+            .map(|position| &self.blocks[*position])
+    }
 }
 
 impl BSIIHeader {
@@ -94,7 +195,7 @@ impl BsiiStructureBlock {
             block_type: 0,
             structure_id: 0,
             validity: false,
-            name: String::new(),
+            name: Arc::from(""),
             segments: Vec::new(),
             id: IDComplexType::new(),
         }
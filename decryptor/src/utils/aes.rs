@@ -1,17 +1,26 @@
 use crate::strucs::data_sii::{SIIData, SIIHeader};
 use aes::Aes256;
-use cipher::block_padding::Pkcs7;
+use cipher::block_padding::{NoPadding, Pkcs7};
 use cipher::{BlockDecryptMut, KeyIvInit};
+use rayon::prelude::*;
 use std::convert::TryInto;
+use std::io::{self, Read};
 
 type Aes256CbcDec = cbc::Decryptor<Aes256>;
 
+const BLOCK_SIZE: usize = 16;
+// Ciphertext decrypted by one rayon task; a multiple of BLOCK_SIZE
+const DECRYPT_CHUNK_SIZE: usize = 1 << 20;
+// Plaintext held by `DecryptReader`; its chunks are decrypted in parallel
+const READ_WINDOW_SIZE: usize = 8 * DECRYPT_CHUNK_SIZE;
+
 pub const SII_KEY: [u8; 32] = [
     0x2a, 0x5f, 0xcb, 0x17, 0x91, 0xd2, 0x2f, 0xb6, 0x02, 0x45, 0xb3, 0xd8, 0x36, 0x9e, 0xd0, 0xb2,
     0xc2, 0x73, 0x71, 0x56, 0x3f, 0xbf, 0x1f, 0x3c, 0x9e, 0xdf, 0x6b, 0x11, 0x82, 0x5a, 0x5d, 0x0a,
 ];
 
-pub fn decrypt(encrypted: &[u8]) -> Result<SIIData, String> {
+/// Reads the ScsC header. Returns it with the IV and the ciphertext.
+fn read_header(encrypted: &[u8]) -> Result<(SIIHeader, Vec<u8>, &[u8]), String> {
     let mut header = SIIHeader::new();
 
     // let mut hmac: Vec<u8> = Vec::new();
@@ -51,22 +60,344 @@ pub fn decrypt(encrypted: &[u8]) -> Result<SIIData, String> {
         stream_pos += std::mem::size_of::<u32>();
     }
 
-    let final_encrypted = encrypted[stream_pos..].to_vec();
-
     // Datos cifrados
-    let cipher = match Aes256CbcDec::new_from_slices(&SII_KEY, &iv) {
+    let final_encrypted = &encrypted[stream_pos..];
+
+    if iv.len() != BLOCK_SIZE {
+        return Err("Invalid key or iv".to_string());
+    }
+    if final_encrypted.is_empty() || final_encrypted.len() % BLOCK_SIZE != 0 {
+        return Err("Error decrypting data".to_string());
+    }
+
+    Ok((header, iv, final_encrypted))
+}
+
+pub fn decrypt(encrypted: &[u8]) -> Result<SIIData, String> {
+    let (_, iv, final_encrypted) = match read_header(encrypted) {
         Ok(res) => res,
-        Err(_) => return Err("Invalid key or iv".to_string()),
+        Err(e) => return Err(e),
     };
 
-    let mut final_encrypted_mut = final_encrypted;
+    let mut data = vec![0u8; final_encrypted.len()];
+    let size = match decrypt_cbc(final_encrypted, &iv, &mut data, true) {
+        Ok(res) => res,
+        Err(e) => return Err(e),
+    };
+    data.truncate(size);
+
+    Ok(SIIData { data })
+}
+
+/// Reads the plaintext of an encrypted payload, decrypting
+/// `READ_WINDOW_SIZE` bytes of it at a time.
+pub struct DecryptReader<'a> {
+    ciphertext: &'a [u8],
+    iv: Vec<u8>,
+    // Ciphertext decrypted so far
+    position: usize,
+    // Ciphertext decrypted per window; a multiple of BLOCK_SIZE
+    window_size: usize,
+    window: Vec<u8>,
+    window_pos: usize,
+}
+
+impl DecryptReader<'_> {
+    fn fill_window(&mut self) -> Result<(), String> {
+        let end = (self.position + self.window_size).min(self.ciphertext.len());
+        let iv = if self.position == 0 {
+            &self.iv[..]
+        } else {
+            &self.ciphertext[self.position - BLOCK_SIZE..self.position]
+        };
+
+        self.window.resize(end - self.position, 0);
+        let size = match decrypt_cbc(
+            &self.ciphertext[self.position..end],
+            iv,
+            &mut self.window,
+            end == self.ciphertext.len(),
+        ) {
+            Ok(res) => res,
+            Err(e) => return Err(e),
+        };
 
-    let decrypted_data = match cipher.decrypt_padded_mut::<Pkcs7>(&mut final_encrypted_mut) {
-        Ok(decrypted_data) => decrypted_data,
-        Err(_) => return Err("Error decrypting data".to_string()),
+        self.window.truncate(size);
+        self.window_pos = 0;
+        self.position = end;
+        Ok(())
+    }
+}
+
+impl Read for DecryptReader<'_> {
+    fn read(&mut self, buf: &mut [u8]) -> io::Result<usize> {
+        // A final window can be empty if it only held padding
+        while self.window_pos == self.window.len() {
+            if self.position == self.ciphertext.len() {
+                return Ok(0);
+            }
+
+            match self.fill_window() {
+                Ok(_) => (),
+                Err(e) => return Err(io::Error::new(io::ErrorKind::InvalidData, e)),
+            }
+        }
+
+        let size = buf.len().min(self.window.len() - self.window_pos);
+        buf[..size].copy_from_slice(&self.window[self.window_pos..self.window_pos + size]);
+        self.window_pos += size;
+        Ok(size)
+    }
+}
+
+/// Streaming counterpart of `decrypt`: returns the header and a reader
+/// over the plaintext, so the whole of it is never held at once.
+pub fn decrypt_reader(encrypted: &[u8]) -> Result<(SIIHeader, DecryptReader<'_>), String> {
+    let (header, iv, final_encrypted) = match read_header(encrypted) {
+        Ok(res) => res,
+        Err(e) => return Err(e),
+    };
+
+    let reader = DecryptReader {
+        ciphertext: final_encrypted,
+        iv,
+        position: 0,
+        window_size: READ_WINDOW_SIZE,
+        window: Vec::with_capacity(READ_WINDOW_SIZE.min(final_encrypted.len())),
+        window_pos: 0,
     };
 
-    Ok(SIIData {
-        data: decrypted_data.to_vec(),
-    })
+    Ok((header, reader))
+}
+
+/// Decrypts `ciphertext` straight into `out`, in chunks of
+/// `DECRYPT_CHUNK_SIZE` decrypted in parallel. A CBC block only depends on
+/// the ciphertext block before it, so each chunk is decrypted on its own
+/// with that block as its IV. When `padded` (the ciphertext ends the
+/// payload), returns the length without the padding.
+fn decrypt_cbc(
+    ciphertext: &[u8],
+    iv: &[u8],
+    out: &mut [u8],
+    padded: bool,
+) -> Result<usize, String> {
+    let last_chunk = (ciphertext.len() - 1) / DECRYPT_CHUNK_SIZE;
+
+    let sizes: Result<Vec<usize>, String> = out
+        .par_chunks_mut(DECRYPT_CHUNK_SIZE)
+        .zip(ciphertext.par_chunks(DECRYPT_CHUNK_SIZE))
+        .enumerate()
+        .map(|(index, (out_chunk, in_chunk))| {
+            let start = index * DECRYPT_CHUNK_SIZE;
+            let chunk_iv = if index == 0 {
+                iv
+            } else {
+                &ciphertext[start - BLOCK_SIZE..start]
+            };
+
+            let cipher = match Aes256CbcDec::new_from_slices(&SII_KEY, chunk_iv) {
+                Ok(res) => res,
+                Err(_) => return Err("Invalid key or iv".to_string()),
+            };
+
+            // Only the last chunk carries the PKCS7 padding
+            let decrypted = if padded && index == last_chunk {
+                cipher.decrypt_padded_b2b_mut::<Pkcs7>(in_chunk, out_chunk)
+            } else {
+                cipher.decrypt_padded_b2b_mut::<NoPadding>(in_chunk, out_chunk)
+            };
+
+            match decrypted {
+                Ok(res) => Ok(start + res.len()),
+                Err(_) => Err("Error decrypting data".to_string()),
+            }
+        })
+        .collect();
+
+    match sizes {
+        Ok(res) => Ok(res[last_chunk]),
+        Err(e) => Err(e),
+    }
+}
+
+#[cfg(test)]
+pub(crate) mod tests {
+    use super::*;
+    use crate::strucs::data_sii::SignatureType;
+    use crate::utils::encode_utils;
+    use cipher::BlockEncryptMut;
+
+    const MB: usize = 1 << 20;
+    const HMAC_SIZE: usize = 32;
+
+    /// An encrypted (ScsC) file around `compressed`, the zlib stream of a
+    /// save whose decompressed size is `data_size`. The HMAC is zeroed:
+    /// the decoder does not read it, and how the game computes it is not
+    /// known, which is why the crate does not write ScsC files itself.
+    pub(crate) fn encrypt(compressed: &[u8], data_size: u32) -> Vec<u8> {
+        let iv: [u8; BLOCK_SIZE] = std::array::from_fn(|i| (i * 7) as u8);
+        let cipher = cbc::Encryptor::<Aes256>::new_from_slices(&SII_KEY, &iv).unwrap();
+
+        // PKCS7 always adds between 1 and BLOCK_SIZE bytes
+        let padded_len = (compressed.len() / BLOCK_SIZE + 1) * BLOCK_SIZE;
+        let header_len = std::mem::size_of::<u32>() * 2 + HMAC_SIZE + iv.len();
+
+        let mut result = Vec::with_capacity(header_len + padded_len);
+        encode_utils::encode_u32(&mut result, SignatureType::Encrypted as u32);
+        result.extend_from_slice(&[0u8; HMAC_SIZE]);
+        result.extend_from_slice(&iv);
+        encode_utils::encode_u32(&mut result, data_size);
+
+        result.extend_from_slice(compressed);
+        result.resize(header_len + padded_len, 0);
+
+        cipher
+            .encrypt_padded_mut::<Pkcs7>(&mut result[header_len..], compressed.len())
+            .unwrap();
+        result
+    }
+
+    fn plaintext(len: usize) -> Vec<u8> {
+        (0..len).map(|i| (i * 31 % 251) as u8).collect()
+    }
+
+    /// Decrypts `encrypted` with `decrypt_cbc` and in one piece with
+    /// `decrypt_padded_mut`, the way it was done before the chunks.
+    fn decrypt_both(encrypted: &[u8], padded: bool) -> (Vec<u8>, Vec<u8>) {
+        let (_, iv, ciphertext) = read_header(encrypted).unwrap();
+
+        let mut chunked = vec![0u8; ciphertext.len()];
+        let size = decrypt_cbc(ciphertext, &iv, &mut chunked, padded).unwrap();
+        chunked.truncate(size);
+
+        let mut whole = ciphertext.to_vec();
+        let cipher = Aes256CbcDec::new_from_slices(&SII_KEY, &iv).unwrap();
+        let size = if padded {
+            cipher
+                .decrypt_padded_mut::<Pkcs7>(&mut whole)
+                .unwrap()
+                .len()
+        } else {
+            cipher
+                .decrypt_padded_mut::<NoPadding>(&mut whole)
+                .unwrap()
+                .len()
+        };
+        whole.truncate(size);
+
+        (chunked, whole)
+    }
+
+    /// Reads `reader` to the end, `read_size` bytes at a time.
+    fn read_all(mut reader: DecryptReader<'_>, read_size: usize) -> Vec<u8> {
+        let mut result = Vec::new();
+        let mut buf = vec![0u8; read_size];
+
+        loop {
+            match reader.read(&mut buf).unwrap() {
+                0 => return result,
+                size => result.extend_from_slice(&buf[..size]),
+            }
+        }
+    }
+
+    #[test]
+    fn decrypt_cbc_matches_a_single_pass() {
+        // Ciphertext of 16 bytes, 1 MiB (one full chunk) and 1 MiB + 16
+        // (a second chunk of one block)
+        for (len, ciphertext_len) in [(5, 16), (MB - 3, MB), (MB + 1, MB + 16)] {
+            let plain = plaintext(len);
+            let encrypted = encrypt(&plain, len as u32);
+            let (chunked, whole) = decrypt_both(&encrypted, true);
+
+            assert_eq!(read_header(&encrypted).unwrap().2.len(), ciphertext_len);
+            assert_eq!(chunked, whole);
+            assert_eq!(chunked, plain);
+        }
+    }
+
+    #[test]
+    fn decrypt_cbc_padding_only_block() {
+        // The last block, and at 1 MiB the last chunk, is only padding
+        for len in [16, MB] {
+            let plain = plaintext(len);
+            let encrypted = encrypt(&plain, len as u32);
+            let (chunked, whole) = decrypt_both(&encrypted, true);
+
+            assert_eq!(read_header(&encrypted).unwrap().2.len(), len + BLOCK_SIZE);
+            assert_eq!(chunked, whole);
+            assert_eq!(chunked, plain);
+        }
+    }
+
+    #[test]
+    fn decrypt_cbc_unpadded_keeps_every_block() {
+        let plain = plaintext(2 * MB + 7);
+        let encrypted = encrypt(&plain, plain.len() as u32);
+        let (chunked, whole) = decrypt_both(&encrypted, false);
+
+        assert_eq!(chunked.len(), 2 * MB + BLOCK_SIZE);
+        assert_eq!(chunked, whole);
+        assert_eq!(chunked[..plain.len()], plain[..]);
+    }
+
+    #[test]
+    fn decrypt_cbc_rejects_bad_padding() {
+        let plain = plaintext(MB);
+        let mut encrypted = encrypt(&plain, plain.len() as u32);
+        // Corrupts the padding block through the block before it
+        let last = encrypted.len() - 2 * BLOCK_SIZE;
+        encrypted[last + BLOCK_SIZE - 1] ^= 0x20;
+
+        let (_, iv, ciphertext) = read_header(&encrypted).unwrap();
+        let mut out = vec![0u8; ciphertext.len()];
+        assert!(decrypt_cbc(ciphertext, &iv, &mut out, true).is_err());
+    }
+
+    #[test]
+    fn reader_matches_decrypt() {
+        // Windows of one to four blocks, so the IV is handed from one
+        // window to the next many times
+        for len in [0, 1, 15, 16, 47, 48, 95, 96, 1000] {
+            let encrypted = encrypt(&plaintext(len), len as u32);
+            let expected = decrypt(&encrypted).unwrap().data;
+
+            for window_size in [BLOCK_SIZE, 3 * BLOCK_SIZE, 4 * BLOCK_SIZE] {
+                for read_size in [1, 7, 13, 64, 4096] {
+                    let (_, mut reader) = decrypt_reader(&encrypted).unwrap();
+                    reader.window_size = window_size;
+
+                    assert_eq!(read_all(reader, read_size), expected);
+                }
+            }
+        }
+    }
+
+    #[test]
+    fn reader_padding_only_last_window() {
+        // 96 bytes of plaintext fill two windows of three blocks; the
+        // third window is the padding block and decrypts to nothing
+        let plain = plaintext(96);
+        let encrypted = encrypt(&plain, plain.len() as u32);
+        let (_, mut reader) = decrypt_reader(&encrypted).unwrap();
+        reader.window_size = 3 * BLOCK_SIZE;
+
+        let mut buf = [0u8; 96];
+        assert_eq!(reader.read(&mut buf).unwrap(), 48);
+        assert_eq!(reader.read(&mut buf).unwrap(), 48);
+        assert_eq!(reader.read(&mut buf).unwrap(), 0);
+        assert_eq!(reader.position, reader.ciphertext.len());
+        assert_eq!(reader.read(&mut buf).unwrap(), 0);
+    }
+
+    #[test]
+    fn reader_default_window() {
+        // A full window of chunks decrypted in parallel, then a window of
+        // only the padding block
+        let plain = plaintext(READ_WINDOW_SIZE);
+        let encrypted = encrypt(&plain, plain.len() as u32);
+        let (_, reader) = decrypt_reader(&encrypted).unwrap();
+
+        assert_eq!(read_all(reader, 100_003), decrypt(&encrypted).unwrap().data);
+    }
 }
@@ -0,0 +1,90 @@
+use std::io::{self, Write};
+use std::sync::mpsc::{Receiver, SyncSender, sync_channel};
+use std::thread;
+
+// Size of each chunk handed to the reader
+const CHUNK_SIZE: usize = 1 << 20;
+// Finished chunks waiting for the reader; the producer blocks after that
+const CHUNKS_IN_FLIGHT: usize = 2;
+
+/// Writer that sends its output in chunks of `CHUNK_SIZE` through a
+/// bounded channel. Writes fail once the receiving side is dropped.
+struct ChunkSender {
+    buffer: Vec<u8>,
+    sender: SyncSender<Result<Vec<u8>, String>>,
+}
+
+impl ChunkSender {
+    fn send_buffer(&mut self) -> io::Result<()> {
+        if self.buffer.is_empty() {
+            return Ok(());
+        }
+
+        let chunk = std::mem::replace(&mut self.buffer, Vec::with_capacity(CHUNK_SIZE));
+        match self.sender.send(Ok(chunk)) {
+            Ok(_) => Ok(()),
+            Err(_) => Err(io::Error::new(io::ErrorKind::BrokenPipe, "Reader closed")),
+        }
+    }
+}
+
+impl Write for ChunkSender {
+    fn write(&mut self, buf: &[u8]) -> io::Result<usize> {
+        self.buffer.extend_from_slice(buf);
+
+        if self.buffer.len() >= CHUNK_SIZE {
+            match self.send_buffer() {
+                Ok(_) => (),
+                Err(e) => return Err(e),
+            }
+        }
+
+        Ok(buf.len())
+    }
+
+    fn flush(&mut self) -> io::Result<()> {
+        self.send_buffer()
+    }
+}
+
+/// Output of a background writer, as an iterator of chunks. An error ends
+/// the iteration; dropping the iterator stops the writer at its next write.
+pub struct Chunks {
+    receiver: Receiver<Result<Vec<u8>, String>>,
+}
+
+impl Iterator for Chunks {
+    type Item = Result<Vec<u8>, String>;
+
+    fn next(&mut self) -> Option<Self::Item> {
+        self.receiver.recv().ok()
+    }
+}
+
+/// Runs `produce` on a new thread and returns what it writes as chunks.
+/// At most `CHUNKS_IN_FLIGHT` finished chunks are buffered.
+pub fn spawn_chunks<F>(produce: F) -> Chunks
+where
+    F: FnOnce(&mut dyn Write) -> Result<(), String> + Send + 'static,
+{
+    let (sender, receiver) = sync_channel(CHUNKS_IN_FLIGHT);
+
+    thread::spawn(move || {
+        let mut writer = ChunkSender {
+            buffer: Vec::with_capacity(CHUNK_SIZE),
+            sender: sender.clone(),
+        };
+
+        let result = match produce(&mut writer) {
+            Ok(_) => writer.flush().map_err(|e| e.to_string()),
+            Err(e) => Err(e),
+        };
+
+        if let Err(e) = result {
+            // The reader may already be gone; nothing left to report to
+            let _ = sender.send(Err(e));
+        }
+    });
+
+    Chunks { receiver }
+}
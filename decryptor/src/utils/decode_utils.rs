@@ -1,10 +1,10 @@
-use crate::strucs::data_sii::IDComplexType;
+use crate::strucs::data_sii::{IDComplexType, OrdinalTable};
 use crate::strucs::float_vector::{
     Int32Vector2, Int32Vector3i32, SingleVector2, SingleVector3, SingleVector4, SingleVector7,
     SingleVector8,
 };
-use std::collections::HashMap;
 use std::str;
+use std::sync::Arc;
 
 const CHAR_TABLE: &'static [char] = &[
     '0', '1', '2', '3', '4', '5', '6', '7', '8', '9', 'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i',
@@ -647,12 +647,12 @@ pub fn decode_bool_array(bytes: &[u8], offset: &mut usize) -> Result<Vec<bool>,
 pub fn decode_ordinal_string_list(
     bytes: &[u8],
     offset: &mut usize,
-) -> Result<HashMap<u32, String>, String> {
+) -> Result<OrdinalTable, String> {
     let length = match decode_u32(bytes, offset) {
         Ok(res) => res,
         Err(err) => return Err(err),
     };
-    let mut values = HashMap::new();
+    let mut values = OrdinalTable::new();
 
     for _ in 0..length {
         let ordinal = match decode_u32(bytes, offset) {
@@ -664,27 +664,23 @@ pub fn decode_ordinal_string_list(
             Err(err) => return Err(err),
         };
 
-        values.insert(ordinal, string_value);
+        values.insert(ordinal, Arc::from(string_value));
     }
 
     Ok(values)
 }
 
 pub fn get_ordinal_string_from_values(
-    values: &std::collections::HashMap<u32, String>,
+    values: Option<&OrdinalTable>,
     bytes: &[u8],
     offset: &mut usize,
-) -> Result<String, String> {
+) -> Result<(u32, Option<Arc<str>>), String> {
     let index = match decode_u32(bytes, offset) {
         Ok(res) => res,
         Err(err) => return Err(err),
     };
 
-    if let Some(value) = values.get(&index) {
-        Ok(value.clone())
-    } else {
-        Ok(String::new())
-    }
+    Ok((index, values.and_then(|values| values.get(&index)).cloned()))
 }
 
 // 0x39, 0x3B, 0x3D
@@ -701,43 +697,24 @@ pub fn decode_id(bytes: &[u8], offset: &mut usize) -> Result<IDComplexType, Stri
             Err(err) => return Err(err),
         };
 
-        let data = result.address.to_le_bytes();
-        let mut parts = vec![String::new(); data.len() / 2];
-        let mut current_part = String::new();
-
-        for (i, &byte) in data.iter().enumerate() {
-            if i % 2 == 0 && i > 0 {
-                if i >= data.len() - 2 {
-                    while current_part.starts_with('0') {
-                        current_part.remove(0);
-                    }
-                }
-
-                if !current_part.is_empty() {
-                    result.value = format!("{}.{}", current_part, result.value);
-                }
-
-                parts[(data.len() / 2) - (i / 2)] = current_part.clone();
-                current_part.clear();
-            }
-
-            current_part = format!("{:02x}{}", byte, current_part);
-
-            if i == data.len() - 1 {
-                while current_part.starts_with('0') {
-                    current_part.remove(0);
-                }
-
-                if !current_part.is_empty() {
-                    result.value = format!("{}.{}", current_part, result.value);
-                }
-
-                parts[0] = current_part.clone();
-                current_part.clear();
-            }
-        }
-
-        result.value = format!("_nameless.{}", &result.value[..result.value.len() - 1]);
+        // 16-bit hex groups, most significant first. The top two lose
+        // their leading zeros and are left out only while all groups above
+        // them are zero too, so every group keeps its place.
+        let group = |i: u32| (result.address >> (16 * i)) as u16;
+
+        result.value = if group(3) != 0 {
+            format!(
+                "_nameless.{:x}.{:x}.{:04x}.{:04x}",
+                group(3),
+                group(2),
+                group(1),
+                group(0)
+            )
+        } else if group(2) != 0 {
+            format!("_nameless.{:x}.{:04x}.{:04x}", group(2), group(1), group(0))
+        } else {
+            format!("_nameless.{:04x}.{:04x}", group(1), group(0))
+        };
     } else {
         for i in 0..result.part_count {
             let s = match decode_u64_string(bytes, offset) {
@@ -792,3 +769,92 @@ pub fn decode_int32_vector2(bytes: &[u8], offset: &mut usize) -> Result<Int32Vec
 
     Ok(Int32Vector2 { a, b })
 }
+
+// Skipping helpers: advance `offset` past a value without materializing it
+
+pub fn skip_bytes(bytes: &[u8], offset: &mut usize, length: usize) -> Result<(), String> {
+    if bytes.len() < *offset + length {
+        return Err(format!("Error skipping value offset: {}", offset));
+    }
+
+    *offset += length;
+    Ok(())
+}
+
+// 0x01
+pub fn skip_utf8_string(bytes: &[u8], offset: &mut usize) -> Result<(), String> {
+    let length = match decode_u32(bytes, offset) {
+        Ok(res) => res as usize,
+        Err(err) => return Err(err),
+    };
+
+    skip_bytes(bytes, offset, length)
+}
+
+// 0x02
+pub fn skip_utf8_string_array(bytes: &[u8], offset: &mut usize) -> Result<(), String> {
+    let number_of_strings = match decode_u32(bytes, offset) {
+        Ok(res) => res,
+        Err(err) => return Err(err),
+    };
+
+    for _ in 0..number_of_strings {
+        match skip_utf8_string(bytes, offset) {
+            Ok(_) => (),
+            Err(err) => return Err(err),
+        }
+    }
+
+    Ok(())
+}
+
+// Arrays of fixed-size elements: u32 count followed by the elements
+pub fn skip_fixed_array(
+    bytes: &[u8],
+    offset: &mut usize,
+    element_size: usize,
+) -> Result<(), String> {
+    let number_of_elements = match decode_u32(bytes, offset) {
+        Ok(res) => res as usize,
+        Err(err) => return Err(err),
+    };
+
+    skip_bytes(bytes, offset, number_of_elements * element_size)
+}
+
+// 0x39, 0x3B, 0x3D
+pub fn skip_id(bytes: &[u8], offset: &mut usize) -> Result<(), String> {
+    if bytes.len() <= *offset {
+        return Err(format!("Error skipping id offset: {}", offset));
+    }
+
+    let part_count = bytes[*offset];
+    *offset += 1;
+
+    if part_count == 0xFF {
+        skip_bytes(bytes, offset, std::mem::size_of::<u64>())
+    } else {
+        skip_bytes(
+            bytes,
+            offset,
+            part_count as usize * std::mem::size_of::<u64>(),
+        )
+    }
+}
+
+// 0x3A, 0x3C, 0x3E
+pub fn skip_id_array(bytes: &[u8], offset: &mut usize) -> Result<(), String> {
+    let number_of_ids = match decode_u32(bytes, offset) {
+        Ok(res) => res,
+        Err(err) => return Err(err),
+    };
+
+    for _ in 0..number_of_ids {
+        match skip_id(bytes, offset) {
+            Ok(_) => (),
+            Err(err) => return Err(err),
+        }
+    }
+
+    Ok(())
+}
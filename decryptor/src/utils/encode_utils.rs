@@ -0,0 +1,90 @@
+// Inverse of decode_u64_string: the same table without the leading gap
+const CHAR_TABLE: &str = "0123456789abcdefghijklmnopqrstuvwxyz_";
+
+pub fn encode_u8(out: &mut Vec<u8>, value: u8) {
+    out.push(value);
+}
+
+pub fn encode_u16(out: &mut Vec<u8>, value: u16) {
+    out.extend_from_slice(&value.to_le_bytes());
+}
+
+pub fn encode_u32(out: &mut Vec<u8>, value: u32) {
+    out.extend_from_slice(&value.to_le_bytes());
+}
+
+pub fn encode_u64(out: &mut Vec<u8>, value: u64) {
+    out.extend_from_slice(&value.to_le_bytes());
+}
+
+pub fn encode_single(out: &mut Vec<u8>, value: f32) {
+    out.extend_from_slice(&value.to_le_bytes());
+}
+
+// 0x01
+pub fn encode_utf8_string(out: &mut Vec<u8>, value: &str) {
+    encode_u32(out, value.len() as u32);
+    out.extend_from_slice(value.as_bytes());
+}
+
+// 0x03
+pub fn u64_string_value(value: &str) -> Result<u64, String> {
+    let mut result: u64 = 0;
+
+    for c in value.chars().rev() {
+        let char_idx = match CHAR_TABLE.find(c) {
+            Some(res) => res as u64,
+            None => return Err(format!("Invalid character in token: {}", value)),
+        };
+
+        result = match result
+            .checked_mul(38)
+            .and_then(|res| res.checked_add(char_idx + 1))
+        {
+            Some(res) => res,
+            None => return Err(format!("Token too long: {}", value)),
+        };
+    }
+
+    Ok(result)
+}
+
+// 0x39, 0x3B, 0x3D
+pub fn encode_id(out: &mut Vec<u8>, value: &str) -> Result<(), String> {
+    if value == "null" {
+        encode_u8(out, 0);
+        return Ok(());
+    }
+
+    if let Some(nameless) = value.strip_prefix("_nameless.") {
+        // Hex groups of 16 bits, most significant first
+        let mut address: u64 = 0;
+
+        for part in nameless.split('.') {
+            let group = match u64::from_str_radix(part, 16) {
+                Ok(res) if res <= 0xFFFF => res,
+                _ => return Err(format!("Invalid nameless id: {}", value)),
+            };
+            address = (address << 16) | group;
+        }
+
+        encode_u8(out, 0xFF);
+        encode_u64(out, address);
+        return Ok(());
+    }
+
+    let parts: Vec<&str> = value.split('.').collect();
+    if parts.len() >= 0xFF {
+        return Err(format!("Too many id parts: {}", value));
+    }
+
+    encode_u8(out, parts.len() as u8);
+    for part in parts {
+        match u64_string_value(part) {
+            Ok(res) => encode_u64(out, res),
+            Err(e) => return Err(e),
+        }
+    }
+
+    Ok(())
+}
@@ -0,0 +1,44 @@
+use memmap2::Mmap;
+use std::fs::File;
+use std::ops::Deref;
+use std::path::Path;
+
+pub enum MappedFile {
+    Mapped(Mmap),
+    // Zero-length files cannot be mapped on every platform
+    Empty,
+}
+
+impl Deref for MappedFile {
+    type Target = [u8];
+
+    fn deref(&self) -> &[u8] {
+        match self {
+            MappedFile::Mapped(map) => map,
+            MappedFile::Empty => &[],
+        }
+    }
+}
+
+pub fn map_file(path: &Path) -> Result<MappedFile, String> {
+    let file = match File::open(path) {
+        Ok(res) => res,
+        Err(e) => return Err(format!("Error reading file {}: {}", path.display(), e)),
+    };
+
+    let length = match file.metadata() {
+        Ok(res) => res.len(),
+        Err(e) => return Err(format!("Error reading file {}: {}", path.display(), e)),
+    };
+
+    if length == 0 {
+        return Ok(MappedFile::Empty);
+    }
+
+    // SAFETY: the mapping is read-only. Saves are not expected to be
+    // truncated by another process while they are being decoded.
+    match unsafe { Mmap::map(&file) } {
+        Ok(res) => Ok(MappedFile::Mapped(res)),
+        Err(e) => Err(format!("Error mapping file {}: {}", path.display(), e)),
+    }
+}
@@ -1,5 +1,8 @@
 pub mod aes;
+pub mod chunks;
 pub mod decode_utils;
+pub mod encode_utils;
 pub mod file_type;
+pub mod mmap;
 pub mod serialize;
 pub mod zlib;
@@ -1,12 +1,56 @@
 use flate2::read::ZlibDecoder;
 use std::io::prelude::*;
 
-pub fn uncompress(source_buffer: &[u8]) -> Result<Vec<u8>, String> {
-    let mut decoder = ZlibDecoder::new(source_buffer);
-    let mut buffer = Vec::with_capacity(source_buffer.len());
+// Deflate cannot expand its input by more than about 1032:1
+const MAX_INFLATE_RATIO: usize = 1032;
+
+/// Inflates the zlib stream read from `source`. The output is allocated
+/// up front from `expected_size`, the size recorded in the file header,
+/// capped to what `compressed_size` bytes can inflate to so a bad header
+/// cannot force a huge allocation.
+pub fn uncompress_from<R: Read>(
+    source: R,
+    compressed_size: usize,
+    expected_size: usize,
+) -> Result<Vec<u8>, String> {
+    let capacity = expected_size.min(compressed_size.saturating_mul(MAX_INFLATE_RATIO));
+
+    let mut decoder = ZlibDecoder::new(source);
+    let mut buffer = Vec::with_capacity(capacity);
 
     match decoder.read_to_end(&mut buffer) {
         Ok(_) => Ok(buffer),
         Err(_) => Err("Error uncompressing data".to_string()),
     }
 }
+
+#[cfg(test)]
+pub(crate) mod tests {
+    use super::*;
+    use crate::utils::aes::tests::encrypt;
+    use crate::utils::aes::{decrypt, decrypt_reader};
+    use flate2::Compression;
+    use flate2::write::ZlibEncoder;
+
+    pub(crate) fn compress(source_buffer: &[u8], level: u32) -> Vec<u8> {
+        let mut encoder = ZlibEncoder::new(Vec::new(), Compression::new(level));
+        encoder.write_all(source_buffer).unwrap();
+        encoder.finish().unwrap()
+    }
+
+    #[test]
+    fn uncompress_from_ignores_a_lying_size() {
+        let text: Vec<u8> = (0..100_000).map(|i| (i * 31 % 251) as u8).collect();
+        let compressed = compress(&text, 6);
+        let encrypted = encrypt(&compressed, text.len() as u32);
+        assert_eq!(decrypt(&encrypted).unwrap().data, compressed);
+
+        for data_size in [0, 1, text.len() / 2, u32::MAX as usize] {
+            let (_, reader) = decrypt_reader(&encrypted).unwrap();
+            let result = uncompress_from(reader, encrypted.len(), data_size).unwrap();
+
+            assert_eq!(result, text);
+            assert!(result.capacity() <= encrypted.len() * MAX_INFLATE_RATIO);
+        }
+    }
+}
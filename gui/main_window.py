@@ -1,8 +1,10 @@
+import itertools
+from functools import partial
 from pathlib import Path
 
 from gui import resources_rc  # DO NOT REMOVE (registers Qt resources)
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QThreadPool
 from PySide6.QtWidgets import (
     QWidget,
     QPushButton,
@@ -11,28 +13,53 @@ from PySide6.QtWidgets import (
     QLineEdit,
     QMessageBox,
     QGridLayout,
-    QTableWidget,
-    QTableWidgetItem,
+    QAbstractItemView,
+    QHeaderView,
+    QTableView,
     QToolButton,
     QGroupBox,
-    QHBoxLayout
+    QHBoxLayout,
+    QProgressBar,
 )
 from PySide6.QtGui import QIcon
 from PySide6.QtCore import QSize
 
 from core.decryptor import SiiDecryptor
+from core.modlist import ModList
 from core.mod_sync import (
-    get_mods_from_decrypted_text,
-    replace_mods_in_text
+    get_mods_from_save_file,
+    replace_mods_in_save_file,
 )
 
-from core.modlist_xml import (
-    export_mods_to_xml,
-    import_mods_from_xml,
+from core.modlist_formats import (
+    detect_format,
+    formats,
+    load_modlist,
+    save_modlist,
 )
 
 from core.version import APP_NAME, APP_VERSION, APP_AUTHOR
 
+from gui.mod_table_model import ModTableModel
+from gui.workers import Worker
+
+# Panes whose tasks write files: once running they cannot be cancelled
+_WRITE_PANES = ("sync", "export")
+
+
+def _modlist_filters() -> str:
+    # One file dialog filter per registered format, XML first
+    return ";;".join(
+        f"{fmt.label} Mod List ({' '.join('*' + ext for ext in fmt.extensions)})"
+        for fmt in formats()
+    )
+
+
+def _any_modlist_filter() -> str:
+    patterns = " ".join("*" + ext for fmt in formats() for ext in fmt.extensions)
+    return f"Mod List ({patterns})"
+
+
 class ModSyncApp(QWidget):
     def __init__(self):
         super().__init__()
@@ -44,10 +71,19 @@ class ModSyncApp(QWidget):
         self.decryptor = SiiDecryptor()
 
         # state
-        self.source_text = None
-        self.target_text = None
-        self.source_mods = []
-        self.target_mods = []
+        # paths of loaded profiles (None for mod lists); the saves are
+        # mapped by the native module, never read into Python
+        self.source_save = None
+        self.target_save = None
+        self.source_mods = ModList()
+        self.target_mods = ModList()
+
+        # background work, one request per pane ("source", "target",
+        # "sync", "export"); a new request supersedes the pane's previous one
+        self.pool = QThreadPool.globalInstance()
+        self._tokens = itertools.count(1)
+        self._current_tasks = {}  # pane -> token
+        self._workers = {}  # token -> (worker, message, on_done)
 
         # widgets
         self.source_edit = QLineEdit()
@@ -61,11 +97,13 @@ class ModSyncApp(QWidget):
 
     # ---------- UI ----------
     def _create_table(self):
-        table = QTableWidget(0, 3)
-        table.setHorizontalHeaderLabels(["#", "Mod ID", "Mod Name"])
-        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table = QTableView()
+        table.setModel(ModTableModel(table))
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         table.horizontalHeader().setStretchLastSection(True)
         table.verticalHeader().setVisible(False)
+        # Fixed row height: the view never measures rows it does not paint
+        table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         return table
 
     def _build_ui(self):
@@ -97,7 +135,7 @@ class ModSyncApp(QWidget):
         layout.addLayout(top_bar, 0, 0, 1, 4)
 
         # ========= SOURCE =========
-        source_box = QGroupBox("Source (Profile / XML)")
+        source_box = QGroupBox("Source (Profile / Mod List)")
         source_layout = QGridLayout(source_box)
 
         self.source_edit = QLineEdit()
@@ -118,15 +156,15 @@ class ModSyncApp(QWidget):
         )
         load_profile_btn.clicked.connect(self.load_source_profile)
 
-        load_xml_btn = QPushButton("Load XML")
+        load_xml_btn = QPushButton("Load Mod List")
         load_xml_btn.setToolTip(
-            "Load a mod list from an XML file as the source"
+            "Load a mod list (XML, JSON or binary) as the source"
         )
         load_xml_btn.clicked.connect(self.load_source_xml)
 
-        self.export_btn = QPushButton("Export Mods (XML)")
+        self.export_btn = QPushButton("Export Mods")
         self.export_btn.setToolTip(
-            "Export the current source mod list to an XML file"
+            "Export the current source mod list (XML by default)"
         )
         self.export_btn.clicked.connect(self.export_mods)
 
@@ -180,12 +218,115 @@ class ModSyncApp(QWidget):
 
         layout.addWidget(self.sync_btn, 2, 0, 1, 4)
 
+        # ========= BACKGROUND TASKS =========
+        self.status_label = QLabel()
+        self.status_label.setStyleSheet("color: #aaa;")
+
+        # No step counts from the decoder: a busy indicator
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setTextVisible(False)
+
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.setToolTip(
+            "Stop waiting for the running loads (saves always finish)"
+        )
+        self.cancel_btn.clicked.connect(self.cancel_tasks)
+
+        status_bar = QHBoxLayout()
+        status_bar.addWidget(self.status_label)
+        status_bar.addWidget(self.progress_bar, 1)
+        status_bar.addWidget(self.cancel_btn)
+
+        layout.addLayout(status_bar, 3, 0, 1, 4)
+        self._update_busy_state()
+
     def _update_buttons_state(self):
         has_source = bool(self.source_mods)
-        has_target = bool(self.target_text)
+        has_target = bool(self.target_save)
+
+        # One write per pane at a time: a second one could write the same
+        # file concurrently, and a running write cannot be stopped
+        self.export_btn.setEnabled(has_source and "export" not in self._current_tasks)
+        self.sync_btn.setEnabled(
+            has_source and has_target and "sync" not in self._current_tasks
+        )
 
-        self.export_btn.setEnabled(has_source)
-        self.sync_btn.setEnabled(has_source and has_target)
+    def _update_busy_state(self):
+        messages = [self._workers[token][1] for token in self._current_tasks.values()]
+        busy = bool(messages)
+
+        self.status_label.setText(" | ".join(messages))
+        self.progress_bar.setVisible(busy)
+        self.cancel_btn.setVisible(busy)
+        # A running write only reports when its file is complete
+        self.cancel_btn.setEnabled(
+            any(pane not in _WRITE_PANES for pane in self._current_tasks)
+        )
+        self._update_buttons_state()
+
+    # ---------- Background tasks ----------
+    def _start_task(self, pane: str, message: str, on_done, func, *args):
+        """
+        Runs func(*args) on the thread pool; on_done(result) is called on
+        the GUI thread unless the task was cancelled or superseded by a
+        newer one for the same pane. Errors are shown in a message box.
+        Write panes are never superseded: while one of their tasks is in
+        flight, a new one is not started.
+        """
+        previous = self._current_tasks.get(pane)
+        if previous is not None:
+            if pane in _WRITE_PANES:
+                return
+            self._discard_task(previous)
+
+        token = next(self._tokens)
+        worker = Worker(pane, token, func, *args)
+        # Owned by Python, not the pool: released in the result slots
+        worker.setAutoDelete(False)
+        worker.signals.finished.connect(self._on_task_finished)
+        worker.signals.failed.connect(self._on_task_failed)
+
+        self._current_tasks[pane] = token
+        self._workers[token] = (worker, message, on_done)
+        self.pool.start(worker)
+        self._update_busy_state()
+
+    def _discard_task(self, token: int) -> bool:
+        # A queued task is taken back; a running one finishes and its
+        # result is ignored (the native decoder cannot be interrupted)
+        worker = self._workers[token][0]
+        if self.pool.tryTake(worker):
+            del self._workers[token]
+            return True
+        return False
+
+    def _take_result(self, pane: str, token: int):
+        _, _, on_done = self._workers.pop(token)
+        if self._current_tasks.get(pane) != token:
+            return None  # cancelled or superseded
+
+        del self._current_tasks[pane]
+        self._update_busy_state()
+        return on_done
+
+    def _on_task_finished(self, pane: str, token: int, result):
+        on_done = self._take_result(pane, token)
+        if on_done is not None:
+            on_done(result)
+
+    def _on_task_failed(self, pane: str, token: int, error: str):
+        if self._take_result(pane, token) is not None:
+            QMessageBox.critical(self, "Error", error)
+
+    def cancel_tasks(self):
+        # Loads are dropped. A save or export that has started keeps its
+        # status until the file is written, and still reports the result
+        for pane, token in list(self._current_tasks.items()):
+            if self._discard_task(token) or pane not in _WRITE_PANES:
+                del self._current_tasks[pane]
+
+        self._update_busy_state()
 
     # ---------- About ----------
     def show_about(self):
@@ -204,31 +345,19 @@ class ModSyncApp(QWidget):
         )
 
     # ---------- Logic ----------
-    def populate_table(self, table: QTableWidget, mods: list[str]):
-        table.setRowCount(0)
-
-        for i, mod in enumerate(mods):
-            mod_id, mod_name = mod.split("|", 1) if "|" in mod else (mod, "")
-            table.insertRow(i)
-            table.setItem(i, 0, QTableWidgetItem(str(i)))
-            table.setItem(i, 1, QTableWidgetItem(mod_id))
-            table.setItem(i, 2, QTableWidgetItem(mod_name))
+    def populate_table(self, table: QTableView, mods: ModList):
+        # One model reset; rows are read from `mods` as they are painted
+        table.model().set_mods(mods)
 
     def run_sync(self):
         if not self.source_mods:
             QMessageBox.critical(self, "Error", "No source mods loaded.")
             return
 
-        if not self.target_text:
+        if not self.target_save:
             QMessageBox.critical(self, "Error", "Please load a target profile.")
             return
 
-        try:
-            new_text = replace_mods_in_text(self.target_text, self.source_mods)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
-            return
-        
         target_path = Path(self.target_edit.text())
         default_path = target_path.parent / "profile.sii"
 
@@ -241,52 +370,83 @@ class ModSyncApp(QWidget):
         if not out_path:
             return
 
-        Path(out_path).write_text(new_text, encoding="utf-8")
+        mods = self.source_mods
+        self._start_task(
+            "sync",
+            f"Saving {Path(out_path).name}",
+            partial(self._sync_done, mods, out_path),
+            self._write_synced_profile,
+            self.target_save,
+            mods,
+            out_path,
+        )
+
+    def _write_synced_profile(self, save_path: str, mods: ModList, out_path: str):
+        # Worker thread. Only active_mods differs from the target; an
+        # encrypted target is written decrypted
+        new_data = replace_mods_in_save_file(self.decryptor, save_path, mods)
+        Path(out_path).write_bytes(new_data)
 
+    def _sync_done(self, mods: ModList, out_path: str, _result):
         QMessageBox.information(
             self,
             "Success",
-            f"Copied {len(self.source_mods)} mods from Source to Target.\n\nSaved to:\n{out_path}",
+            f"Copied {len(mods)} mods from Source to Target.\n\nSaved to:\n{out_path}",
         )
+
     # ---------- File Helpers ----------
     def _load_mods_from_file(self, path: str):
         """
-        Load mods from either XML or SII.
-        Returns: (mods, text_or_none)
-        """
-        if path.lower().endswith(".xml"):
-            mods = import_mods_from_xml(path)
-            return mods, None
+        Load mods from a profile (SII) or a mod list file.
+        Returns: (mods, save_path_or_none)
 
+        For profiles only the active_mods array is read, from the memory-
+        mapped file; the path is returned so the target can be rewritten
+        from it later. Mod list formats are detected from the file
+        contents, then the extension.
+        """
         if path.lower().endswith(".sii"):
-            text = self.decryptor.decrypt_to_string(path)
-            mods = get_mods_from_decrypted_text(text)
-            return mods, text
+            mods = get_mods_from_save_file(self.decryptor, path)
+            return mods, path
 
-        raise ValueError("Unsupported file type")
+        return load_modlist(path), None
     
-    def _apply_source(self, mods, text, path):
+    def _apply_source(self, mods, save_path, path):
         self.source_edit.setText(path)
         self.source_mods = mods
-        self.source_text = text
+        self.source_save = save_path
         self.populate_table(self.source_table, mods)
-        source_type = "Profile" if text else "XML"
+        if path.lower().endswith(".sii"):
+            source_type = "Profile"
+        else:
+            source_type = detect_format(path).label
         self.source_badge.setText(
             f'Source: <span style="color:#4CAF50;"><b>{source_type}</b></span>'
         )
         self._update_buttons_state()
 
 
-    def _apply_target(self, mods: list[str], text: str, path: str):
+    def _apply_target(self, mods: ModList, save_path: str, path: str):
         self.target_edit.setText(path)
         self.target_mods = mods
-        self.target_text = text
+        self.target_save = save_path
         self.populate_table(self.target_table, mods)
         self.target_badge.setText(
             'Target: <span style="color:#F44336;"><b>Profile</b></span>'
         )
         self._update_buttons_state()
 
+    def _load_in_background(self, pane: str, path: str, on_loaded):
+        # Decrypting and parsing run on the pool; on_loaded(mods, save, path)
+        # runs on the GUI thread
+        self._start_task(
+            pane,
+            f"Loading {Path(path).name}",
+            lambda result: on_loaded(*result, path),
+            self._load_mods_from_file,
+            path,
+        )
+
     def load_source_profile(self):
         path, _ = QFileDialog.getOpenFileName(
             self, "Load Source Profile", "", "ETS2 Profile (*.sii)"
@@ -294,32 +454,24 @@ class ModSyncApp(QWidget):
         if not path:
             return
 
-        try:
-            mods, text = self._load_mods_from_file(path)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
-            return
-
-        self._apply_source(mods, text, path)
+        # The source profile is only read, never written back
+        self._load_in_background("source", path, self._apply_source)
 
     def load_source_xml(self):
         path, _ = QFileDialog.getOpenFileName(
-            self, "Load Source XML", "", "XML Mod List (*.xml)"
+            self, "Load Source Mod List", "", _any_modlist_filter()
         )
         if not path:
             return
 
-        try:
-            mods, text = self._load_mods_from_file(path)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
-            return
+        self._load_in_background("source", path, self._source_list_loaded)
 
+    def _source_list_loaded(self, mods: ModList, data, path: str):
         if not mods:
-            QMessageBox.warning(self, "Empty", "XML contains no mods.")
+            QMessageBox.warning(self, "Empty", "Mod list contains no mods.")
             return
 
-        self._apply_source(mods, text, path)
+        self._apply_source(mods, data, path)
 
     def load_target_profile(self):
         path, _ = QFileDialog.getOpenFileName(
@@ -328,35 +480,26 @@ class ModSyncApp(QWidget):
         if not path:
             return
 
-        try:
-            mods, text = self._load_mods_from_file(path)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
-            return
-
-        self._apply_target(mods, text, path)
+        self._load_in_background("target", path, self._apply_target)
 
     def import_mods(self):
         path, _ = QFileDialog.getOpenFileName(
             self,
-            "Import Mods (XML or Profile)",
+            "Import Mods (Mod List or Profile)",
             "",
-            "XML Mod List (*.xml);;ETS2 Profile (*.sii)",
+            f"{_any_modlist_filter()};;ETS2 Profile (*.sii)",
         )
         if not path:
             return
 
-        try:
-            mods, text = self._load_mods_from_file(path)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
-            return
+        self._load_in_background("source", path, self._imported)
 
+    def _imported(self, mods: ModList, data, path: str):
         if not mods:
             QMessageBox.warning(self, "Empty", "No mods found.")
             return
 
-        self._apply_source(mods, text, path)
+        self._apply_source(mods, data, path)
 
         QMessageBox.information(
             self, "Imported", f"Imported {len(mods)} mods into Source."
@@ -369,21 +512,34 @@ class ModSyncApp(QWidget):
         
         default_path = Path.cwd() / "modlist.xml"
 
-        out_path, _ = QFileDialog.getSaveFileName(
+        out_path, selected_filter = QFileDialog.getSaveFileName(
             self,
             "Export Mods",
             str(default_path),
-            "XML Mod List (*.xml)",
+            _modlist_filters(),
         )
         if not out_path:
             return
 
-        try:
-            export_mods_to_xml(self.source_mods, out_path)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
-            return
+        # A known extension picks the format, else the chosen filter
+        extensions = {ext for fmt in formats() for ext in fmt.extensions}
+        format_name = None
+        if Path(out_path).suffix.lower() not in extensions:
+            format_name = next(
+                (fmt.name for fmt in formats()
+                 if selected_filter.startswith(f"{fmt.label} ")),
+                None,
+            )
 
-        QMessageBox.information(
-            self, "Exported", f"Exported {len(self.source_mods)}  to:\n\n{out_path}"
-        )
\ No newline at end of file
+        mods = self.source_mods
+        self._start_task(
+            "export",
+            f"Exporting {Path(out_path).name}",
+            lambda _result: QMessageBox.information(
+                self, "Exported", f"Exported {len(mods)}  to:\n\n{out_path}"
+            ),
+            save_modlist,
+            mods,
+            out_path,
+            format_name,
+        )
@@ -0,0 +1,47 @@
+# mod_table_model.py
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from core.modlist import ModList
+
+
+class ModTableModel(QAbstractTableModel):
+    """
+    Read-only "#, Mod ID, Mod Name" view over a ModList. Cells are
+    produced in data() only for the rows the view paints; loading a new
+    list is a single model reset.
+    """
+
+    HEADERS = ("#", "Mod ID", "Mod Name")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._mods = ModList()
+
+    def set_mods(self, mods: ModList):
+        self.beginResetModel()
+        self._mods = mods
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        # Flat table: only the root has rows
+        return 0 if parent.isValid() else len(self._mods)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+
+        row = index.row()
+        column = index.column()
+        if column == 0:
+            return str(row)
+
+        mod = self._mods[row]
+        return mod.id if column == 1 else mod.display_name
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
@@ -0,0 +1,34 @@
+# workers.py
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+
+class WorkerSignals(QObject):
+    # (pane, token, result) / (pane, token, error message)
+    finished = Signal(str, int, object)
+    failed = Signal(str, int, str)
+
+
+class Worker(QRunnable):
+    """
+    Runs func(*args) on a QThreadPool thread and reports back through
+    signals, which Qt delivers on the GUI thread. `pane` and `token` say
+    which request the result belongs to, so the receiver can drop
+    results of requests that were cancelled or superseded.
+    """
+
+    def __init__(self, pane: str, token: int, func, *args):
+        super().__init__()
+        self.pane = pane
+        self.token = token
+        self.func = func
+        self.args = args
+        # Created on the GUI thread, so connected slots run there
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            result = self.func(*self.args)
+        except Exception as e:
+            self.signals.failed.emit(self.pane, self.token, str(e))
+        else:
+            self.signals.finished.emit(self.pane, self.token, result)